@@ -34,14 +34,21 @@
         'data/sicore_regime_codes.xml',
         'data/sicore_document_types.xml',
         
+        # Data - Trabajos programados
+        'data/sicore_export_cron.xml',
+        
         # Views
         'views/sicore_export_log_views.xml',
+        'views/sicore_export_error_views.xml',
+        'views/sicore_export_batch_views.xml',
         'views/sicore_catalog_views.xml',
         'views/res_partner_views.xml',
         'views/account_journal_views.xml',
         'views/account_account_views.xml',
         'views/account_tax_views.xml',
         'wizards/sicore_export_wizard_views.xml',
+        'wizards/sicore_export_compare_wizard_views.xml',
+        'wizards/sicore_reconcile_wizard_views.xml',
         
         # Menus
         'views/sicore_export_menus.xml',
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http  # type: ignore
+from odoo.http import request, content_disposition  # type: ignore
+
+from ..models.sicore_export_log import FILE_CHUNK_SIZE
+
+
+class SicoreExportController(http.Controller):
+
+    @http.route('/sicore_export/download/<int:log_id>', type='http', auth='user')
+    def download_export_file(self, log_id, **kwargs):
+        """
+        Descarga el TXT de una exportación: el propio o el reutilizado de otra
+        exportación idéntica, descomprimido al vuelo si se guardó con gzip
+        """
+        log = request.env['sicore.export.log'].browse(log_id).exists()
+        if not log:
+            raise request.not_found()
+        log.check_access('read')
+        
+        content = log._open_file_content()
+        if content is None:
+            raise request.not_found()
+        
+        def stream_content():
+            with content:
+                for chunk in iter(lambda: content.read(FILE_CHUNK_SIZE), b''):
+                    yield chunk
+        
+        return request.make_response(stream_content(), headers=[
+            ('Content-Type', 'text/plain; charset=utf-8'),
+            ('Content-Disposition', content_disposition(log._get_download_file_name())),
+        ])
@@ -7,6 +7,10 @@ from . import sicore_document_type
 
 # Modelos principales
 from . import sicore_export_log
+from . import sicore_export_error
+from . import sicore_export_line
+from . import sicore_preview_cache
+from . import sicore_export_batch
 from .generators import abstract_sicore_generator
 from .generators import perception_generator
 from .generators import retention_generator
@@ -17,3 +21,5 @@ from . import res_partner
 from . import account_journal
 from . import account_account
 from . import account_tax
+from . import account_move
+from . import account_move_line
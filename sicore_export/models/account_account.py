@@ -15,3 +15,10 @@ class AccountAccount(models.Model):
        default='none',
        required=True,
        help='Define si los apuntes de esta cuenta se exportan a SICORE y de qué tipo')
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'sicore_export_type' in vals:
+            # Cambia qué apuntes entran en cada exportación de las empresas de la cuenta
+            self.env['sicore.preview.cache'].sudo()._invalidate_previews(self.mapped('company_ids').ids)
+        return res
@@ -27,3 +27,10 @@ class AccountJournal(models.Model):
         """Determina si es diario de presupuesto según tipo exportación"""
         for journal in self:
             journal.is_budget_journal = (journal.sicore_export_type == 'budget')
+    
+    def write(self, vals):
+        res = super().write(vals)
+        if 'sicore_export_type' in vals:
+            # Cambia qué diarios entran en cada exportación de la empresa
+            self.env['sicore.preview.cache'].sudo()._invalidate_previews(self.mapped('company_id').ids)
+        return res
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models  # type: ignore
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def _post(self, soft=True):
+        posted = super()._post(soft=soft)
+        posted._invalidate_sicore_previews()
+        return posted
+
+    def button_draft(self):
+        res = super().button_draft()
+        self._invalidate_sicore_previews()
+        return res
+
+    def _invalidate_sicore_previews(self):
+        """
+        Descarta las vistas previas SICORE cacheadas de las empresas y períodos
+        en los que estos asientos tienen apuntes en cuentas SICORE
+        """
+        if not self:
+            return
+        groups = self.env['account.move.line'].sudo()._read_group(
+            [('move_id', 'in', self.ids), ('sicore_export_type', '!=', False)],
+            ['company_id'],
+            ['date:min', 'date:max'],
+        )
+        PreviewCache = self.env['sicore.preview.cache'].sudo()
+        for company, date_min, date_max in groups:
+            PreviewCache._invalidate_previews(company.ids, date_min, date_max)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api  # type: ignore
+from odoo.tools.sql import column_exists, create_column, create_index  # type: ignore
+
+
+class AccountMoveLine(models.Model):
+    _inherit = 'account.move.line'
+
+    sicore_export_type = fields.Selection([
+        ('retention', 'Retenciones'),
+        ('perception', 'Percepciones'),
+        ('fuel', 'Combustibles'),
+    ], string='Exportación SICORE',
+       compute='_compute_sicore_export_type',
+       store=True,
+       index='btree_not_null',
+       help='Tipo de exportación SICORE del apunte: el de su cuenta contable, '
+            'salvo que el diario sea solo de presupuestos. Vacío si no se exporta.')
+
+    @api.depends('account_id.sicore_export_type', 'journal_id.sicore_export_type')
+    def _compute_sicore_export_type(self):
+        """Clasifica el apunte según la cuenta, excluyendo los diarios de presupuesto"""
+        for line in self:
+            export_type = line.account_id.sicore_export_type
+            if not export_type or export_type == 'none' or line.journal_id.sicore_export_type == 'budget':
+                line.sicore_export_type = False
+            else:
+                line.sicore_export_type = export_type
+
+    def _auto_init(self):
+        """
+        Crea y completa la columna con SQL: recomputar con el ORM una tabla de
+        millones de apuntes al actualizar el módulo sería muy lento.
+        Solo se escriben los apuntes exportables (el resto queda en NULL).
+        """
+        cr = self.env.cr
+        if not column_exists(cr, 'account_move_line', 'sicore_export_type'):
+            create_column(cr, 'account_move_line', 'sicore_export_type', 'varchar')
+            if (column_exists(cr, 'account_account', 'sicore_export_type')
+                    and column_exists(cr, 'account_journal', 'sicore_export_type')):
+                cr.execute("""
+                    UPDATE account_move_line aml
+                       SET sicore_export_type = aa.sicore_export_type
+                      FROM account_account aa, account_journal aj
+                     WHERE aa.id = aml.account_id
+                       AND aj.id = aml.journal_id
+                       AND aa.sicore_export_type IN ('retention', 'perception', 'fuel')
+                       AND aj.sicore_export_type IS DISTINCT FROM 'budget'
+                """)
+        return super()._auto_init()
+
+    def init(self):
+        super().init()
+        # Índice parcial para las búsquedas de exportación: solo apuntes publicados
+        # y exportables, ordenados por empresa, tipo y fecha
+        create_index(
+            self.env.cr,
+            'account_move_line_sicore_export_idx',
+            self._table,
+            ['company_id', 'sicore_export_type', 'date'],
+            where="sicore_export_type IS NOT NULL AND parent_state = 'posted'",
+        )
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields # type: ignore
+from odoo import models, fields, api # type: ignore
+
+# Campos de los que depende el mapa de códigos cacheado de los generadores (_get_tax_code_map)
+SICORE_TAX_FIELDS = {'sicore_tax_code_id', 'sicore_regime_code_id'}
 
 
 class AccountTax(models.Model):
@@ -17,3 +20,23 @@ class AccountTax(models.Model):
         string='Código Régimen SICORE',
         help='Código de régimen AFIP que define el concepto de la retención/percepción'
     )
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        taxes = super().create(vals_list)
+        if any(SICORE_TAX_FIELDS & set(vals) for vals in vals_list):
+            self.env.registry.clear_cache()
+        return taxes
+    
+    def write(self, vals):
+        res = super().write(vals)
+        if SICORE_TAX_FIELDS & set(vals):
+            self.env.registry.clear_cache()
+        return res
+    
+    def unlink(self):
+        clear_cache = any(tax.sicore_tax_code_id or tax.sicore_regime_code_id for tax in self)
+        res = super().unlink()
+        if clear_cache:
+            self.env.registry.clear_cache()
+        return res
@@ -1,10 +1,34 @@
 # -*- coding: utf-8 -*-
 
-import re
-import unicodedata
-from odoo import models, fields, _  # type: ignore
+import hashlib
+import logging
+import os
+import traceback
+from odoo import models, tools, _  # type: ignore
+from odoo.tools import SQL  # type: ignore
 from odoo.exceptions import ValidationError  # type: ignore
 
+from . import sicore_diff, sicore_format_pool, sicore_layout, sicore_reader
+from .export_stats import NULL_STATS
+
+_logger = logging.getLogger(__name__)
+
+# Cada cuántos registros se informa el avance (exportaciones en segundo plano)
+PROGRESS_BATCH_SIZE = 1000
+
+# Versión del formato de los fragmentos cacheados (incrementar si cambia cómo se
+# arma una línea sin que cambien los datos de origen, para descartar la caché)
+FRAGMENT_CACHE_VERSION = 2
+
+# Cantidad máxima de nombres listados en cada mensaje de la validación previa
+PREFLIGHT_MAX_NAMES = 20
+
+# Parámetros del wizard que no modifican el contenido de las líneas
+FRAGMENT_NEUTRAL_PARAMS = ('adv_sql_extraction', 'adv_use_line_cache', 'adv_profile_export', 'adv_parallel_workers')
+
+# Mínimo de registros a formatear para que el pool de procesos compense su arranque
+PARALLEL_MIN_RECORDS = 5000
+
 
 class AbstractSicoreGenerator(models.AbstractModel):
     _name = 'sicore.abstract.generator'
@@ -36,54 +60,345 @@ class AbstractSicoreGenerator(models.AbstractModel):
         """Debe retornar domain para buscar registros a exportar"""
         raise NotImplementedError("Debe implementar _get_records_domain()")
 
-    def _get_record_values(self, record, wizard=None):
+    def _get_row_values(self, line, data, wizard=None):
         """
-        Debe retornar diccionario con valores del record según specs
-        Ahora recibe el wizard para acceder a la configuración avanzada
+        Debe retornar diccionario con valores de la línea según specs
+        (importes en centavos, ver sicore_layout.to_cents()).
+        Trabaja solo con las estructuras cargadas por _prefetch_export_data():
+        - line: valores leídos del apunte (data['lines'][id])
+        - data: diccionario completo de la extracción
         Ejemplo: {'codigo_comprobante': '07', 'fecha_emision': date, ...}
         """
-        raise NotImplementedError("Debe implementar _get_record_values()")
+        raise NotImplementedError("Debe implementar _get_row_values()")
 
     def _get_separator(self):
         """Retorna separador de campos ('' para posición fija, ';' para CSV, etc.)"""
         return ''  # Por defecto posición fija
 
     # ============================================================
-    # VALIDACIONES GENÉRICAS
+    # DISEÑO DE LÍNEA COMPILADO
     # ============================================================
 
-    def validate_cuit(self, cuit):
+    @tools.ormcache()
+    def _get_line_layout(self):
         """
-        Valida CUIT argentino con dígito verificador
-        Retorna CUIT limpio (solo números) o lanza ValidationError
+        Retorna el plan compilado (SicoreLineLayout) de la especificación de campos.
+        Se compila una sola vez por registro y por generador; al compilar se valida
+        que las posiciones declaradas sean contiguas y coincidan con 'length'.
         """
-        if not cuit:
-            raise ValidationError(_("CUIT es requerido"))
-        
-        # Limpiar CUIT (quitar guiones y espacios)
-        cuit_clean = re.sub(r'[^0-9]', '', str(cuit))
+        return sicore_layout.compile_layout(self._get_field_specs(), self._get_separator())
+
+    def _register_hook(self):
+        """Compila el diseño de línea al cargar el registro para detectar errores de especificación"""
+        res = super()._register_hook()
+        if not self._abstract:
+            try:
+                self._get_line_layout()
+            except ValidationError as e:
+                _logger.error("[SICORE] Especificación de campos inválida en %s: %s", self._name, e)
+        return res
+
+    # ============================================================
+    # EXTRACCIÓN EN BLOQUE
+    # ============================================================
+
+    def _read_by_id(self, records, field_names):
+        """
+        Lee field_names de records en una sola llamada y retorna {id: valores}.
+        Los many2one quedan como id (o False) y los x2many como lista de ids.
+        """
+        if not records:
+            return {}
+        return {vals['id']: vals for vals in records.read(field_names, load=None)}
+
+    def _get_line_read_fields(self):
+        """Campos de account.move.line que necesita el generador"""
+        return ['date', 'name', 'balance', 'partner_id', 'move_id', 'account_id', 'tax_line_id', 'tax_ids', 'write_date']
+
+    def _get_move_read_fields(self):
+        """Campos de account.move que necesita el generador"""
+        return ['name', 'write_date']
+
+    def _prefetch_export_data(self, records, wizard=None):
+        """
+        Carga todo lo que necesita una exportación con un número fijo de lecturas
+        en bloque (independiente de la cantidad de apuntes) y lo retorna como
+        estructuras Python planas indexadas por id:
         
-        if len(cuit_clean) != 11:
-            raise ValidationError(_("CUIT debe tener 11 dígitos. CUIT: %s") % cuit)
+        {
+            'lines': {line_id: {...}},
+            'moves': {move_id: {...}},
+            'partners': {partner_id: {'name', 'vat', 'sicore_cuit', 'sicore_document_type_id', 'write_date'}},
+            'document_types': {doc_type_id: code},
+            'taxes': {tax_id: (codigo_impuesto, codigo_regimen)},
+            'company': {'name', 'vat', 'sicore_cuit'},
+        }
         
-        # Validar dígito verificador
-        base = [5, 4, 3, 2, 7, 6, 5, 4, 3, 2]
-        aux = 0
+        Retenciones y percepciones toman el CUIT normalizado de res.partner (sicore_cuit,
+        calculado al guardar el contacto) en lugar de limpiarlo en cada línea. La
+        presencia del CUIT se valida sobre vat, como lo carga el usuario.
         
-        for i in range(10):
-            aux += int(cuit_clean[i]) * base[i]
+        Los generadores agregan sus propios datos extendiendo este método.
+        """
+        lines = self._read_by_id(records, self._get_line_read_fields())
+        
+        partner_ids = set()
+        move_ids = set()
+        tax_ids = set()
+        for line in lines.values():
+            if line['partner_id']:
+                partner_ids.add(line['partner_id'])
+            move_ids.add(line['move_id'])
+            if line['tax_line_id']:
+                tax_ids.add(line['tax_line_id'])
+            tax_ids.update(line['tax_ids'])
+        
+        partners = self._read_by_id(
+            self.env['res.partner'].browse(list(partner_ids)),
+            ['name', 'vat', 'sicore_cuit', 'sicore_document_type_id', 'write_date'],
+        )
+        doc_type_codes = self._get_catalog_codes('sicore.document.type')
+        document_types = {
+            p['sicore_document_type_id']: doc_type_codes[p['sicore_document_type_id']]
+            for p in partners.values() if p['sicore_document_type_id']
+        }
         
-        aux = 11 - (aux % 11)
+        company = self.env.company
+        return {
+            'lines': lines,
+            'moves': self._read_by_id(self.env['account.move'].browse(list(move_ids)), self._get_move_read_fields()),
+            'partners': partners,
+            'document_types': document_types,
+            'taxes': self._read_tax_codes(self.env['account.tax'].browse(list(tax_ids))),
+            'company': self._get_company_data(company),
+        }
+
+    def _get_company_data(self, company):
+        """Datos de la empresa que usan las líneas (cliente en combustibles, ordenante)"""
+        return {'name': company.name, 'vat': company.partner_id.vat, 'sicore_cuit': company.partner_id.sicore_cuit}
+
+    @tools.ormcache('model_name')
+    def _get_catalog_codes(self, model_name):
+        """
+        Retorna {id: código} de un catálogo SICORE completo (impuestos, regímenes,
+        tipos de documento). Los catálogos son chicos y casi no cambian, por lo que se
+        cachean por registro y se comparten entre exportaciones (y entre las
+        combinaciones de un lote); se invalidan al modificar el catálogo.
+        """
+        records = self.env[model_name].sudo().with_context(active_test=False).search([])
+        return {vals['id']: vals['code'] for vals in records.read(['code'])}
+
+    @tools.ormcache()
+    def _get_tax_code_map(self):
+        """
+        Retorna {tax_id: (codigo_impuesto, codigo_regimen)} de todos los impuestos con
+        algún código SICORE, de todas las empresas. Como los catálogos, se cachea por
+        registro y se comparte entre exportaciones y entre las combinaciones de un
+        lote; se invalida al modificar los códigos SICORE de un impuesto o un catálogo.
+        """
+        taxes = self.env['account.tax'].sudo().with_context(active_test=False).search([
+            '|', ('sicore_tax_code_id', '!=', False), ('sicore_regime_code_id', '!=', False),
+        ])
+        tax_codes = self._get_catalog_codes('sicore.tax.code')
+        regime_codes = self._get_catalog_codes('sicore.regime.code')
+        return {
+            tax_id: (
+                tax_codes[t['sicore_tax_code_id']] if t['sicore_tax_code_id'] else None,
+                regime_codes[t['sicore_regime_code_id']] if t['sicore_regime_code_id'] else None,
+            )
+            for tax_id, t in self._read_by_id(taxes, ['sicore_tax_code_id', 'sicore_regime_code_id']).items()
+        }
+
+    def _read_tax_codes(self, taxes):
+        """Retorna {tax_id: (codigo_impuesto, codigo_regimen)} de taxes desde el mapa cacheado"""
+        tax_code_map = self._get_tax_code_map()
+        return {tax_id: tax_code_map.get(tax_id, (None, None)) for tax_id in taxes.ids}
+
+    def _get_tax_and_regime_codes(self, line, data):
+        """
+        Obtiene código de impuesto y régimen desde el IMPUESTO asociado al apunte.
         
-        if aux == 11:
-            aux = 0
-        elif aux == 10:
-            aux = 9
+        Busca en:
+        1. tax_line_id: si la línea ES el resultado de un impuesto (típico para retenciones/percepciones)
+        2. tax_ids: impuestos aplicados a esta línea
         
-        if aux != int(cuit_clean[10]):
-            raise ValidationError(_("CUIT inválido (dígito verificador incorrecto). CUIT: %s") % cuit)
+        NO hay fallback a cuenta contable ni partner - los códigos DEBEN estar en el impuesto.
         
-        return cuit_clean
+        Se resuelve sobre el mapa data['taxes'] y el resultado se guarda por combinación
+        de impuestos, de modo que cada apunte cuesta una búsqueda en diccionario.
+        """
+        tax_key = (line['tax_line_id'], tuple(line['tax_ids']))
+        resolved = data.setdefault('resolved_tax_codes', {})
+        if tax_key in resolved:
+            return resolved[tax_key]
+        
+        taxes = data['taxes']
+        tax_code = None
+        regime_code = None
+        
+        if line['tax_line_id']:
+            tax_code, regime_code = taxes[line['tax_line_id']]
+        
+        if not tax_code or not regime_code:
+            for tax_id in line['tax_ids']:
+                candidate_tax_code, candidate_regime_code = taxes[tax_id]
+                tax_code = tax_code or candidate_tax_code
+                regime_code = regime_code or candidate_regime_code
+                if tax_code and regime_code:
+                    break
+        
+        resolved[tax_key] = (tax_code, regime_code)
+        return tax_code, regime_code
+
+    def _get_record_values(self, record, wizard=None):
+        """
+        Retorna diccionario con valores del record según specs.
+        Atajo para un registro suelto: las exportaciones usan _prefetch_export_data()
+        una única vez para todos los registros.
+        """
+        data = self._prefetch_export_data(record, wizard)
+        return self._get_row_values(data['lines'][record.id], data, wizard)
+
+    # ============================================================
+    # VALIDACIÓN PREVIA EN BLOQUE
+    # ============================================================
+
+    def _get_preflight_checks(self):
+        """
+        Chequeos de la validación previa, cada uno retorna una lista de
+        (categoría, mensaje, ids de apuntes afectados, mensaje por apunte); las
+        categorías son las de sicore.export.error. El mensaje agrupado (cantidad de
+        apuntes e instrucciones) va una sola vez al log de errores; cada error por
+        apunte guarda solo el mensaje por apunte. Los generadores agregan los suyos.
+        """
+        return [self._preflight_check_partners]
+
+    def _preflight_validate(self, data):
+        """
+        Valida todos los apuntes de la exportación en bloque, antes de formatear.
+        Cada problema se informa una sola vez agrupado por partner, impuesto, asiento
+        o cuenta (con la cantidad de apuntes afectados) en lugar de un error por apunte.
+        Retorna lista de (categoría, mensaje, ids de apuntes, mensaje por apunte)
+        """
+        problems = []
+        for check in self._get_preflight_checks():
+            problems.extend(check(data))
+        return problems
+
+    def _group_line_ids(self, data, key_func):
+        """Agrupa los ids de apuntes por key_func(apunte), omitiendo los que dan None"""
+        groups = {}
+        for line_id, line in data['lines'].items():
+            key = key_func(line)
+            if key is not None:
+                groups.setdefault(key, []).append(line_id)
+        return groups
+
+    def _format_preflight_names(self, names):
+        """Lista de nombres para un mensaje, acotada a PREFLIGHT_MAX_NAMES"""
+        names = list(names)
+        text = ', '.join(str(name) for name in names[:PREFLIGHT_MAX_NAMES])
+        if len(names) > PREFLIGHT_MAX_NAMES:
+            text += _(" y %s más") % (len(names) - PREFLIGHT_MAX_NAMES)
+        return text
+
+    def _preflight_check_partners(self, data):
+        """Apuntes sin partner (agrupados) y partners sin CUIT"""
+        problems = []
+        moves = data['moves']
+        partners = data['partners']
+        
+        without_partner = self._group_line_ids(data, lambda line: True if not line['partner_id'] else None)
+        if without_partner:
+            line_ids = without_partner[True]
+            move_names = dict.fromkeys(moves[data['lines'][line_id]['move_id']]['name'] for line_id in line_ids)
+            problems.append((
+                'partner',
+                _("PARTNER FALTANTE: %s apuntes sin partner asociado, en los asientos: %s") %
+                (len(line_ids), self._format_preflight_names(move_names)),
+                line_ids,
+                _("Apunte sin partner asociado"),
+            ))
+        
+        without_vat = self._group_line_ids(
+            data, lambda line: line['partner_id'] if line['partner_id'] and not partners[line['partner_id']]['vat'] else None
+        )
+        for partner_id, line_ids in without_vat.items():
+            problems.append((
+                'vat',
+                _("CUIT PARTNER FALTANTE: El partner '%s' (ID: %s) no tiene CUIT configurado (%s apuntes). "
+                  "Abre el contacto > Pestaña 'Ventas y Compras' > Campo 'TAX ID (CUIT)' > Ingresa el CUIT") %
+                (partners[partner_id]['name'], partner_id, len(line_ids)),
+                line_ids,
+                _("El partner '%s' (ID: %s) no tiene CUIT configurado") % (partners[partner_id]['name'], partner_id),
+            ))
+        return problems
+
+    def _preflight_check_document_types(self, data):
+        """Partners sin tipo de documento SICORE"""
+        partners = data['partners']
+        without_document_type = self._group_line_ids(
+            data,
+            lambda line: line['partner_id']
+            if line['partner_id'] and not partners[line['partner_id']]['sicore_document_type_id'] else None
+        )
+        return [
+            (
+                'document_type',
+                _("TIPO DE DOCUMENTO FALTANTE: El partner '%s' (ID: %s) no tiene tipo de documento SICORE configurado (%s apuntes). "
+                  "Abre el contacto > Pestaña 'Ventas y Compras' > Campo 'Tipo de Identificación SICORE' > Selecciona el tipo (DNI, CUIT, etc)") %
+                (partners[partner_id]['name'], partner_id, len(line_ids)),
+                line_ids,
+                _("El partner '%s' (ID: %s) no tiene tipo de documento SICORE configurado") %
+                (partners[partner_id]['name'], partner_id),
+            )
+            for partner_id, line_ids in without_document_type.items()
+        ]
+
+    def _preflight_check_tax_codes(self, data):
+        """
+        Apuntes sin código de impuesto o de régimen SICORE, agrupados por los
+        impuestos mal configurados (o sin impuesto) que los dejan sin exportar
+        """
+        taxes = data['taxes']
+        
+        def misconfigured_taxes(line):
+            if all(self._get_tax_and_regime_codes(line, data)):
+                return None
+            tax_ids = ([line['tax_line_id']] if line['tax_line_id'] else []) + list(line['tax_ids'])
+            return tuple(dict.fromkeys(tax_id for tax_id in tax_ids if not all(taxes[tax_id])))
+        
+        problems = []
+        for tax_ids, line_ids in self._group_line_ids(data, misconfigured_taxes).items():
+            if tax_ids:
+                tax_names = self._format_preflight_names(
+                    f"{tax.display_name} (ID: {tax.id})" for tax in self.env['account.tax'].browse(tax_ids)
+                )
+                message = _(
+                    "IMPUESTOS SIN CÓDIGOS SICORE: %s apuntes usan impuestos sin código de impuesto o de régimen SICORE: %s. "
+                    "Menú 'Contabilidad' > 'Configuración' > 'Impuestos' > Abre el impuesto > "
+                    "Completa 'Código Impuesto SICORE' y 'Código Régimen SICORE'"
+                ) % (len(line_ids), tax_names)
+                line_message = _("Impuestos sin código de impuesto o de régimen SICORE: %s") % tax_names
+            else:
+                message = _(
+                    "IMPUESTO FALTANTE: %s apuntes no tienen impuesto asociado, por lo que no se pueden obtener "
+                    "los códigos de impuesto y régimen SICORE"
+                ) % len(line_ids)
+                line_message = _("Apunte sin impuesto asociado")
+            problems.append(('tax_code', message, line_ids, line_message))
+        return problems
+
+    # ============================================================
+    # VALIDACIONES GENÉRICAS
+    # ============================================================
+
+    def validate_cuit(self, cuit):
+        """
+        Valida CUIT argentino con dígito verificador
+        Retorna CUIT limpio (solo números) o lanza ValidationError
+        """
+        return sicore_layout.validate_cuit(cuit)
 
     def sanitize_text(self, text, max_length=None):
         """
@@ -93,52 +408,14 @@ class AbstractSicoreGenerator(models.AbstractModel):
         - Elimina caracteres especiales
         - Trunca si excede max_length
         """
-        if not text:
-            return ''
-        
-        text = str(text)
-        
-        # Quitar acentos
-        text = unicodedata.normalize('NFKD', text)
-        text = text.encode('ASCII', 'ignore').decode('ASCII')
-        
-        # Mayúsculas
-        text = text.upper()
-        
-        # Permitir solo alfanuméricos, espacios, guiones y puntos
-        # TODO: Validar con cliente qué caracteres especiales deben permitirse en el TXT
-        text = re.sub(r'[^A-Z0-9 \-\.]', '', text)
-        
-        # Truncar si es necesario
-        if max_length and len(text) > max_length:
-            text = text[:max_length]
-        
-        return text
+        return sicore_layout.sanitize_text(text, max_length)
 
     def format_date(self, date_value, date_format='DD/MM/YYYY'):
         """
         Formatea fecha según formato SICORE
         date_format: 'DD/MM/YYYY', 'DDMMYYYY', etc.
         """
-        if not date_value:
-            return ''
-        
-        if isinstance(date_value, str):
-            # Ya es string, intentar parsear
-            try:
-                date_value = fields.Date.from_string(date_value)
-            except:
-                return date_value
-        
-        # Convertir según formato
-        if date_format == 'DD/MM/YYYY':
-            return date_value.strftime('%d/%m/%Y')
-        elif date_format == 'DDMMYYYY':
-            return date_value.strftime('%d%m%Y')
-        elif date_format == 'YYYY-MM-DD':
-            return date_value.strftime('%Y-%m-%d')
-        else:
-            return date_value.strftime(date_format.replace('DD', '%d').replace('MM', '%m').replace('YYYY', '%Y'))
+        return sicore_layout.format_date(date_value, date_format)
 
     def format_decimal(self, value, decimals=2, remove_separator=True, use_comma=True):
         """
@@ -147,31 +424,11 @@ class AbstractSicoreGenerator(models.AbstractModel):
         - remove_separator: si True, retorna entero sin punto (ej: 1234 para 12.34)
         - use_comma: si True, usa coma como separador decimal (formato SICORE - siempre True por defecto)
         """
-        if value is None or value == '':
-            value = 0
-        
-        try:
-            value = float(value)
-        except:
-            raise ValidationError(_("Valor decimal inválido: %s") % value)
-        
-        if remove_separator:
-            # Retornar como entero (multiplicar por 10^decimals)
-            return str(int(round(value * (10 ** decimals))))
-        else:
-            # Formatear con coma como separador decimal (formato SICORE estándar)
-            formatted = f"{value:.{decimals}f}"
-            return formatted.replace('.', ',')
+        return sicore_layout.format_decimal(value, decimals, remove_separator)
 
     def format_integer(self, value):
         """Formatea entero"""
-        if value is None or value == '':
-            value = 0
-        
-        try:
-            return str(int(value))
-        except:
-            raise ValidationError(_("Valor entero inválido: %s") % value)
+        return sicore_layout.format_integer(value)
 
     # ============================================================
     # PADDING Y FORMATEO DE CAMPOS
@@ -201,126 +458,138 @@ class AbstractSicoreGenerator(models.AbstractModel):
         """
         Valida y formatea un campo según su especificación
         Retorna valor formateado o lanza ValidationError
-        """
-        # 1. Validar requerido
-        if spec.get('required') and not value and value != 0:
-            raise ValidationError(_("Campo '%s' es requerido") % field_name)
-        
-        # 2. Formatear según tipo
-        field_type = spec.get('type', 'text')
-        
-        try:
-            if field_type == 'integer':
-                value = self.format_integer(value)
-            elif field_type in ('decimal', 'decimal_comma'):
-                # Ambos tipos usan coma por defecto (formato SICORE estándar)
-                decimals = spec.get('decimals', 2)
-                value = self.format_decimal(value, decimals, remove_separator=False)
-            elif field_type == 'date':
-                date_format = spec.get('format', 'DD/MM/YYYY')
-                value = self.format_date(value, date_format)
-            elif field_type == 'text':
-                max_len = spec.get('length')
-                value = self.sanitize_text(value, max_len)
-            elif field_type == 'cuit':
-                value = self.validate_cuit(value)
-            else:
-                value = str(value) if value is not None else ''
-        except ValidationError:
-            raise
-        except Exception as e:
-            raise ValidationError(_("Error formateando campo '%s': %s") % (field_name, str(e)))
-        
-        # 3. Validación custom
-        if 'validation' in spec:
-            validation_fn = spec['validation']
-            if not validation_fn(value):
-                raise ValidationError(_("Validación falló para campo '%s'") % field_name)
         
-        # 4. Aplicar padding
-        value = self.apply_padding(value, spec)
-        
-        return value
+        Para formatear líneas completas usar _get_line_layout(), que compila
+        todos los campos una sola vez.
+        """
+        return sicore_layout.SicoreFieldFormatter(field_name, spec)(value)
 
     # ============================================================
     # GENERACIÓN DE TXT
     # ============================================================
 
-    def format_line(self, record, wizard=None):
+    def format_record(self, record, wizard=None, layout=None, data=None):
+        """
+        Extrae, valida y formatea un registro en una sola pasada
+        data: resultado de _prefetch_export_data() (si no se pasa, se carga solo este registro)
+        Retorna tupla: (línea formateada, diccionario de valores tipados)
+        """
+        if layout is None:
+            layout = self._get_line_layout()
+        if data is None:
+            data = self._prefetch_export_data(record, wizard)
+        values = self._get_row_values(data['lines'][record.id], data, wizard)
+        return layout.format_values(values), values
+
+    def format_line(self, record, wizard=None, layout=None):
         """
         Genera una línea del TXT según especificaciones
         Retorna string con la línea formateada
         """
-        specs = self._get_field_specs()
-        values = self._get_record_values(record, wizard)
-        separator = self._get_separator()
-        
-        line_parts = []
-        errors = []
-        
-        for field_name, spec in specs.items():
-            try:
-                value = values.get(field_name)
-                formatted_value = self.validate_and_format_field(field_name, value, spec)
-                line_parts.append(formatted_value)
-            except ValidationError as e:
-                errors.append(str(e))
+        return self.format_record(record, wizard, layout)[0]
+
+    def _get_line_amounts(self, values):
+        """
+        Retorna los importes de una línea ya extraída para acumular totales, en
+        centavos: (importe retenido/percibido, importe de la transacción)
+        """
+        # Monto de retención/percepción
+        retention_amount = sicore_layout.as_cents(values.get('importe_retencion') or values.get('importe'))
         
-        if errors:
-            raise ValidationError(_("Errores en registro:\n%s") % '\n'.join(errors))
+        # Monto de la transacción (comprobante)
+        transaction_amount = sicore_layout.as_cents(values.get('importe_comprobante') or values.get('base_calculo'))
         
-        return separator.join(line_parts)
+        return abs(retention_amount), abs(transaction_amount)
 
-    def generate_txt(self, wizard):
+    def generate_txt(self, wizard, stream=None, progress_callback=None, stats=None, error_records=None):
         """
         Genera contenido TXT completo
+        Si se pasa stream (archivo binario), cada línea se escribe en él a medida que se
+        genera (UTF-8, separadas por salto de línea) y txt_content se retorna como None:
+        la memoria usada no depende del tamaño del archivo.
+        Si se pasa progress_callback, se llama como progress_callback(procesados, total)
+        al inicio, cada PROGRESS_BATCH_SIZE registros y al final.
+        Si se pasa stats (export_stats.ExportStats), acumula tiempo y consultas por fase.
+        Si se pasa error_records (lista), se le agrega un diccionario por apunte con error
+        (category, res_model, res_id, partner_id, message) para crear sicore.export.error.
         Retorna tupla: (txt_content, records_count, errors_log, state, total_retention_amount, total_transaction_amount)
+        Los totales se acumulan en centavos: son la suma exacta de los importes de las líneas del archivo.
         """
-        import logging
-        import traceback
-        _logger = logging.getLogger(__name__)
-        
+        stats = stats or NULL_STATS
         model_name = self._get_model_name()
-        domain = self._get_records_domain(wizard)
         
-        records = self.env[model_name].search(domain)
+        with stats.phase('search'):
+            domain = self._get_records_domain(wizard)
+            records = self.env[model_name].search(domain)
+            # Copia con memoria de conversiones solo para esta exportación
+            layout = self._get_line_layout().memoized()
+        with stats.phase('prefetch'):
+            data = self._prefetch_export_data(records, wizard)
+        
+        # Validación previa en bloque: solo se formatean los apuntes válidos
+        with stats.phase('validation'):
+            problems = self._preflight_validate(data)
+        errors_log = []
+        invalid_line_ids = set()
+        for category, message, line_ids, line_message in problems:
+            _logger.warning(f"[SICORE-GEN] {message}")
+            errors_log.append(message)
+            invalid_line_ids.update(line_ids)
+            if error_records is not None:
+                error_records.extend(
+                    self._get_error_record(category, model_name, line_id, data, line_message) for line_id in line_ids
+                )
+        if invalid_line_ids:
+            records = records.browse([line_id for line_id in records.ids if line_id not in invalid_line_ids])
         
         lines = []
-        errors_log = []
+        write_line = lines.append if stream is None else self._get_stream_line_writer(stream)
         success_count = 0
-        total_retention_amount = 0.0
-        total_transaction_amount = 0.0
+        total_retention_cents = 0
+        total_transaction_cents = 0
         
-        for idx, record in enumerate(records, 1):
-            try:
-                line = self.format_line(record, wizard)
-                lines.append(line)
+        total_count = len(records)
+        if progress_callback:
+            progress_callback(0, total_count)
+        
+        if self._use_fragment_cache(wizard):
+            results = self._iter_cached_records(records, data, wizard, layout, stats)
+        else:
+            results = self._iter_formatted_records(records, data, wizard, layout, stats)
+        
+        output_phase = stats.phase('output')
+        for idx, (record, line, amounts, error) in enumerate(results, 1):
+            if error is None:
+                with output_phase:
+                    write_line(line)
                 success_count += 1
                 
                 # Calcular totales según tipo de exportación
-                values = self._get_record_values(record, wizard)
-                
-                # Monto de retención/percepción
-                retention_amount = values.get('importe_retencion') or values.get('importe') or 0.0
-                if isinstance(retention_amount, (int, float)):
-                    total_retention_amount += abs(retention_amount)
-                
-                # Monto de la transacción (comprobante)
-                transaction_amount = values.get('importe_comprobante') or values.get('base_calculo') or 0.0
-                if isinstance(transaction_amount, (int, float)):
-                    total_transaction_amount += abs(transaction_amount)
-                
-            except ValidationError as e:
-                error_msg = f"Error validación en registro {idx} ({record.display_name}): {str(e)}"
+                retention_amount, transaction_amount = amounts
+                total_retention_cents += retention_amount
+                total_transaction_cents += transaction_amount
+            elif error[0] == 'validation':
+                error_msg = f"Error validación en registro {idx} ({record.display_name}): {error[1]}"
                 _logger.warning(error_msg)
                 errors_log.append(error_msg)
-            except Exception as e:
-                error_details = traceback.format_exc()
-                error_msg = f"Error inesperado en registro {idx} ({record.display_name}): {str(e)}"
+                if error_records is not None:
+                    error_records.append(self._get_error_record('validation', model_name, record.id, data, error[1]))
+            else:
+                message, error_details = error[1]
+                error_msg = f"Error inesperado en registro {idx} ({record.display_name}): {message}"
                 _logger.error(f"{error_msg}\nDetalles técnicos:\n{error_details}")
                 errors_log.append(error_msg)
+                if error_records is not None:
+                    error_records.append(self._get_error_record('unexpected', model_name, record.id, data, message))
+            
+            if progress_callback and idx % PROGRESS_BATCH_SIZE == 0:
+                progress_callback(idx, total_count)
+        
+        if progress_callback:
+            progress_callback(total_count, total_count)
+        layout.clear_memo()
         
-        txt_content = '\n'.join(lines)
+        txt_content = '\n'.join(lines) if stream is None else None
         
         # Determinar estado
         if errors_log and success_count == 0:
@@ -333,8 +602,345 @@ class AbstractSicoreGenerator(models.AbstractModel):
         
         errors_text = '\n'.join(errors_log) if errors_log else ''
         
-        return txt_content, success_count, errors_text, state, total_retention_amount, total_transaction_amount
+        return (
+            txt_content, success_count, errors_text, state,
+            total_retention_cents / 100, total_transaction_cents / 100,
+        )
+
+    def _get_error_record(self, category, model_name, res_id, data, message):
+        """Valores de un sicore.export.error para el registro res_id"""
+        line = data['lines'].get(res_id) or {}
+        return {
+            'category': category,
+            'res_model': model_name,
+            'res_id': res_id,
+            'partner_id': line.get('partner_id') or False,
+            'message': message,
+        }
+
+    def _get_preview_totals(self, domain):
+        """
+        Totales de la vista previa con una única consulta agregada, sin cargar registros.
+        Retorna (cantidad, importe retenido/percibido, importe de comprobantes); el importe
+        de comprobantes suma una sola vez el total de cada asiento distinto.
+        """
+        Model = self.env[self._get_model_name()]
+        query = Model._search(domain)
+        if 'balance' not in Model._fields or 'move_id' not in Model._fields:
+            self.env.cr.execute(query.select(SQL("COUNT(*)")))
+            return self.env.cr.fetchone()[0], 0.0, 0.0
+        
+        Model.flush_model(['balance', 'move_id'])
+        self.env['account.move'].flush_model(['amount_total'])
+        self.env.cr.execute(SQL("""
+            WITH preview_lines AS (%s)
+            SELECT COUNT(*),
+                   COALESCE(SUM(ABS(balance)), 0),
+                   COALESCE((SELECT SUM(ABS(am.amount_total))
+                               FROM account_move am
+                              WHERE am.id IN (SELECT move_id FROM preview_lines)), 0)
+              FROM preview_lines
+        """, query.select(
+            SQL.identifier(query.table, 'balance'),
+            SQL.identifier(query.table, 'move_id'),
+        )))
+        records_count, total_retention, total_transaction = self.env.cr.fetchone()
+        return records_count, float(total_retention), float(total_transaction)
+
+    def _iter_formatted_records(self, records, data, wizard, layout, stats=NULL_STATS):
+        """
+        Extrae y formatea los registros en orden, por lotes de PROGRESS_BATCH_SIZE:
+        se extraen los valores de todo el lote y después se formatea el lote completo
+        (el avance de las exportaciones en segundo plano se confirma entre lotes).
+        Genera tuplas (record, línea, importes, error) donde importes es el resultado
+        de _get_line_amounts() y error es None o
+        ('validation', mensaje) / ('unexpected', (mensaje, traceback)).
+        """
+        workers = self._get_parallel_workers(wizard, len(records))
+        if workers:
+            yield from self._iter_formatted_records_parallel(records, data, wizard, layout, workers, stats)
+            return
+        
+        extraction_phase = stats.phase('extraction')
+        formatting_phase = stats.phase('formatting')
+        for start in range(0, len(records), PROGRESS_BATCH_SIZE):
+            with extraction_phase:
+                prepared = self._prepare_row_values(records[start:start + PROGRESS_BATCH_SIZE], data, wizard)
+            
+            results = []
+            with formatting_phase:
+                for record, values, error in prepared:
+                    if error is not None:
+                        results.append((record, None, None, error))
+                        continue
+                    try:
+                        line = layout.format_values(values)
+                    except ValidationError as e:
+                        results.append((record, None, None, ('validation', str(e))))
+                    except Exception as e:
+                        results.append((record, None, None, ('unexpected', (str(e), traceback.format_exc()))))
+                    else:
+                        results.append((record, line, self._get_line_amounts(values), None))
+            yield from results
+
+    def _prepare_row_values(self, records, data, wizard):
+        """
+        Un único paso de extracción/validación por registro.
+        Retorna lista de (record, valores, error) con error None o como en _iter_formatted_records()
+        """
+        prepared = []
+        for record in records:
+            try:
+                values = self._get_row_values(data['lines'][record.id], data, wizard)
+            except ValidationError as e:
+                prepared.append((record, None, ('validation', str(e))))
+            except Exception as e:
+                prepared.append((record, None, ('unexpected', (str(e), traceback.format_exc()))))
+            else:
+                prepared.append((record, values, None))
+        return prepared
+
+    def _get_parallel_workers(self, wizard, records_count):
+        """
+        Cantidad de procesos para formatear en paralelo (0 = en este proceso).
+        Es opcional (wizard.adv_parallel_workers) y solo aplica desde PARALLEL_MIN_RECORDS registros.
+        """
+        workers = getattr(wizard, 'adv_parallel_workers', 0) if wizard else 0
+        if workers <= 1 or records_count < PARALLEL_MIN_RECORDS:
+            return 0
+        if not sicore_format_pool.can_send_specs(self._get_field_specs()):
+            _logger.warning("[SICORE-GEN] %s: la especificación de campos no se puede enviar a otros procesos", self._name)
+            return 0
+        return min(workers, os.cpu_count() or 1)
+
+    def _iter_formatted_records_parallel(self, records, data, wizard, layout, workers, stats=NULL_STATS):
+        """
+        Igual que _iter_formatted_records(), pero el formateo (trabajo puro de CPU) se
+        reparte en un pool de procesos (sicore_format_pool). La extracción de valores
+        usa el ORM y se hace en este proceso, por ventanas para acotar la memoria; a los
+        procesos solo viajan tuplas de valores y los resultados vuelven en orden, con
+        los errores de cada registro.
+        """
+        field_names = layout.field_names
+        window_size = workers * sicore_format_pool.FORMAT_CHUNK_SIZE * 2
+        extraction_phase = stats.phase('extraction')
+        formatting_phase = stats.phase('formatting')
+        with sicore_format_pool.SicoreFormatPool(
+            self._get_field_specs(), self._get_separator(), workers, layout
+        ) as pool:
+            for start in range(0, len(records), window_size):
+                with extraction_phase:
+                    prepared = self._prepare_row_values(records[start:start + window_size], data, wizard)
+                
+                with formatting_phase:
+                    formatted = iter(pool.format_rows([
+                        tuple(values.get(name) for name in field_names)
+                        for _record, values, error in prepared if error is None
+                    ]))
+                for record, values, error in prepared:
+                    if error is not None:
+                        yield record, None, None, error
+                        continue
+                    ok, result = next(formatted)
+                    if ok:
+                        yield record, result, self._get_line_amounts(values), None
+                    else:
+                        yield record, None, None, result
+
+    # ============================================================
+    # CACHÉ DE FRAGMENTOS (exportación incremental)
+    # ============================================================
+
+    def _use_fragment_cache(self, wizard):
+        """La caché de líneas se usa solo si el wizard la activa (adv_use_line_cache)"""
+        return bool(wizard) and getattr(wizard, 'adv_use_line_cache', False)
+
+    def _get_fragment_run_key(self, wizard, data):
+        """
+        Parte de la clave común a todas las líneas de la exportación: generador,
+        diseño de línea, parámetros del wizard que afectan el contenido y empresa
+        """
+        params = sorted(
+            (name, wizard[name]) for name in wizard._fields
+            if name.startswith('adv_') and name not in FRAGMENT_NEUTRAL_PARAMS
+        )
+        return (FRAGMENT_CACHE_VERSION, self._name, self._get_line_layout().field_names, params, data['company'])
+
+    def _get_fragment_dependencies(self, line, data):
+        """
+        Datos de los que depende la línea formateada de un apunte: fechas de
+        modificación del apunte, asiento y partner, y los códigos SICORE ya
+        resueltos (impuestos y tipo de documento), que cambian sin tocar el apunte.
+        Los generadores agregan sus propias dependencias extendiendo este método.
+        """
+        move = data['moves'][line['move_id']]
+        partner = data['partners'].get(line['partner_id']) or {}
+        taxes = data['taxes']
+        return (
+            line['write_date'],
+            move['write_date'],
+            partner.get('write_date'),
+            data['document_types'].get(partner.get('sicore_document_type_id')),
+            taxes[line['tax_line_id']] if line['tax_line_id'] else None,
+            tuple(taxes[tax_id] for tax_id in line['tax_ids']),
+        )
+
+    def _get_fragment_key(self, run_key, line, data):
+        """Clave de caché de la línea de un apunte"""
+        dependencies = (run_key, self._get_fragment_dependencies(line, data))
+        return hashlib.sha1(repr(dependencies).encode('utf-8')).hexdigest()
+
+    def _iter_cached_records(self, records, data, wizard, layout, stats=NULL_STATS):
+        """
+        Igual que _iter_formatted_records(), pero reutiliza las líneas de sicore.export.line
+        cuya clave no cambió desde la última exportación y solo formatea el resto.
+        Al terminar guarda los fragmentos nuevos y descarta los de apuntes con error.
+        """
+        Fragment = self.env['sicore.export.line'].sudo()
+        with stats.phase('fragments'):
+            run_key = self._get_fragment_run_key(wizard, data)
+            keys = {
+                line_id: self._get_fragment_key(run_key, data['lines'][line_id], data)
+                for line_id in records.ids
+            }
+            cached = {
+                line_id: fragment
+                for line_id, fragment in Fragment._load_fragments(self._name, records.ids).items()
+                if fragment[0] == keys[line_id]
+            }
+        _logger.info(
+            "[SICORE-GEN] %s: %s de %s líneas tomadas de la caché",
+            self._name, len(cached), len(records)
+        )
+        
+        fresh = self._iter_formatted_records(
+            records.browse([line_id for line_id in records.ids if line_id not in cached]),
+            data, wizard, layout, stats,
+        )
+        new_fragments = []
+        stale_line_ids = []
+        for record in records:
+            fragment = cached.get(record.id)
+            if fragment:
+                _key, line, retention_amount, transaction_amount = fragment
+                yield record, line, (retention_amount, transaction_amount), None
+                continue
+            
+            record, line, amounts, error = next(fresh)
+            if error is None:
+                new_fragments.append((record.id, keys[record.id], line) + tuple(amounts))
+            else:
+                stale_line_ids.append(record.id)
+            yield record, line, amounts, error
+        
+        with stats.phase('fragments'):
+            Fragment._store_fragments(self._name, new_fragments, stale_line_ids)
+
+    def _get_stream_line_writer(self, stream):
+        """Retorna una función que escribe líneas en stream con el mismo formato que '\\n'.join()"""
+        state = {'separator': b''}
+
+        def write_line(line):
+            stream.write(state['separator'])
+            stream.write(line.encode('utf-8'))
+            state['separator'] = b'\n'
+
+        return write_line
 
     def _get_model_name(self):
         """Retorna nombre del modelo a exportar (implementar en hijas si es necesario)"""
         return 'account.move'
+
+    # ============================================================
+    # COMPARACIÓN DE ARCHIVOS
+    # ============================================================
+
+    def _get_line_identity_fields(self):
+        """
+        Campos que identifican una línea del archivo (comprobante, CUIT y códigos).
+        Al comparar dos exportaciones, las líneas con la misma identidad se comparan campo a campo.
+        """
+        return ('numero_comprobante', 'numero_documento_retenido', 'codigo_impuesto', 'codigo_regimen')
+
+    def _iter_file_diff(self, old_file, new_file):
+        """
+        Diferencias entre dos archivos exportados (binarios de lectura) por identidad
+        de línea. Ver sicore_diff.iter_diff() para el formato de cada diferencia.
+        """
+        layout = self._get_line_layout()
+        key_func = sicore_diff.make_key_func(layout, self._get_line_identity_fields())
+        return sicore_diff.iter_diff(
+            sicore_diff.iter_sorted_lines((line for _n, line in sicore_reader.iter_file_lines(old_file)), key_func),
+            sicore_diff.iter_sorted_lines((line for _n, line in sicore_reader.iter_file_lines(new_file)), key_func),
+            layout,
+        )
+
+    # ============================================================
+    # LECTURA DE ARCHIVOS
+    # ============================================================
+
+    def _get_file_reader(self, encoding='utf-8'):
+        """
+        Lector de archivos TXT con el diseño de línea del generador (propios, de
+        otros sistemas o devueltos por AFIP). Ver sicore_reader.SicoreFileReader.
+        """
+        return sicore_reader.SicoreFileReader(self._get_line_layout(), encoding)
+
+    # ============================================================
+    # CONCILIACIÓN CON AFIP
+    # ============================================================
+
+    def _get_reconcile_key_fields(self):
+        """Campos (CUIT, fecha, número de comprobante, importe) con los que se concilia cada línea"""
+        return ('numero_documento_retenido', 'fecha_emision_retencion', 'numero_comprobante', 'importe_retencion')
+
+    def _get_reconcile_key_func(self):
+        """
+        Función valores leídos -> clave de conciliación: (CUIT, fecha, número de
+        comprobante, importe en centavos), CUIT y número sin ceros a la izquierda.
+        Tolera archivos de otros sistemas que rellenan o separan distinto esos campos.
+        """
+        cuit_field, date_field, number_field, amount_field = self._get_reconcile_key_fields()
+        clean_digits = sicore_layout.clean_digits
+
+        def key_func(values):
+            return (
+                clean_digits(values.get(cuit_field)).lstrip('0'),
+                values.get(date_field),
+                clean_digits(values.get(number_field)).lstrip('0'),
+                sicore_layout.as_cents(values.get(amount_field)),
+            )
+
+        return key_func
+
+    def _iter_reconcile_candidates(self, wizard):
+        """
+        Genera (id del apunte, valores) de cada apunte que se exportaría con wizard.
+        Cada línea se formatea y sus campos de conciliación se vuelven a leer con el
+        diseño de línea, igual que al leer el archivo, para que las claves sean comparables.
+        Los apuntes que no superan la validación se omiten (no estarían en el archivo).
+        """
+        records = self.env[self._get_model_name()].search(self._get_records_domain(wizard))
+        data = self._prefetch_export_data(records, wizard)
+        invalid_line_ids = set()
+        for _category, _message, line_ids, _line_message in self._preflight_validate(data):
+            invalid_line_ids.update(line_ids)
+
+        layout = self._get_line_layout().memoized()
+        key_fields = self._get_reconcile_key_fields()
+        key_formatters = [
+            (position, formatter) for position, formatter in enumerate(layout.formatters)
+            if formatter.name in key_fields
+        ]
+        for line_id in records.ids:
+            if line_id in invalid_line_ids:
+                continue
+            try:
+                values = self._get_row_values(data['lines'][line_id], data, wizard)
+                parts = layout.split_line(layout.format_values(values))
+                yield line_id, {
+                    formatter.name: formatter.parse(parts[position].strip())
+                    for position, formatter in key_formatters
+                }
+            except (ValidationError, ValueError) as e:
+                _logger.info("[SICORE] Apunte %s omitido en la conciliación: %s", line_id, e)
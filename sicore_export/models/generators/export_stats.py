@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Medición por fase de una exportación SICORE: tiempo de reloj y consultas SQL
+(contador del cursor) acumulados por nombre de fase, y perfilado opcional con cProfile.
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import time
+from contextlib import nullcontext
+
+_logger = logging.getLogger(__name__)
+
+# Funciones listadas en cada orden del reporte de cProfile
+PROFILE_STATS_LIMIT = 100
+
+# Fases en el orden en que se informan
+EXPORT_PHASES = (
+    ('search', 'Búsqueda'),
+    ('prefetch', 'Lectura de datos'),
+    ('validation', 'Validación previa'),
+    ('fragments', 'Caché de líneas'),
+    ('extraction', 'Extracción'),
+    ('formatting', 'Formateo'),
+    ('output', 'Escritura de líneas'),
+    ('attachment', 'Guardado del archivo'),
+)
+
+
+class _PhaseTimer(object):
+    """Context manager liviano (se usa una vez por registro en las fases por línea)"""
+    __slots__ = ('stats', 'name', 'start', 'queries')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.queries = self.stats.cr.sql_log_count
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.add(self.name, time.perf_counter() - self.start, self.stats.cr.sql_log_count - self.queries)
+        return False
+
+
+class ExportStats(object):
+    """Acumula {fase: {'time': segundos, 'queries': consultas}} de una exportación"""
+
+    def __init__(self, cr):
+        self.cr = cr
+        self.phases = {}
+        self.start = time.perf_counter()
+        self.start_queries = cr.sql_log_count
+
+    def phase(self, name):
+        return _PhaseTimer(self, name)
+
+    def add(self, name, seconds, queries=0):
+        phase = self.phases.setdefault(name, {'time': 0.0, 'queries': 0})
+        phase['time'] += seconds
+        phase['queries'] += queries
+
+    def get_log_values(self, records_count):
+        """Valores para los campos de rendimiento de sicore.export.log"""
+        total_time = time.perf_counter() - self.start
+        return {
+            'perf_total_time': total_time,
+            'perf_query_count': self.cr.sql_log_count - self.start_queries,
+            'perf_records_per_second': records_count / total_time if total_time else 0.0,
+            'perf_phases': {
+                name: {'time': round(vals['time'], 4), 'queries': vals['queries']}
+                for name, vals in self.phases.items()
+            },
+        }
+
+
+_NULL_PHASE = nullcontext()
+
+
+class NullExportStats(object):
+    """Reemplazo sin costo cuando no se piden mediciones"""
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def add(self, name, seconds, queries=0):
+        pass
+
+
+NULL_STATS = NullExportStats()
+
+
+class ExportProfiler(object):
+    """
+    Perfila con cProfile el bloque que envuelve (si enabled). get_report() retorna
+    las estadísticas como texto ordenadas por tiempo acumulado y por tiempo propio,
+    o None si no se perfiló.
+    """
+
+    def __init__(self, enabled=True):
+        self.profile = cProfile.Profile() if enabled else None
+
+    def __enter__(self):
+        if self.profile is not None:
+            try:
+                self.profile.enable()
+            except ValueError:
+                # Python >= 3.12 admite un solo perfilador activo por intérprete
+                _logger.warning("[SICORE-GEN] Ya hay otro perfilador activo, la exportación no se perfila")
+                self.profile = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profile is not None:
+            self.profile.disable()
+        return False
+
+    def get_report(self, limit=PROFILE_STATS_LIMIT):
+        if self.profile is None:
+            return None
+        output = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=output).strip_dirs()
+        for sort_key in ('cumulative', 'tottime'):
+            output.write(f"===== Ordenado por {sort_key} =====\n")
+            stats.sort_stats(sort_key).print_stats(limit)
+        return output.getvalue()
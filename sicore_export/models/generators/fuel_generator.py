@@ -9,10 +9,11 @@ Ejemplo real:
 C;BARALE S.A. - 306;30543035064;5;001;2300041130;27092025;TOSTADERO MANICOP S.R.L.;30707753303;3;44680,51
 """
 
-import re
 from odoo import models, _  # type: ignore
 from odoo.exceptions import ValidationError  # type: ignore
 
+from .sicore_layout import clean_digits, to_cents
+
 
 class FuelGenerator(models.Model):
     _name = 'sicore.fuel.generator'
@@ -111,6 +112,14 @@ class FuelGenerator(models.Model):
             },
         }
 
+    def _get_line_identity_fields(self):
+        """En combustibles el CUIT de la línea es el del proveedor"""
+        return ('numero_comprobante', 'cuit_proveedor', 'codigo_impuesto', 'codigo_regimen')
+
+    def _get_reconcile_key_fields(self):
+        """Combustibles: CUIT del proveedor, fecha e importe de la factura"""
+        return ('cuit_proveedor', 'fecha_comprobante', 'numero_comprobante', 'importe')
+
     def _get_records_domain(self, wizard):
         """
         Filtra apuntes contables de combustible según:
@@ -126,12 +135,11 @@ class FuelGenerator(models.Model):
         
         domain = [
             # La cuenta contable determina si es combustible
-            ('account_id.sicore_export_type', '=', 'fuel'),
-            ('move_id.state', 'in', ['posted', 'paid']),
+            # Tipo SICORE almacenado en el apunte (cuenta + exclusión de diarios de presupuesto)
+            ('sicore_export_type', '=', 'fuel'),
+            ('parent_state', '=', 'posted'),
             # ('move_id.move_type', 'in', ['in_invoice', 'in_refund']),  # SOLO facturas de proveedor
             ('company_id', '=', wizard.company_id.id),
-            # El diario debe permitir exportación (no ser solo presupuesto)
-            ('journal_id.sicore_export_type', '!=', 'budget'),
         ]
         
         # Filtro de fechas
@@ -150,7 +158,23 @@ class FuelGenerator(models.Model):
         
         return domain
 
-    def _get_record_values(self, move_line, wizard=None):
+    def _get_move_read_fields(self):
+        """Combustibles usan la fecha de factura del asiento"""
+        return super()._get_move_read_fields() + ['invoice_date', 'date']
+
+    def _prefetch_export_data(self, records, wizard=None):
+        """Agrega el tipo de exportación SICORE de las cuentas, leído en bloque"""
+        data = super()._prefetch_export_data(records, wizard)
+        account_ids = {line['account_id'] for line in data['lines'].values()}
+        data['accounts'] = self._read_by_id(self.env['account.account'].browse(list(account_ids)), ['name', 'sicore_export_type'])
+        return data
+
+    def _get_fragment_dependencies(self, line, data):
+        """La línea también depende de la cuenta contable (nombre y tipo de exportación)"""
+        account = data['accounts'][line['account_id']]
+        return super()._get_fragment_dependencies(line, data) + (account['name'], account['sicore_export_type'])
+
+    def _get_row_values(self, line, data, wizard=None):
         """
         Extrae valores del apunte contable para generar línea CSV según formato SICORE Combustibles
         
@@ -161,25 +185,26 @@ class FuelGenerator(models.Model):
         
         Usa parámetros del wizard para valores configurables en lugar de hardcodeados.
         """
-        self._validate_move_line(move_line)
+        self._validate_move_line(line, data)
         
-        partner = move_line.partner_id  # Proveedor de combustible
-        move = move_line.move_id
-        company = self.env.company  # Empresa del sistema (cliente)
+        partner = data['partners'][line['partner_id']]  # Proveedor de combustible
+        move = data['moves'][line['move_id']]
+        company = data['company']  # Empresa del sistema (cliente)
         
         # Datos del PROVEEDOR (quien vende combustible)
-        cuit_proveedor = self._get_clean_cuit(partner)
-        razon_social_proveedor = partner.name or ''
+        # Solo dígitos, sin rellenar con ceros (formato de combustibles)
+        cuit_proveedor = clean_digits(partner['vat'])
+        razon_social_proveedor = partner['name'] or ''
         
         # Datos del CLIENTE (empresa del sistema, quien compra)
-        cuit_cliente = self._get_clean_cuit(company.partner_id)
-        razon_social_cliente = company.name or ''
+        cuit_cliente = clean_digits(company['vat'])
+        razon_social_cliente = company['name'] or ''
         
         # Número de comprobante (solo números)
-        numero_comp = re.sub(r'[^0-9]', '', move.name or '')
+        numero_comp = clean_digits(move['name'])
         
-        # Importe = valor absoluto del balance del apunte
-        importe = abs(move_line.balance)
+        # Importe = valor absoluto del balance del apunte (en centavos)
+        importe = to_cents(abs(line['balance']))
         
         # Usar valores del wizard si están disponibles, sino usar defaults
         codigo_registro = wizard.adv_combustible_codigo_registro if wizard else 'C'
@@ -207,7 +232,7 @@ class FuelGenerator(models.Model):
             'numero_comprobante': numero_comp,
             
             # Campo 7: Fecha del comprobante (DDMMYYYY)
-            'fecha_comprobante': move.invoice_date or move.date,
+            'fecha_comprobante': move['invoice_date'] or move['date'],
             
             # Campo 8: Razón social del cliente (empresa del sistema)
             'razon_social_cliente': razon_social_cliente,
@@ -222,58 +247,83 @@ class FuelGenerator(models.Model):
             'importe': importe,
         }
 
-    def apply_padding(self, value, spec):
-        """
-        Para CSV no aplicamos padding, solo retornamos el valor
-        Override del método padre
-        """
-        return str(value) if value is not None else ''
-
     # ===========================
     # Métodos de validación
     # ===========================
 
-    def _validate_move_line(self, move_line):
+    def _get_preflight_checks(self):
+        """Combustibles validan además el CUIT de la empresa y el tipo de las cuentas"""
+        return super()._get_preflight_checks() + [self._preflight_check_company, self._preflight_check_accounts]
+
+    def _preflight_check_company(self, data):
+        """Sin CUIT de la empresa (cliente) no se puede exportar ningún apunte"""
+        company = data['company']
+        if company['vat'] or not data['lines']:
+            return []
+        return [(
+            'company',
+            _("CUIT EMPRESA FALTANTE: La empresa '%s' no tiene CUIT configurado. "
+              "Menú 'Ajustes' > 'Compañías' > Selecciona '%s' > Pestaña 'Información General' > Campo 'TAX ID (CUIT)' > Ingresa el CUIT") %
+            (company['name'], company['name']),
+            list(data['lines']),
+            _("La empresa '%s' no tiene CUIT configurado") % company['name'],
+        )]
+
+    def _preflight_check_accounts(self, data):
+        """Cuentas de los apuntes que no están configuradas como Combustible"""
+        accounts = data['accounts']
+        not_fuel = self._group_line_ids(
+            data, lambda line: line['account_id'] if accounts[line['account_id']]['sicore_export_type'] != 'fuel' else None
+        )
+        return [
+            (
+                'account',
+                _("CUENTA NO CONFIGURADA: La cuenta '%s' no está configurada como Combustible (%s apuntes). "
+                  "Abre la cuenta contable '%s' > Pestaña 'Configuración' > Campo 'Tipo Exportación SICORE' > Selecciona 'Combustible'") %
+                (accounts[account_id]['name'], len(line_ids), accounts[account_id]['name']),
+                line_ids,
+                _("La cuenta '%s' no está configurada como Combustible") % accounts[account_id]['name'],
+            )
+            for account_id, line_ids in not_fuel.items()
+        ]
+
+    def _validate_move_line(self, line, data):
         """
         Valida que el apunte contable tenga toda la configuración requerida
         """
         errors = []
+        move = data['moves'][line['move_id']]
         
         # Validar partner (proveedor de combustible)
-        if not move_line.partner_id:
-            errors.append(_("PARTNER FALTANTE: El apunte contable '%s' no tiene partner (proveedor) asociado.") % move_line.move_id.name)
+        if not line['partner_id']:
+            errors.append(_("PARTNER FALTANTE: El apunte contable '%s' no tiene partner (proveedor) asociado.") % move['name'])
         else:
+            partner = data['partners'][line['partner_id']]
             # Validar CUIT del proveedor
-            if not move_line.partner_id.vat:
+            if not partner['vat']:
                 errors.append(
                     _("CUIT PROVEEDOR FALTANTE: El proveedor '%s' (ID: %s) no tiene CUIT configurado. "
                       "Abre el contacto del proveedor > Pestaña 'Ventas y Compras' > Campo 'TAX ID (CUIT)' > Ingresa el CUIT") %
-                    (move_line.partner_id.name, move_line.partner_id.id)
+                    (partner['name'], partner['id'])
                 )
         
         # Validar CUIT de la empresa (cliente)
-        company = self.env.company
-        if not company.partner_id.vat:
+        company = data['company']
+        if not company['vat']:
             errors.append(
                 _("CUIT EMPRESA FALTANTE: La empresa '%s' no tiene CUIT configurado. "
                   "Menú 'Ajustes' > 'Compañías' > Selecciona '%s' > Pestaña 'Información General' > Campo 'TAX ID (CUIT)' > Ingresa el CUIT") %
-                (company.name, company.name)
+                (company['name'], company['name'])
             )
         
         # Validar que la cuenta sea de tipo fuel
-        if move_line.account_id.sicore_export_type != 'fuel':
+        account = data['accounts'][line['account_id']]
+        if account['sicore_export_type'] != 'fuel':
             errors.append(
                 _("CUENTA NO CONFIGURADA: El apunte contable '%s' usa la cuenta '%s' que no está configurada como Combustible. "
                   "Abre la cuenta contable '%s' > Pestaña 'Configuración' > Campo 'Tipo Exportación SICORE' > Selecciona 'Combustible'") %
-                (move_line.move_id.name, move_line.account_id.name, move_line.account_id.name)
+                (move['name'], account['name'], account['name'])
             )
         
         if errors:
             raise ValidationError(" | ".join(errors))
-
-    def _get_clean_cuit(self, partner):
-        """Limpia el CUIT removiendo guiones y espacios"""
-        vat = partner.vat or ''
-        if vat:
-            vat = re.sub(r'[^0-9]', '', str(vat))
-        return vat
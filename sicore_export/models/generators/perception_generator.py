@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 
-import re
 import logging
 from odoo import models, _  # type: ignore
 from odoo.exceptions import ValidationError  # type: ignore
 
+from .sicore_layout import clean_digits, to_cents
+
 _logger = logging.getLogger(__name__)
 
 
@@ -209,12 +210,11 @@ class PerceptionGenerator(models.Model):
         pero la cuenta contable es la que determina si es una percepción o no.
         """
         domain = [
-            ('account_id.sicore_export_type', '=', 'perception'),
-            ('move_id.state', 'in', ['posted', 'paid']),
+            # Tipo SICORE almacenado en el apunte (cuenta + exclusión de diarios de presupuesto)
+            ('sicore_export_type', '=', 'perception'),
+            ('parent_state', '=', 'posted'),
             # ('move_id.move_type', 'in', ['out_invoice', 'out_refund']),  # SOLO facturas de cliente
             ('company_id', '=', wizard.company_id.id),
-            # El diario debe permitir exportación (no ser solo presupuesto)
-            ('journal_id.sicore_export_type', '!=', 'budget'),
         ]
         
         # Filtro de fechas
@@ -240,23 +240,28 @@ class PerceptionGenerator(models.Model):
         
         return domain
 
-    def _get_record_values(self, move_line, wizard=None):
+    def _get_move_read_fields(self):
+        """Percepciones toman los importes directamente del asiento"""
+        return super()._get_move_read_fields() + ['amount_total', 'amount_untaxed']
+
+    def _get_row_values(self, line, data, wizard=None):
         """
         Extrae valores del apunte contable para generar línea TXT según formato SICORE real.
         Los códigos de impuesto y régimen DEBEN estar configurados en el impuesto (account.tax).
         
         Usa parámetros del wizard para valores configurables en lugar de hardcodeados.
         """
-        self._validate_move_line(move_line)
+        self._validate_move_line(line, data)
         
-        partner = move_line.partner_id
-        move = move_line.move_id
+        partner = data['partners'][line['partner_id']]
+        move = data['moves'][line['move_id']]
         
         # Obtener CUIT del cliente
-        vat = self._get_clean_cuit(partner)
+        # Sin dígitos en vat queda en ceros, como al limpiarlo en cada línea
+        vat = (partner['sicore_cuit'] or '').zfill(11)
         
-        # Obtener código impuesto y régimen con sistema de 3 niveles
-        codigo_impuesto_raw, codigo_regimen_raw = self._get_tax_and_regime_codes(move_line)
+        # Obtener código impuesto y régimen desde el impuesto del apunte
+        codigo_impuesto_raw, codigo_regimen_raw = self._get_tax_and_regime_codes(line, data)
         
         # Limpiar códigos: quitar ceros a la izquierda para que el padding funcione correctamente
         # Ejemplo: "0767" guardado en BD -> "767" -> padding lo convierte a "767" (3 chars)
@@ -265,20 +270,19 @@ class PerceptionGenerator(models.Model):
         codigo_regimen = codigo_regimen_raw.lstrip('0') or '0' if codigo_regimen_raw else ''
         
         # Obtener tipo de documento desde catálogo (80=CUIT, 86=CUIL, etc.)
-        tipo_documento = self._get_document_type_code(partner)
+        tipo_documento = self._get_document_type_code(partner, data)
         
-        # Importe de percepción = valor absoluto del balance del apunte
-        importe_percepcion = abs(move_line.balance)
+        # Importe de percepción = valor absoluto del balance del apunte (en centavos)
+        importe_percepcion = to_cents(abs(line['balance']))
         
         # Obtener importe del comprobante y base de cálculo
-        # Para cobros con percepción, necesitamos buscar el pago asociado
-        importe_comprobante, base_calculo, factura_relacionada = self._get_invoice_amounts(move_line, move)
+        importe_comprobante, base_calculo, factura_relacionada = self._get_invoice_amounts(move, data)
         
         # Obtener código de comprobante (fijo en 01 para percepciones, configurable en wizard)
         codigo_comprobante = self._get_codigo_comprobante(move, wizard)
         
         # Limpiar número de comprobante (de la factura si existe, sino del asiento)
-        numero_comp = re.sub(r'[^0-9]', '', (factura_relacionada.name if factura_relacionada else move.name) or '')
+        numero_comp = clean_digits(factura_relacionada['name'] if factura_relacionada else move['name'])
         
         # Usar valores del wizard si están disponibles, sino usar defaults
         codigo_operacion = wizard.adv_codigo_operacion if wizard else '1'
@@ -286,18 +290,17 @@ class PerceptionGenerator(models.Model):
         retencion_practicada_sujetos_suspendidos = wizard.adv_retencion_sujetos_suspendidos if wizard else '0'
         porcentaje_exclusion = wizard.adv_porcentaje_exclusion if wizard else '000000'
         numero_certificado_original = wizard.adv_numero_certificado_original if wizard else '00000000000000'
-        cuit_ordenante = self._get_clean_cuit(self.env.company.partner_id)  # CUIT de la empresa
         
         result = {
             'codigo_comprobante': codigo_comprobante,
-            'fecha_emision_comprobante': move_line.date,
+            'fecha_emision_comprobante': line['date'],
             'numero_comprobante': numero_comp,
             'importe_comprobante': importe_comprobante,
             'codigo_impuesto': codigo_impuesto,
             'codigo_regimen': codigo_regimen,
             'codigo_operacion': codigo_operacion,
             'base_calculo': base_calculo,
-            'fecha_emision_retencion': move_line.date,
+            'fecha_emision_retencion': line['date'],
             'codigo_condicion': codigo_condicion,
             'retencion_practicada_sujetos_suspendidos': retencion_practicada_sujetos_suspendidos,
             'importe_retencion': importe_percepcion,
@@ -307,10 +310,10 @@ class PerceptionGenerator(models.Model):
             'numero_documento_retenido': vat,
             'numero_certificado_original': numero_certificado_original,
             # Campos que NO van en percepciones pero se mantienen por si el cliente los necesita
-            # 'denominacion_ordenante': partner.name or '',
+            # 'denominacion_ordenante': partner['name'] or '',
             # 'acrecentamiento': acrecentamiento,
             # 'cuit_pais_retenido': vat,
-            # 'cuit_ordenante': cuit_ordenante,
+            # 'cuit_ordenante': data['company']['sicore_cuit'],
         }
                 
         return result
@@ -319,61 +322,62 @@ class PerceptionGenerator(models.Model):
     # Métodos de validación
     # ===========================
 
-    def _validate_move_line(self, move_line):
+    def _get_preflight_checks(self):
+        """Percepciones validan además tipo de documento y códigos SICORE"""
+        return super()._get_preflight_checks() + [
+            self._preflight_check_document_types,
+            self._preflight_check_tax_codes,
+        ]
+
+    def _validate_move_line(self, line, data):
         """
         Valida que el apunte contable tenga toda la configuración requerida.
         Sin defaults: si falta algo, error formal.
         """
         
         errors = []
+        move = data['moves'][line['move_id']]
         
         # Validar partner
-        if not move_line.partner_id:
-            errors.append(_("PARTNER FALTANTE: El apunte contable '%s' no tiene partner asociado.") % move_line.move_id.name)
+        if not line['partner_id']:
+            errors.append(_("PARTNER FALTANTE: El apunte contable '%s' no tiene partner asociado.") % move['name'])
         else:
+            partner = data['partners'][line['partner_id']]
             # Validar CUIT
-            if not move_line.partner_id.vat:
+            if not partner['vat']:
                 errors.append(
                     _("CUIT PARTNER FALTANTE: El partner '%s' (ID: %s) no tiene CUIT configurado. "
                       "Abre el contacto > Pestaña 'Ventas y Compras' > Campo 'TAX ID (CUIT)' > Ingresa el CUIT") %
-                    (move_line.partner_id.name, move_line.partner_id.id)
+                    (partner['name'], partner['id'])
                 )
             
             # Validar tipo de documento
-            if not move_line.partner_id.sicore_document_type_id:
+            if not partner['sicore_document_type_id']:
                 errors.append(
                     _("TIPO DE DOCUMENTO FALTANTE: El partner '%s' (ID: %s) no tiene tipo de documento SICORE configurado. "
                       "Abre el contacto > Pestaña 'Ventas y Compras' > Campo 'Tipo de Identificación SICORE' > Selecciona el tipo (DNI, CUIT, etc)") %
-                    (move_line.partner_id.name, move_line.partner_id.id)
+                    (partner['name'], partner['id'])
                 )
         
-        # Validar código de impuesto (DEBE venir del impuesto)
-        tax_code = self._try_get_tax_code(move_line)
+        # Validar códigos de impuesto y régimen (DEBEN venir del impuesto)
+        tax_code, regime_code = self._get_tax_and_regime_codes(line, data)
         if not tax_code:
             errors.append(
                 _("CÓDIGO IMPUESTO FALTANTE: No se encontró código de impuesto SICORE para el apunte '%s'. "
                   "Menú 'Contabilidad' > 'Configuración' > 'Impuestos' > Abre el impuesto usado > Campo 'Código Impuesto SICORE' > Ingresa el código") %
-                (move_line.move_id.name,)
+                (move['name'],)
             )
         
-        regime_code = self._try_get_regime_code(move_line)
         if not regime_code:
             errors.append(
                 _("CÓDIGO RÉGIMEN FALTANTE: No se encontró código de régimen SICORE para el apunte '%s'. "
                   "Menú 'Contabilidad' > 'Configuración' > 'Impuestos' > Abre el impuesto usado > Campo 'Código Régimen SICORE' > Ingresa el código") %
-                (move_line.move_id.name,)
+                (move['name'],)
             )
         
         if errors:
             raise ValidationError(" | ".join(errors))
 
-    def _get_clean_cuit(self, partner):
-        """Limpia el CUIT removiendo guiones y espacios"""
-        vat = partner.vat or ''
-        if vat:
-            vat = re.sub(r'[^0-9]', '', str(vat))
-        return vat.zfill(11)  # Rellenar con ceros a la izquierda si es necesario
-
     def _get_codigo_comprobante(self, move, wizard=None):
         """
         Retorna el código de comprobante para exportación SICORE.
@@ -388,76 +392,16 @@ class PerceptionGenerator(models.Model):
         # Default para percepciones: '01'
         return '01'
 
-    def _get_tax_and_regime_codes(self, move_line):
-        """
-        Obtiene código de impuesto y régimen desde el IMPUESTO asociado al apunte.
-        
-        Busca en:
-        1. tax_line_id: si la línea ES el resultado de un impuesto (típico para retenciones/percepciones)
-        2. tax_ids: impuestos aplicados a esta línea
-        
-        NO hay fallback a cuenta contable ni partner - los códigos DEBEN estar en el impuesto.
-        """
-        tax_code = None
-        regime_code = None
-        
-        # NIVEL 1A: Verificar si esta línea ES el impuesto (tax_line_id)
-        if move_line.tax_line_id:
-            if move_line.tax_line_id.sicore_tax_code_id:
-                tax_code = move_line.tax_line_id.sicore_tax_code_id.code
-            if move_line.tax_line_id.sicore_regime_code_id:
-                regime_code = move_line.tax_line_id.sicore_regime_code_id.code
-        
-        # NIVEL 1B: Buscar en impuestos aplicados (tax_ids)
-        if (not tax_code or not regime_code) and move_line.tax_ids:
-            for tax in move_line.tax_ids:
-                if not tax_code and tax.sicore_tax_code_id:
-                    tax_code = tax.sicore_tax_code_id.code
-                if not regime_code and tax.sicore_regime_code_id:
-                    regime_code = tax.sicore_regime_code_id.code
-                if tax_code and regime_code:
-                    break
-        
-        return tax_code, regime_code
-
-    def _try_get_tax_code(self, move_line):
-        """Intenta obtener código de impuesto sin lanzar error (para validación)"""
-        # Buscar si la línea ES el impuesto
-        if move_line.tax_line_id and move_line.tax_line_id.sicore_tax_code_id:
-            return move_line.tax_line_id.sicore_tax_code_id.code
-        
-        # Buscar en impuestos aplicados
-        if move_line.tax_ids:
-            for tax in move_line.tax_ids:
-                if tax.sicore_tax_code_id:
-                    return tax.sicore_tax_code_id.code
-        
-        return None
-
-    def _try_get_regime_code(self, move_line):
-        """Intenta obtener código de régimen sin lanzar error (para validación)"""
-        # Buscar si la línea ES el impuesto
-        if move_line.tax_line_id and move_line.tax_line_id.sicore_regime_code_id:
-            return move_line.tax_line_id.sicore_regime_code_id.code
-        
-        # Buscar en impuestos aplicados
-        if move_line.tax_ids:
-            for tax in move_line.tax_ids:
-                if tax.sicore_regime_code_id:
-                    return tax.sicore_regime_code_id.code
-        
-        return None
-
-    def _get_document_type_code(self, partner):
+    def _get_document_type_code(self, partner, data):
         """Obtiene el código de tipo de documento desde el catálogo"""
-        if not partner.sicore_document_type_id:
+        if not partner['sicore_document_type_id']:
             raise ValidationError(
                 _("El partner '%s' (ID: %s) no tiene tipo de documento SICORE configurado.") %
-                (partner.name, partner.id)
+                (partner['name'], partner['id'])
             )
-        return partner.sicore_document_type_id.code
+        return data['document_types'][partner['sicore_document_type_id']]
 
-    def _get_invoice_amounts(self, move_line, payment_move):
+    def _get_invoice_amounts(self, move, data):
         """
         Obtiene el importe del comprobante y base de cálculo directamente del asiento contable.
         
@@ -466,14 +410,11 @@ class PerceptionGenerator(models.Model):
         - Base de cálculo: move.amount_untaxed
         
         Returns:
-            tuple: (importe_comprobante, base_calculo, factura_relacionada o None)
+            tuple: (importe_comprobante, base_calculo, factura_relacionada o None), importes en centavos
         """
-        move = move_line.move_id
-        
         # Extraer importes directamente del asiento contable
-        importe_comprobante = abs(move.amount_total)
-        base_calculo = abs(move.amount_untaxed)
+        importe_comprobante = to_cents(abs(move['amount_total']))
+        base_calculo = to_cents(abs(move['amount_untaxed']))
         
         # Retornar None para factura_relacionada (no la usamos en percepciones)
         return importe_comprobante, base_calculo, None
-        
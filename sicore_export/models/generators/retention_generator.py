@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 
-import re
 import logging
 from odoo import models, _  # type: ignore
+from odoo.tools import SQL  # type: ignore
 from odoo.exceptions import ValidationError  # type: ignore
 
+from .sicore_layout import to_cents
+
 _logger = logging.getLogger(__name__)
 
 
@@ -226,12 +228,11 @@ class RetentionGenerator(models.Model):
         pero la cuenta contable es la que determina si es una retención o no.
         """
         domain = [
-            ('account_id.sicore_export_type', '=', 'retention'),
-            ('move_id.state', 'in', ['posted', 'paid']),
+            # Tipo SICORE almacenado en el apunte (cuenta + exclusión de diarios de presupuesto)
+            ('sicore_export_type', '=', 'retention'),
+            ('parent_state', '=', 'posted'),
             # ('move_id.move_type', 'in', ['in_invoice', 'in_refund']),  # SOLO facturas de proveedor
             ('company_id', '=', wizard.company_id.id),
-            # El diario debe permitir exportación (no ser solo presupuesto)
-            ('journal_id.sicore_export_type', '!=', 'budget'),
         ]
         
         # Filtro de fechas
@@ -257,22 +258,215 @@ class RetentionGenerator(models.Model):
         
         return domain
 
-    def _get_record_values(self, move_line, wizard=None):
+    def _get_move_read_fields(self):
+        """Retenciones necesitan el pago y los withholdings del asiento"""
+        move_fields = self.env['account.move']._fields
+        return super()._get_move_read_fields() + [
+            name for name in ('l10n_ar_withholding_ids', 'payment_id', 'origin_payment_id')
+            if name in move_fields
+        ]
+
+    def _prefetch_export_data(self, records, wizard=None):
+        """Agrega pagos y withholdings de los asientos, leídos en bloque"""
+        if wizard and getattr(wizard, 'adv_sql_extraction', False):
+            if self._is_sql_extraction_available():
+                return self._prefetch_export_data_sql(records, wizard)
+            _logger.warning("[SICORE] Extracción SQL de retenciones no disponible, se usa el ORM")
+        
+        data = super()._prefetch_export_data(records, wizard)
+        
+        payment_ids = set()
+        withholding_ids = set()
+        for move in data['moves'].values():
+            payment_id = move.get('payment_id') or move.get('origin_payment_id')
+            if payment_id:
+                payment_ids.add(payment_id)
+            withholding_ids.update(move.get('l10n_ar_withholding_ids', []))
+        
+        data['payments'] = self._read_by_id(self.env['account.payment'].browse(list(payment_ids)), ['amount', 'write_date'])
+        data['withholdings'] = self._read_by_id(self.env['account.move.line'].browse(list(withholding_ids)), ['tax_base_amount'])
+        return data
+
+    # ===========================
+    # Extracción SQL (opcional)
+    # ===========================
+
+    def _get_sql_payment_columns(self):
+        """Columnas almacenadas de account_move que apuntan al pago, en orden de prioridad"""
+        move_fields = self.env['account.move']._fields
+        return [
+            name for name in ('payment_id', 'origin_payment_id')
+            if name in move_fields and move_fields[name].store
+        ]
+
+    def _is_sql_extraction_available(self):
+        """La extracción SQL replica l10n_ar_withholding: requiere el tipo de retención en account.tax"""
+        tax_field = self.env['account.tax']._fields.get('l10n_ar_withholding_payment_type')
+        return bool(tax_field and tax_field.store and 'l10n_ar_withholding_ids' in self.env['account.move']._fields)
+
+    def _prefetch_export_data_sql(self, records, wizard=None):
+        """
+        Variante de _prefetch_export_data() que resuelve todos los datos de la exportación
+        con una única consulta SQL (una fila por apunte) y arma las mismas estructuras
+        que la extracción por ORM, de modo que el TXT generado es idéntico byte a byte.
+        
+        - Los apuntes son los ids ya obtenidos con search(), por lo que el dominio y las
+          reglas de acceso son los mismos que en el camino ORM.
+        - Los impuestos aplicados (tax_ids) se ordenan igual que account.tax (sequence, id).
+        - Los withholdings son las líneas del asiento cuyo impuesto tiene
+          l10n_ar_withholding_payment_type, igual que move.l10n_ar_withholding_ids.
+        """
+        MoveLine = self.env['account.move.line']
+        tax_ids_field = MoveLine._fields['tax_ids']
+        payment_columns = self._get_sql_payment_columns()
+        payment_select = SQL("").join(
+            SQL(", %s AS %s", SQL.identifier('am', column), SQL.identifier(f'move_{column}'))
+            for column in payment_columns
+        )
+        payment_join = SQL(
+            "LEFT JOIN account_payment pay ON pay.id = COALESCE(%s)",
+            SQL(", ").join(SQL.identifier('am', column) for column in payment_columns),
+        ) if payment_columns else SQL("LEFT JOIN account_payment pay ON FALSE")
+        
+        self.env.flush_all()
+        self.env.cr.execute(SQL("""
+            SELECT aml.id, aml.date, aml.name, aml.balance, aml.partner_id, aml.move_id,
+                   aml.account_id, aml.tax_line_id, aml.write_date,
+                   am.name AS move_name, am.write_date AS move_write_date%s,
+                   pay.id AS payment_id, pay.amount AS payment_amount, pay.write_date AS payment_write_date,
+                   rp.name AS partner_name, rp.vat AS partner_vat, rp.write_date AS partner_write_date,
+                   rp.sicore_cuit AS partner_sicore_cuit,
+                   rp.sicore_document_type_id, sdt.code AS document_type_code,
+                   tl_code.code AS tax_line_tax_code, tl_regime.code AS tax_line_regime_code,
+                   tx.tax_ids, tx.tax_codes, tx.regime_codes,
+                   wh.withholding_ids, wh.withholding_base_amounts
+              FROM account_move_line aml
+              JOIN account_move am ON am.id = aml.move_id
+              %s
+              LEFT JOIN res_partner rp ON rp.id = aml.partner_id
+              LEFT JOIN sicore_document_type sdt ON sdt.id = rp.sicore_document_type_id
+              LEFT JOIN account_tax tl ON tl.id = aml.tax_line_id
+              LEFT JOIN sicore_tax_code tl_code ON tl_code.id = tl.sicore_tax_code_id
+              LEFT JOIN sicore_regime_code tl_regime ON tl_regime.id = tl.sicore_regime_code_id
+              LEFT JOIN LATERAL (
+                    SELECT array_agg(t.id ORDER BY t.sequence, t.id) AS tax_ids,
+                           array_agg(stc.code ORDER BY t.sequence, t.id) AS tax_codes,
+                           array_agg(src.code ORDER BY t.sequence, t.id) AS regime_codes
+                      FROM %s rel
+                      JOIN account_tax t ON t.id = %s
+                      LEFT JOIN sicore_tax_code stc ON stc.id = t.sicore_tax_code_id
+                      LEFT JOIN sicore_regime_code src ON src.id = t.sicore_regime_code_id
+                     WHERE %s = aml.id
+                   ) tx ON TRUE
+              LEFT JOIN LATERAL (
+                    SELECT array_agg(wl.id ORDER BY wl.id) AS withholding_ids,
+                           array_agg(wl.tax_base_amount ORDER BY wl.id) AS withholding_base_amounts
+                      FROM account_move_line wl
+                      JOIN account_tax wt ON wt.id = wl.tax_line_id
+                     WHERE wl.move_id = am.id
+                       AND wt.l10n_ar_withholding_payment_type IS NOT NULL
+                   ) wh ON TRUE
+             WHERE aml.id = ANY(%s)
+        """,
+            payment_select,
+            payment_join,
+            SQL.identifier(tax_ids_field.relation),
+            SQL.identifier('rel', tax_ids_field.column2),
+            SQL.identifier('rel', tax_ids_field.column1),
+            records.ids,
+        ))
+        
+        def _value(value):
+            # Mismo valor "vacío" que devuelve read() del ORM
+            return False if value is None else value
+        
+        data = {
+            'lines': {}, 'moves': {}, 'partners': {}, 'document_types': {}, 'taxes': {},
+            'payments': {}, 'withholdings': {},
+        }
+        for row in self.env.cr.dictfetchall():
+            tax_ids = row['tax_ids'] or []
+            data['lines'][row['id']] = {
+                'id': row['id'],
+                'date': row['date'],
+                'name': _value(row['name']),
+                'balance': float(row['balance'] or 0.0),
+                'partner_id': _value(row['partner_id']),
+                'move_id': row['move_id'],
+                'account_id': row['account_id'],
+                'tax_line_id': _value(row['tax_line_id']),
+                'tax_ids': tax_ids,
+                'write_date': row['write_date'],
+            }
+            
+            withholding_ids = row['withholding_ids'] or []
+            move = {
+                'id': row['move_id'],
+                'name': _value(row['move_name']),
+                'write_date': row['move_write_date'],
+                'l10n_ar_withholding_ids': withholding_ids,
+            }
+            for column in payment_columns:
+                move[column] = _value(row[f'move_{column}'])
+            data['moves'][row['move_id']] = move
+            for withholding_id, base_amount in zip(withholding_ids, row['withholding_base_amounts'] or []):
+                data['withholdings'][withholding_id] = {'id': withholding_id, 'tax_base_amount': float(base_amount or 0.0)}
+            
+            if row['payment_id']:
+                data['payments'][row['payment_id']] = {
+                    'id': row['payment_id'],
+                    'amount': float(row['payment_amount'] or 0.0),
+                    'write_date': row['payment_write_date'],
+                }
+            
+            if row['partner_id']:
+                data['partners'][row['partner_id']] = {
+                    'id': row['partner_id'],
+                    'name': _value(row['partner_name']),
+                    'vat': _value(row['partner_vat']),
+                    'sicore_cuit': _value(row['partner_sicore_cuit']),
+                    'sicore_document_type_id': _value(row['sicore_document_type_id']),
+                    'write_date': row['partner_write_date'],
+                }
+                if row['sicore_document_type_id']:
+                    data['document_types'][row['sicore_document_type_id']] = row['document_type_code']
+            
+            if row['tax_line_id']:
+                data['taxes'][row['tax_line_id']] = (row['tax_line_tax_code'], row['tax_line_regime_code'])
+            for tax_id, tax_code, regime_code in zip(tax_ids, row['tax_codes'] or [], row['regime_codes'] or []):
+                data['taxes'][tax_id] = (tax_code, regime_code)
+        
+        company = self.env.company
+        data['company'] = self._get_company_data(company)
+        return data
+
+    def _get_fragment_dependencies(self, line, data):
+        """La línea también depende del pago y de las bases de los withholdings del asiento"""
+        move = data['moves'][line['move_id']]
+        payment = data['payments'].get(move.get('payment_id') or move.get('origin_payment_id')) or {}
+        withholdings = data['withholdings']
+        return super()._get_fragment_dependencies(line, data) + (
+            payment.get('write_date'),
+            tuple(withholdings[wh_id]['tax_base_amount'] for wh_id in move.get('l10n_ar_withholding_ids', [])),
+        )
+
+    def _get_row_values(self, line, data, wizard=None):
         """
         Extrae valores del apunte contable para generar línea TXT según formato SICORE real.
         Los códigos de impuesto y régimen DEBEN estar configurados en el impuesto (account.tax).
         
         Usa parámetros del wizard para valores configurables en lugar de hardcodeados.
         """
-        self._validate_move_line(move_line)
+        self._validate_move_line(line, data)
         
-        partner = move_line.partner_id
-        move = move_line.move_id
+        partner = data['partners'][line['partner_id']]
+        move = data['moves'][line['move_id']]
 
-        vat = self._get_clean_cuit(partner)
+        # Sin dígitos en vat queda en ceros, como al limpiarlo en cada línea
+        vat = (partner['sicore_cuit'] or '').zfill(11)
         
-        # Obtener código impuesto y régimen con sistema de 3 niveles
-        codigo_impuesto_raw, codigo_regimen_raw = self._get_tax_and_regime_codes(move_line)
+        # Obtener código impuesto y régimen desde el impuesto del apunte
+        codigo_impuesto_raw, codigo_regimen_raw = self._get_tax_and_regime_codes(line, data)
         
         # Limpiar códigos: quitar ceros a la izquierda para que el padding funcione correctamente
         # Ejemplo: "0767" guardado en BD -> "767" -> padding lo convierte a "767" (3 chars)
@@ -281,19 +475,17 @@ class RetentionGenerator(models.Model):
         codigo_regimen = codigo_regimen_raw.lstrip('0') or '0' if codigo_regimen_raw else ''
                 
         # Obtener tipo de documento desde catálogo (80=CUIT, 86=CUIL, etc.)
-        tipo_documento = self._get_document_type_code(partner)
+        tipo_documento = self._get_document_type_code(partner, data)
         
-        # Importe de retención = valor absoluto del balance del apunte
-        importe_retencion = abs(move_line.balance)
+        # Importe de retención = valor absoluto del balance del apunte (en centavos)
+        importe_retencion = to_cents(abs(line['balance']))
         
         # Obtener importe del comprobante y base de cálculo desde payment + withholdings
-        importe_comprobante, base_calculo, factura_relacionada = self._get_invoice_amounts(move_line, move)
+        importe_comprobante, base_calculo, factura_relacionada = self._get_invoice_amounts(move, data)
         
         # Obtener código de comprobante (fijo en 06 para retenciones, configurable en wizard)
         codigo_comprobante = self._get_codigo_comprobante(move, wizard)
         
-        # Número de comprobante del apunte contable
-        
         # Usar valores del wizard si están disponibles, sino usar defaults
         codigo_operacion = wizard.adv_codigo_operacion if wizard else '1'
         codigo_condicion = wizard.adv_codigo_condicion if wizard else '01'
@@ -306,23 +498,23 @@ class RetentionGenerator(models.Model):
         
         return {
             'codigo_comprobante': codigo_comprobante,
-            'fecha_emision_comprobante': move_line.date,
-            'numero_comprobante': move_line.name,
+            'fecha_emision_comprobante': line['date'],
+            'numero_comprobante': line['name'],
             'importe_comprobante': importe_comprobante,
             'codigo_impuesto': codigo_impuesto,
             'codigo_regimen': codigo_regimen,
             'codigo_operacion': codigo_operacion,
             'base_calculo': base_calculo,
-            'fecha_emision_retencion': move_line.date,
+            'fecha_emision_retencion': line['date'],
             'codigo_condicion': codigo_condicion,
             'retencion_practicada_sujetos_suspendidos': retencion_practicada_sujetos_suspendidos,
             'importe_retencion': importe_retencion,
             'porcentaje_exclusion': porcentaje_exclusion,
-            'fecha_publicacion_finalizacion_vigencia': move_line.date,
+            'fecha_publicacion_finalizacion_vigencia': line['date'],
             'tipo_documento_retenido': tipo_documento,
             'numero_documento_retenido': vat,
             'numero_certificado_original': numero_certificado_original,
-            'denominacion_ordenante': partner.name or '',
+            'denominacion_ordenante': partner['name'] or '',
             'cuit_pais_retenido': vat,
             'cuit_ordenante': cuit_ordenante,
         }
@@ -331,69 +523,102 @@ class RetentionGenerator(models.Model):
     # Métodos de validación
     # ===========================
 
-    def _validate_move_line(self, move_line):
+    def _get_preflight_checks(self):
+        """Retenciones validan además tipo de documento, códigos SICORE, withholdings y pago del asiento"""
+        return super()._get_preflight_checks() + [
+            self._preflight_check_document_types,
+            self._preflight_check_tax_codes,
+            self._preflight_check_moves,
+        ]
+
+    def _preflight_check_moves(self, data):
+        """Asientos sin withholdings o sin pago asociado, uno por mensaje"""
+        moves = data['moves']
+        problems = []
+        without_withholdings = self._group_line_ids(
+            data, lambda line: line['move_id'] if not moves[line['move_id']].get('l10n_ar_withholding_ids') else None
+        )
+        for move_id, line_ids in without_withholdings.items():
+            problems.append((
+                'move',
+                _("RETENCIONES NO ENCONTRADAS: El asiento contable '%s' no tiene retenciones (l10n_ar_withholding_ids) asociadas (%s apuntes). "
+                  "Los apuntes de retención DEBEN estar vinculados a un asiento que contiene los datos de retención.") %
+                (moves[move_id]['name'], len(line_ids)),
+                line_ids,
+                _("El asiento contable '%s' no tiene retenciones asociadas") % moves[move_id]['name'],
+            ))
+        without_payment = self._group_line_ids(
+            data,
+            lambda line: line['move_id']
+            if not (moves[line['move_id']].get('payment_id') or moves[line['move_id']].get('origin_payment_id')) else None
+        )
+        for move_id, line_ids in without_payment.items():
+            problems.append((
+                'move',
+                _("PAGO NO ENCONTRADO: El asiento contable '%s' no tiene un pago (account.payment) asociado (%s apuntes). "
+                  "Los apuntes de retención DEBEN estar vinculados a un pago.") %
+                (moves[move_id]['name'], len(line_ids)),
+                line_ids,
+                _("El asiento contable '%s' no tiene un pago asociado") % moves[move_id]['name'],
+            ))
+        return problems
+
+    def _validate_move_line(self, line, data):
         """
         Valida que el apunte contable tenga toda la configuración requerida.
         Sin defaults: si falta algo, error formal.
         """
         errors = []
+        move = data['moves'][line['move_id']]
         
         # Validar partner
-        if not move_line.partner_id:
-            errors.append(_("PARTNER FALTANTE: El apunte contable '%s' no tiene partner asociado.") % move_line.move_id.name)
+        if not line['partner_id']:
+            errors.append(_("PARTNER FALTANTE: El apunte contable '%s' no tiene partner asociado.") % move['name'])
         else:
+            partner = data['partners'][line['partner_id']]
             # Validar CUIT
-            if not move_line.partner_id.vat:
+            if not partner['vat']:
                 errors.append(
                     _("CUIT PARTNER FALTANTE: El partner '%s' (ID: %s) no tiene CUIT configurado. "
                       "Abre el contacto > Pestaña 'Ventas y Compras' > Campo 'TAX ID (CUIT)' > Ingresa el CUIT") %
-                    (move_line.partner_id.name, move_line.partner_id.id)
+                    (partner['name'], partner['id'])
                 )
             
             # Validar tipo de documento
-            if not move_line.partner_id.sicore_document_type_id:
+            if not partner['sicore_document_type_id']:
                 errors.append(
                     _("TIPO DE DOCUMENTO FALTANTE: El partner '%s' (ID: %s) no tiene tipo de documento SICORE configurado. "
                       "Abre el contacto > Pestaña 'Ventas y Compras' > Campo 'Tipo de Identificación SICORE' > Selecciona el tipo (DNI, CUIT, etc)") %
-                    (move_line.partner_id.name, move_line.partner_id.id)
+                    (partner['name'], partner['id'])
                 )
         
-        # Validar código de impuesto (DEBE venir del impuesto)
-        tax_code = self._try_get_tax_code(move_line)
+        # Validar códigos de impuesto y régimen (DEBEN venir del impuesto)
+        tax_code, regime_code = self._get_tax_and_regime_codes(line, data)
         if not tax_code:
             errors.append(
                 _("CÓDIGO IMPUESTO FALTANTE: No se encontró código de impuesto SICORE para el apunte '%s'. "
                   "Menú 'Contabilidad' > 'Configuración' > 'Impuestos' > Abre el impuesto usado > Campo 'Código Impuesto SICORE' > Ingresa el código") %
-                (move_line.move_id.name,)
+                (move['name'],)
             )
         
-        # Validar código de régimen (DEBE venir del impuesto)
-        regime_code = self._try_get_regime_code(move_line)
         if not regime_code:
             errors.append(
                 _("CÓDIGO RÉGIMEN FALTANTE: No se encontró código de régimen SICORE para el apunte '%s'. "
                   "Menú 'Contabilidad' > 'Configuración' > 'Impuestos' > Abre el impuesto usado > Campo 'Código Régimen SICORE' > Ingresa el código") %
-                (move_line.move_id.name,)
+                (move['name'],)
             )
         
         # Validar que el asiento contable tenga withholdings (retenciones)
-        if not move_line.move_id.l10n_ar_withholding_ids:
+        if not move.get('l10n_ar_withholding_ids'):
             errors.append(
                 _("RETENCIONES NO ENCONTRADAS: El asiento contable '%s' no tiene retenciones (l10n_ar_withholding_ids) asociadas. "
                   "Los apuntes de retención DEBEN estar vinculados a un asiento que contiene los datos de retención.") %
-                (move_line.move_id.name,)
+                (move['name'],)
             )
         
         if errors:
             raise ValidationError(" | ".join(errors))
 
-    def _get_clean_cuit(self, partner):
-        """Limpia el CUIT removiendo guiones y espacios"""
-        vat = partner.vat or ''
-        if vat:
-            vat = re.sub(r'[^0-9]', '', str(vat))
-        return vat.zfill(11)  # Rellenar con ceros a la izquierda si es necesario
-
     def _get_codigo_comprobante(self, move, wizard=None):
         """
         Retorna el código de comprobante para exportación SICORE.
@@ -408,80 +633,16 @@ class RetentionGenerator(models.Model):
         # Default para retenciones: '06'
         return '06'
 
-    def _get_tax_and_regime_codes(self, move_line):
-        """
-        Obtiene código de impuesto y régimen desde el IMPUESTO asociado al apunte.
-        
-        Busca en:
-        1. tax_line_id: si la línea ES el resultado de un impuesto (típico para retenciones/percepciones)
-        2. tax_ids: impuestos aplicados a esta línea
-        
-        NO hay fallback a cuenta contable ni partner - los códigos DEBEN estar en el impuesto.
-        """
-        tax_code = None
-        regime_code = None
-        
-        # Primero buscar en tax_line_id (esta línea ES el resultado de un impuesto)
-        # Esto es típico para líneas de retención/percepción
-        if move_line.tax_line_id:
-            tax = move_line.tax_line_id
-            if tax.sicore_tax_code_id:
-                tax_code = tax.sicore_tax_code_id.code
-            if tax.sicore_regime_code_id:
-                regime_code = tax.sicore_regime_code_id.code
-        
-        # Si no encontramos, buscar en tax_ids (impuestos aplicados a esta línea)
-        if (not tax_code or not regime_code) and move_line.tax_ids:
-            for tax in move_line.tax_ids:
-                if not tax_code and tax.sicore_tax_code_id:
-                    tax_code = tax.sicore_tax_code_id.code
-                if not regime_code and tax.sicore_regime_code_id:
-                    regime_code = tax.sicore_regime_code_id.code
-                if tax_code and regime_code:
-                    break
-        
-        return tax_code, regime_code
-
-    def _try_get_tax_code(self, move_line):
-        """Intenta obtener código de impuesto sin lanzar error (para validación)"""
-        # Buscar en tax_line_id (línea ES el impuesto)
-        if move_line.tax_line_id and move_line.tax_line_id.sicore_tax_code_id:
-            return move_line.tax_line_id.sicore_tax_code_id.code
-        
-        # Buscar en impuestos aplicados
-        if move_line.tax_ids:
-            for tax in move_line.tax_ids:
-                if tax.sicore_tax_code_id:
-                    return tax.sicore_tax_code_id.code
-        
-        return None
-
-    def _try_get_regime_code(self, move_line):
-        """Intenta obtener código de régimen sin lanzar error (para validación)"""
-        # Buscar en tax_line_id (línea ES el impuesto)
-        if move_line.tax_line_id and move_line.tax_line_id.sicore_regime_code_id:
-            return move_line.tax_line_id.sicore_regime_code_id.code
-        
-        # Buscar en impuestos aplicados
-        if move_line.tax_ids:
-            for tax in move_line.tax_ids:
-                if tax.sicore_regime_code_id:
-                    return tax.sicore_regime_code_id.code
-        
-        return None
-
-    def _get_document_type_code(self, partner):
+    def _get_document_type_code(self, partner, data):
         """Obtiene el código de tipo de documento desde el catálogo"""
-        if not partner.sicore_document_type_id:
+        if not partner['sicore_document_type_id']:
             raise ValidationError(
                 _("El partner '%s' (ID: %s) no tiene tipo de documento SICORE configurado.") %
-                (partner.name, partner.id)
+                (partner['name'], partner['id'])
             )
-        return partner.sicore_document_type_id.code
-
+        return data['document_types'][partner['sicore_document_type_id']]
 
-
-    def _get_move_withholding_amounts(self, move, payment):
+    def _get_move_withholding_amounts(self, move, payment, data):
         """
         Extrae importes desde el payment y los withholdings del asiento contable.
         
@@ -489,37 +650,25 @@ class RetentionGenerator(models.Model):
         - Base de cálculo: suma de tax_base_amount de todos los withholdings
         
         Args:
-            move: account.move record
-            payment: account.payment record asociado
+            move: valores leídos del account.move
+            payment: valores leídos del account.payment asociado
+            data: resultado de _prefetch_export_data()
             
         Returns:
-            tuple: (importe_comprobante, base_calculo)
+            tuple: (importe_comprobante, base_calculo) en centavos
         """
         # Importe del comprobante = monto total del pago
-        importe_comprobante = abs(payment.amount)
+        importe_comprobante = to_cents(abs(payment['amount']))
         
-        # Base de cálculo = suma de tax_base_amount de todos los withholdings
-        base_calculo = sum(abs(w.tax_base_amount) for w in move.l10n_ar_withholding_ids)
+        # Base de cálculo = suma de tax_base_amount de todos los withholdings, redondeada
+        # una sola vez al pasar a centavos (como antes de usar centavos): bases con más
+        # de 2 decimales no acumulan el redondeo de cada withholding
+        withholdings = data['withholdings']
+        base_calculo = to_cents(sum(abs(withholdings[w_id]['tax_base_amount']) for w_id in move['l10n_ar_withholding_ids']))
         
         return importe_comprobante, base_calculo
 
-    def _get_base_calculo(self, move):
-        """
-        Calcula la base imponible sumando las líneas de cuentas por pagar/cobrar
-        del mismo asiento (excluyendo la línea de retención)
-        """
-        # En Odoo 18, account_type es un campo Selection directamente en account.account
-        # Buscar líneas con cuentas de tipo payable/receivable
-        base_lines = move.line_ids.filtered(
-            lambda l: l.account_id.account_type in ['asset_receivable', 'liability_payable']
-        )
-                
-        # Sumar el balance absoluto de estas líneas
-        base_calculo = sum(abs(line.balance) for line in base_lines)
-        
-        return base_calculo if base_calculo > 0 else abs(move.amount_total)
-
-    def _get_invoice_amounts(self, move_line, payment_move):
+    def _get_invoice_amounts(self, move, data):
         """
         Obtiene el importe del comprobante y base de cálculo desde el pago y los withholdings.
         
@@ -535,25 +684,19 @@ class RetentionGenerator(models.Model):
         Returns:
             tuple: (importe_comprobante, base_calculo, factura_relacionada o None)
         """
-        move = move_line.move_id
-        
         # Buscar payment asociado al asiento contable
-        payment = None
-        if hasattr(move, 'payment_id') and move.payment_id:
-            payment = move.payment_id
-        elif hasattr(move, 'origin_payment_id') and move.origin_payment_id:
-            payment = move.origin_payment_id
+        payment_id = move.get('payment_id') or move.get('origin_payment_id')
         
-        if not payment:
+        if not payment_id:
             # Error: el asiento contable DEBE tener un payment asociado
             raise ValidationError(
                 _("PAGO NO ENCONTRADO: El asiento contable '%s' no tiene un pago (account.payment) asociado. "
                   "Los apuntes de retención DEBEN estar vinculados a un pago.") %
-                (move.name,)
+                (move['name'],)
             )
         
         # Extraer importes del payment + withholdings
-        importe_comprobante, base_calculo = self._get_move_withholding_amounts(move, payment)
+        importe_comprobante, base_calculo = self._get_move_withholding_amounts(move, data['payments'][payment_id], data)
         
         # Retornar None para factura_relacionada (no la usamos en retenciones)
         return importe_comprobante, base_calculo, None
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Comparación de dos archivos SICORE por la identidad de negocio de cada línea
+(comprobante, CUIT, códigos de impuesto y régimen).
+
+Cada archivo se ordena por clave con un ordenamiento externo (bloques ordenados
+volcados a archivos temporales y mezclados con heapq.merge) y los dos flujos
+ordenados se recorren juntos una sola vez. En memoria solo quedan un bloque
+durante el ordenamiento y las líneas de la clave actual durante la comparación.
+"""
+
+import heapq
+import itertools
+import tempfile
+from operator import itemgetter
+
+# Líneas ordenadas en memoria por bloque antes de volcarlas a un archivo temporal
+DIFF_SORT_CHUNK_SIZE = 100000
+
+# Separadores de la clave: entre campos, y entre clave y línea en los archivos
+# temporales (caracteres de control que no aparecen en las líneas SICORE)
+KEY_FIELD_SEPARATOR = '\x1e'
+KEY_LINE_SEPARATOR = '\x1f'
+
+# Líneas de una misma clave hasta las que se busca el par más parecido
+# (con más, se emparejan en orden para no comparar todas contra todas)
+SAME_KEY_MATCH_LIMIT = 200
+
+# Tipos de diferencia
+DIFF_ADDED = 'added'
+DIFF_REMOVED = 'removed'
+DIFF_CHANGED = 'changed'
+DIFF_UNCHANGED = 'unchanged'
+
+
+def make_key_func(layout, identity_fields):
+    """Función línea -> clave con los campos identity_fields del diseño de línea"""
+    field_names = layout.field_names
+    indexes = [field_names.index(name) for name in identity_fields if name in field_names]
+    split_line = layout.split_line
+
+    def key_func(line):
+        parts = split_line(line)
+        return KEY_FIELD_SEPARATOR.join(parts[i].strip() if i < len(parts) else '' for i in indexes)
+
+    return key_func
+
+
+def _read_run(run):
+    for record in run:
+        yield tuple(record.rstrip('\n').split(KEY_LINE_SEPARATOR, 1))
+
+
+def iter_sorted_lines(lines, key_func, chunk_size=DIFF_SORT_CHUNK_SIZE):
+    """
+    Genera (clave, línea) ordenados por clave y línea. Hasta chunk_size líneas se
+    ordenan en memoria; con más, cada bloque ordenado va a un archivo temporal
+    y los bloques se mezclan al leer.
+    """
+    lines = iter(lines)
+    runs = []
+    try:
+        while True:
+            chunk = sorted((key_func(line), line) for line in itertools.islice(lines, chunk_size))
+            if not runs and len(chunk) < chunk_size:
+                yield from chunk
+                return
+            if chunk:
+                run = tempfile.TemporaryFile('w+', encoding='utf-8', newline='\n')
+                run.writelines(f'{key}{KEY_LINE_SEPARATOR}{line}\n' for key, line in chunk)
+                run.seek(0)
+                runs.append(run)
+            if len(chunk) < chunk_size:
+                break
+        yield from heapq.merge(*(_read_run(run) for run in runs))
+    finally:
+        for run in runs:
+            run.close()
+
+
+def get_field_differences(layout, old_line, new_line):
+    """Tupla de (campo, valor anterior, valor nuevo) de los campos que difieren"""
+    return tuple(
+        (name, old_value.strip(), new_value.strip())
+        for name, old_value, new_value in itertools.zip_longest(
+            layout.field_names, layout.split_line(old_line), layout.split_line(new_line), fillvalue=''
+        )
+        if old_value != new_value
+    )
+
+
+def _pair_lines(layout, old_lines, new_lines):
+    """
+    Empareja las líneas anteriores y nuevas empezando por los pares que menos
+    campos cambian; las que quedan sin par se emparejan con None
+    """
+    if len(old_lines) > SAME_KEY_MATCH_LIMIT or len(new_lines) > SAME_KEY_MATCH_LIMIT:
+        return list(itertools.zip_longest(old_lines, new_lines))
+    candidates = sorted(
+        (len(get_field_differences(layout, old_line, new_line)), i, j)
+        for i, old_line in enumerate(old_lines)
+        for j, new_line in enumerate(new_lines)
+    )
+    old_pending = set(range(len(old_lines)))
+    new_pending = set(range(len(new_lines)))
+    pairs = []
+    for _count, i, j in candidates:
+        if i in old_pending and j in new_pending:
+            old_pending.discard(i)
+            new_pending.discard(j)
+            pairs.append((old_lines[i], new_lines[j]))
+    pairs.extend((old_lines[i], None) for i in sorted(old_pending))
+    pairs.extend((None, new_lines[j]) for j in sorted(new_pending))
+    return pairs
+
+
+def _diff_same_key(layout, key, old_lines, new_lines):
+    """
+    Compara las líneas (ordenadas) de una misma clave: primero se descartan las
+    idénticas y el resto se empareja por parecido como modificadas; las sobrantes
+    quedan como eliminadas o agregadas.
+    """
+    old_rest = []
+    new_rest = []
+    i = j = 0
+    while i < len(old_lines) and j < len(new_lines):
+        if old_lines[i] == new_lines[j]:
+            yield DIFF_UNCHANGED, key, old_lines[i], new_lines[j], ()
+            i += 1
+            j += 1
+        elif old_lines[i] < new_lines[j]:
+            old_rest.append(old_lines[i])
+            i += 1
+        else:
+            new_rest.append(new_lines[j])
+            j += 1
+    old_rest.extend(old_lines[i:])
+    new_rest.extend(new_lines[j:])
+
+    for old_line, new_line in _pair_lines(layout, old_rest, new_rest):
+        if new_line is None:
+            yield DIFF_REMOVED, key, old_line, None, ()
+        elif old_line is None:
+            yield DIFF_ADDED, key, None, new_line, ()
+        else:
+            yield DIFF_CHANGED, key, old_line, new_line, get_field_differences(layout, old_line, new_line)
+
+
+def iter_diff(old_sorted, new_sorted, layout):
+    """
+    Recorre juntos dos flujos (clave, línea) ordenados (iter_sorted_lines) y genera
+    (tipo, clave, línea anterior, línea nueva, diferencias por campo) con tipo
+    DIFF_ADDED, DIFF_REMOVED, DIFF_CHANGED o DIFF_UNCHANGED.
+    Las líneas con la misma clave (ej: varias retenciones del mismo régimen en un
+    comprobante) se comparan entre sí con _diff_same_key().
+    """
+    old_groups = itertools.groupby(old_sorted, key=itemgetter(0))
+    new_groups = itertools.groupby(new_sorted, key=itemgetter(0))
+    old_group = next(old_groups, None)
+    new_group = next(new_groups, None)
+
+    while old_group is not None or new_group is not None:
+        if new_group is None or (old_group is not None and old_group[0] < new_group[0]):
+            key = old_group[0]
+            for _key, line in old_group[1]:
+                yield DIFF_REMOVED, key, line, None, ()
+            old_group = next(old_groups, None)
+        elif old_group is None or new_group[0] < old_group[0]:
+            key = new_group[0]
+            for _key, line in new_group[1]:
+                yield DIFF_ADDED, key, None, line, ()
+            new_group = next(new_groups, None)
+        else:
+            key = old_group[0]
+            yield from _diff_same_key(
+                layout, key,
+                [line for _key, line in old_group[1]],
+                [line for _key, line in new_group[1]],
+            )
+            old_group = next(old_groups, None)
+            new_group = next(new_groups, None)
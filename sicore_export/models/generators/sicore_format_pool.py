@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Formateo de líneas SICORE en un pool de procesos (sin ORM).
+
+Los procesos hijos se crean con el método 'spawn': arrancan vacíos, sin copia del
+proceso principal (cursor, conexiones a la base, hilos ni locks del servidor).
+Cada hijo ejecuta sicore_format_worker.py, que hace importable este addon y compila
+el diseño de línea a partir de la especificación de campos (diccionarios simples).
+Las tareas son bloques de filas: tuplas de valores (textos, enteros, fechas) en el
+orden de los campos del diseño. Los resultados vuelven en el mismo orden.
+"""
+
+import logging
+import multiprocessing
+import os
+import pickle
+import runpy
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import odoo.addons  # type: ignore
+from odoo.exceptions import ValidationError  # type: ignore
+
+from . import sicore_layout
+
+_logger = logging.getLogger(__name__)
+
+# Filas por tarea enviada a cada proceso
+FORMAT_CHUNK_SIZE = 1000
+
+# Script de arranque de cada proceso hijo (se ejecuta con runpy, no se importa)
+WORKER_BOOTSTRAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sicore_format_worker.py')
+
+# Diseño de línea compilado del proceso hijo (lo asigna init_worker())
+_worker_layout = None
+
+
+def format_row(layout, row):
+    """
+    Formatea una fila (tupla en el orden de layout.field_names) sin propagar excepciones.
+    Retorna (True, línea) o (False, error) con error ('validation', mensaje) o
+    ('unexpected', (mensaje, traceback)), como los errores de generate_txt().
+    """
+    try:
+        return True, layout.format_values(dict(zip(layout.field_names, row)))
+    except ValidationError as e:
+        return False, ('validation', str(e))
+    except Exception as e:
+        return False, ('unexpected', (str(e), traceback.format_exc()))
+
+
+def init_worker(specs, separator):
+    """Inicializa un proceso hijo: compila el diseño de línea (con memoria de conversiones)"""
+    global _worker_layout
+    _worker_layout = sicore_layout.compile_layout(specs, separator).memoized()
+
+
+def _format_chunk(rows):
+    return [format_row(_worker_layout, row) for row in rows]
+
+
+def can_send_specs(specs):
+    """Las especificaciones viajan a los hijos por pickle (ej: una 'validation' lambda no puede)"""
+    try:
+        pickle.dumps(specs)
+    except Exception:
+        return False
+    return True
+
+
+class SicoreFormatPool(object):
+    """
+    Pool de procesos para formatear filas con un diseño de línea.
+
+    Uso:
+        with SicoreFormatPool(specs, separator, workers, layout) as pool:
+            for ok, result in pool.format_rows(rows):
+                ...
+
+    Si el pool falla (ej: un proceso hijo no pudo arrancar), las filas se formatean
+    en este proceso con layout, que debe ser el diseño compilado de specs: el
+    resultado es el mismo, solo cambia el tiempo.
+    """
+
+    def __init__(self, specs, separator, workers, layout, chunk_size=FORMAT_CHUNK_SIZE):
+        self.layout = layout
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=runpy.run_path,
+            initargs=(WORKER_BOOTSTRAP, {
+                'addons_paths': list(odoo.addons.__path__),
+                'pool_module': __name__,
+                'specs': specs,
+                'separator': separator,
+            }),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def format_rows(self, rows):
+        """Lista de resultados de format_row() para cada fila de rows, en el mismo orden"""
+        if self.executor is not None:
+            chunks = [rows[i:i + self.chunk_size] for i in range(0, len(rows), self.chunk_size)]
+            try:
+                return [result for results in self.executor.map(_format_chunk, chunks) for result in results]
+            except Exception:
+                # format_row() no propaga errores: toda excepción aquí es del pool
+                _logger.warning("[SICORE] Pool de formateo no disponible, se formatea en este proceso", exc_info=True)
+                self.close()
+        return [format_row(self.layout, row) for row in rows]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+Arranque de un proceso hijo del pool de formateo (ver sicore_format_pool).
+
+No es un módulo importable: cada proceso hijo lo ejecuta con runpy.run_path(),
+que define addons_paths, pool_module, specs y separator. Un proceso 'spawn' no
+conoce las rutas de addons de la configuración de Odoo: se agregan a odoo.addons
+antes de importar el módulo del pool.
+"""
+
+import importlib
+
+import odoo.addons  # type: ignore
+
+for addons_path in addons_paths:  # noqa: F821
+    if addons_path not in odoo.addons.__path__:
+        odoo.addons.__path__.append(addons_path)
+
+importlib.import_module(pool_module).init_worker(specs, separator)  # noqa: F821
@@ -0,0 +1,515 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de diseño de línea SICORE compilado
+
+Convierte la especificación de campos de un generador (_get_field_specs) en un
+plan inmutable: una lista ordenada de formateadores especializados con anchos,
+caracteres de relleno y separador precalculados.
+
+El plan no guarda referencias al entorno ORM (env, cursor, registros), por lo que
+puede cachearse por registro con ormcache y reutilizarse en todas las líneas.
+"""
+
+import copy
+import re
+import unicodedata
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from functools import partial
+
+from odoo import fields, _  # type: ignore
+from odoo.exceptions import ValidationError  # type: ignore
+
+# Expresiones precompiladas (se usan en cada línea exportada)
+NON_DIGITS_RE = re.compile(r'[^0-9]')
+SICORE_TEXT_RE = re.compile(r'[^A-Z0-9 \-\.]')
+
+# Bytes ASCII que SICORE no admite en textos: se eliminan con bytes.translate(),
+# equivalente a SICORE_TEXT_RE sobre el texto ya en mayúsculas
+SICORE_TEXT_DELETE = bytes(c for c in range(128) if SICORE_TEXT_RE.match(chr(c)))
+
+# Pesos para el dígito verificador del CUIT
+CUIT_WEIGHTS = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+
+# Tipos de campo cuya conversión se memoriza durante una exportación (fechas,
+# razones sociales, CUITs y códigos se repiten en muchas líneas)
+MEMOIZED_TYPES = ('text', 'date', 'cuit')
+
+# Valores distintos recordados por campo (al llenarse la memoria se vacía)
+FORMAT_MEMO_MAX_SIZE = 4096
+
+
+# ============================================================
+# PRIMITIVAS DE FORMATEO (sin ORM)
+# ============================================================
+
+def clean_digits(value):
+    """Deja solo los dígitos de un valor (CUIT, número de comprobante, etc.)"""
+    if not value:
+        return ''
+    if value.__class__ is str and value.isascii() and value.isdigit():
+        return value
+    return NON_DIGITS_RE.sub('', str(value))
+
+
+def validate_cuit(cuit):
+    """
+    Valida CUIT argentino con dígito verificador
+    Retorna CUIT limpio (solo números) o lanza ValidationError
+    """
+    if not cuit:
+        raise ValidationError(_("CUIT es requerido"))
+
+    cuit_clean = clean_digits(cuit)
+
+    if len(cuit_clean) != 11:
+        raise ValidationError(_("CUIT debe tener 11 dígitos. CUIT: %s") % cuit)
+
+    if cuit_check_digit(cuit_clean) != int(cuit_clean[10]):
+        raise ValidationError(_("CUIT inválido (dígito verificador incorrecto). CUIT: %s") % cuit)
+
+    return cuit_clean
+
+
+def cuit_check_digit(cuit_clean):
+    """Dígito verificador de los primeros 10 dígitos de un CUIT limpio"""
+    aux = 11 - (sum(int(cuit_clean[i]) * CUIT_WEIGHTS[i] for i in range(10)) % 11)
+    if aux == 11:
+        return 0
+    if aux == 10:
+        return 9
+    return aux
+
+
+def normalize_cuit(vat):
+    """
+    CUIT/documento normalizado como se exporta: solo dígitos, con ceros a la
+    izquierda hasta 11. Retorna '' si el valor no tiene dígitos.
+    """
+    cuit_clean = clean_digits(vat)
+    return cuit_clean.zfill(11) if cuit_clean else ''
+
+
+def is_valid_cuit(cuit):
+    """Indica si el valor es un CUIT de 11 dígitos con dígito verificador correcto (sin excepciones)"""
+    cuit_clean = clean_digits(cuit)
+    return len(cuit_clean) == 11 and cuit_check_digit(cuit_clean) == int(cuit_clean[10])
+
+
+def sanitize_text(text, max_length=None):
+    """
+    Sanitiza texto para SICORE:
+    - Quita acentos
+    - Convierte a mayúsculas
+    - Elimina caracteres especiales
+    - Trunca si excede max_length
+    """
+    if not text:
+        return ''
+
+    # Quitar acentos (un texto ASCII no cambia al normalizar)
+    text = str(text)
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+
+    # Mayúsculas y solo alfanuméricos, espacios, guiones y puntos
+    text = text.encode('ASCII', 'ignore').upper().translate(None, SICORE_TEXT_DELETE).decode('ASCII')
+
+    if max_length and len(text) > max_length:
+        text = text[:max_length]
+
+    return text
+
+
+def format_date(date_value, date_format='DD/MM/YYYY'):
+    """
+    Formatea fecha según formato SICORE
+    date_format: 'DD/MM/YYYY', 'DDMMYYYY', etc.
+    """
+    if not date_value:
+        return ''
+
+    if isinstance(date_value, str):
+        # Ya es string, intentar parsear
+        try:
+            date_value = fields.Date.from_string(date_value)
+        except Exception:
+            return date_value
+
+    if date_format == 'DD/MM/YYYY':
+        return date_value.strftime('%d/%m/%Y')
+    elif date_format == 'DDMMYYYY':
+        return date_value.strftime('%d%m%Y')
+    elif date_format == 'YYYY-MM-DD':
+        return date_value.strftime('%Y-%m-%d')
+    else:
+        return date_value.strftime(date_format.replace('DD', '%d').replace('MM', '%m').replace('YYYY', '%Y'))
+
+
+def format_decimal(value, decimals=2, remove_separator=True):
+    """
+    Formatea decimal para SICORE
+    - decimals: cantidad de decimales
+    - remove_separator: si True, retorna entero sin punto (ej: 1234 para 12.34),
+      si False usa coma como separador decimal (formato SICORE estándar)
+    """
+    if value is None or value == '':
+        value = 0
+
+    try:
+        value = float(value)
+    except Exception:
+        raise ValidationError(_("Valor decimal inválido: %s") % value)
+
+    if remove_separator:
+        return str(int(round(value * (10 ** decimals))))
+    return f"{value:.{decimals}f}".replace('.', ',')
+
+
+def to_cents(value, decimals=2):
+    """
+    Convierte un importe (float, Decimal, texto o None) a entero en la unidad
+    mínima (centavos con decimals=2). Los generadores extraen así los importes
+    una sola vez y desde ahí se formatean y suman como enteros, sin redondeos.
+    """
+    if not value:
+        return 0
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValidationError(_("Valor decimal inválido: %s") % value)
+    # round(value, decimals) redondea el valor exacto (como el formato '.2f'); luego el producto es exacto
+    return round(round(value, decimals) * 10 ** decimals)
+
+
+def as_cents(value):
+    """Importe ya extraído en centavos (int); otros números se convierten y el resto es 0"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, (float, Decimal)):
+        return to_cents(value)
+    return 0
+
+
+def format_cents(value, decimals=2):
+    """
+    Formatea un importe en centavos (int) con coma decimal: 123456 -> '1234,56'.
+    Otros valores (float, Decimal, texto) se convierten antes con to_cents().
+    """
+    if value.__class__ is not int:
+        value = to_cents(value, decimals)
+    if not decimals:
+        return str(value)
+    digits = str(value)
+    if value >= 0 and len(digits) > decimals:
+        # Caso habitual: insertar la coma en los dígitos del entero
+        return digits[:-decimals] + ',' + digits[-decimals:]
+    units, fraction = divmod(abs(value), 10 ** decimals)
+    return f"{'-' if value < 0 else ''}{units},{fraction:0{decimals}d}"
+
+
+def format_integer(value):
+    """Formatea entero"""
+    if value is None or value == '':
+        value = 0
+
+    try:
+        return str(int(value))
+    except Exception:
+        raise ValidationError(_("Valor entero inválido: %s") % value)
+
+
+def format_raw(value):
+    """Formateo para tipos no reconocidos: conversión directa a texto"""
+    return str(value) if value is not None else ''
+
+
+def get_type_formatter(spec):
+    """Retorna el formateador especializado para el 'type' de una especificación"""
+    field_type = spec.get('type', 'text')
+    if field_type == 'integer':
+        return format_integer
+    if field_type in ('decimal', 'decimal_comma'):
+        # Ambos tipos usan coma por defecto (formato SICORE estándar); el valor va en centavos
+        return partial(format_cents, decimals=spec.get('decimals', 2))
+    if field_type == 'date':
+        return partial(format_date, date_format=spec.get('format', 'DD/MM/YYYY'))
+    if field_type == 'text':
+        return partial(sanitize_text, max_length=spec.get('length'))
+    if field_type == 'cuit':
+        return validate_cuit
+    return format_raw
+
+
+# ============================================================
+# PRIMITIVAS DE LECTURA (texto del archivo -> valor)
+# ============================================================
+
+def parse_integer(text):
+    """Entero de un campo numérico ('' es 0)"""
+    return int(text) if text else 0
+
+
+def parse_cents(text, decimals=2):
+    """Importe con coma (o punto) decimal a centavos (int), sin pasar por float ('' es 0)"""
+    if not text:
+        return 0
+    if ',' in text:
+        text = text.replace('.', '').replace(',', '.')
+    try:
+        return round(Decimal(text).scaleb(decimals))
+    except InvalidOperation:
+        raise ValueError(_("Importe inválido: %s") % text)
+
+
+def parse_date(text, date_format='DD/MM/YYYY'):
+    """Fecha según formato SICORE ('' o solo ceros es None)"""
+    if not text.strip('0/-'):
+        return None
+    return datetime.strptime(
+        text, date_format.replace('DD', '%d').replace('MM', '%m').replace('YYYY', '%Y')
+    ).date()
+
+
+def parse_cuit(text):
+    """CUIT de 11 dígitos"""
+    cuit = clean_digits(text)
+    if len(cuit) != 11:
+        raise ValueError(_("CUIT debe tener 11 dígitos. CUIT: %s") % text)
+    return cuit
+
+
+def get_type_parser(spec):
+    """Retorna la función de lectura para el 'type' de una especificación"""
+    field_type = spec.get('type', 'text')
+    if field_type == 'integer':
+        return parse_integer
+    if field_type in ('decimal', 'decimal_comma'):
+        return partial(parse_cents, decimals=spec.get('decimals', 2))
+    if field_type == 'date':
+        return partial(parse_date, date_format=spec.get('format', 'DD/MM/YYYY'))
+    if field_type == 'cuit':
+        return parse_cuit
+    return str
+
+
+# ============================================================
+# MEMORIA DE CONVERSIONES (por exportación)
+# ============================================================
+
+class MemoizedConverter(object):
+    """
+    Conversión de un campo que recuerda sus resultados (hasta max_size valores
+    distintos). Los valores que fallan no se recuerdan: se vuelve a lanzar el error.
+    """
+    __slots__ = ('convert', 'cache', 'max_size')
+
+    def __init__(self, convert, max_size=FORMAT_MEMO_MAX_SIZE):
+        self.convert = convert
+        self.cache = {}
+        self.max_size = max_size
+
+    def __call__(self, value):
+        # La clase es parte de la clave: 1, 1.0 y True son iguales como claves de dict
+        key = value if value.__class__ is str else (value.__class__, value)
+        try:
+            return self.cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return self.convert(value)
+        result = self.convert(value)
+        if len(self.cache) >= self.max_size:
+            self.cache.clear()
+        self.cache[key] = result
+        return result
+
+
+# ============================================================
+# PLAN COMPILADO
+# ============================================================
+
+class SicoreFieldFormatter(object):
+    """
+    Formateador de un campo con todo precalculado: conversión por tipo,
+    validación, ancho, relleno y alineación.
+    """
+    __slots__ = ('name', 'required', 'convert', 'parse', 'memoizable', 'validation', 'width', 'fill_char', 'align_left')
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.required = bool(spec.get('required'))
+        self.convert = get_type_formatter(spec)
+        self.memoizable = spec.get('type', 'text') in MEMOIZED_TYPES
+        self.parse = get_type_parser(spec)
+        self.validation = spec.get('validation')
+        # Sin 'length' no hay truncado ni relleno (ej: formato CSV de combustibles)
+        self.width = spec.get('length')
+        self.fill_char = spec.get('fill_char', ' ')
+        self.align_left = spec.get('padding', 'right') == 'left'
+
+    def __call__(self, value):
+        if self.required and not value and value != 0:
+            raise ValidationError(_("Campo '%s' es requerido") % self.name)
+
+        try:
+            value = self.convert(value)
+        except ValidationError:
+            raise
+        except Exception as e:
+            raise ValidationError(_("Error formateando campo '%s': %s") % (self.name, str(e)))
+
+        if self.validation is not None and not self.validation(value):
+            raise ValidationError(_("Validación falló para campo '%s'") % self.name)
+
+        width = self.width
+        if width is None:
+            return value
+        if len(value) > width:
+            return value[:width]
+        if self.align_left:
+            return value.rjust(width, self.fill_char)
+        return value.ljust(width, self.fill_char)
+
+
+class SicoreLineLayout(object):
+    """
+    Plan compilado de una línea SICORE: formateadores en orden de salida,
+    separador y ancho total (None para formatos de ancho variable).
+    """
+    __slots__ = ('formatters', 'separator', 'width', 'slices')
+
+    def __init__(self, formatters, separator, width=None):
+        self.formatters = tuple(formatters)
+        self.separator = separator
+        self.width = width
+        # Posiciones (inicio, fin) de cada campo en las líneas de ancho fijo
+        self.slices = ()
+        if width is not None:
+            start = 0
+            slices = []
+            for formatter in self.formatters:
+                slices.append((start, start + formatter.width))
+                start += formatter.width
+            self.slices = tuple(slices)
+
+    @property
+    def field_names(self):
+        return tuple(formatter.name for formatter in self.formatters)
+
+    def memoized(self, max_size=FORMAT_MEMO_MAX_SIZE):
+        """
+        Copia del plan cuyos campos de texto, fecha y CUIT recuerdan sus conversiones.
+        Es para una sola exportación: el plan compartido (ormcache) no se modifica.
+        """
+        formatters = []
+        for formatter in self.formatters:
+            if formatter.memoizable:
+                formatter = copy.copy(formatter)
+                formatter.convert = MemoizedConverter(formatter.convert, max_size)
+            formatters.append(formatter)
+        return SicoreLineLayout(formatters, self.separator, self.width)
+
+    def clear_memo(self):
+        """Vacía la memoria de conversiones de un plan creado con memoized()"""
+        for formatter in self.formatters:
+            if isinstance(formatter.convert, MemoizedConverter):
+                formatter.convert.cache.clear()
+
+    def format_values(self, values):
+        """
+        Formatea un diccionario de valores según el plan.
+        Acumula los errores de todos los campos y los lanza juntos.
+        """
+        parts = []
+        errors = []
+        get = values.get
+        for formatter in self.formatters:
+            try:
+                parts.append(formatter(get(formatter.name)))
+            except ValidationError as e:
+                errors.append(str(e))
+
+        if errors:
+            raise ValidationError(_("Errores en registro:\n%s") % '\n'.join(errors))
+
+        return self.separator.join(parts)
+
+    def split_line(self, line):
+        """
+        Separa una línea del archivo en el texto de cada campo (sin convertir),
+        por separador o por las posiciones de ancho fijo
+        """
+        if self.separator:
+            return line.split(self.separator)
+        return [line[start:end] for start, end in self.slices]
+
+    def parse_line(self, line):
+        """
+        Lee una línea del archivo: retorna (valores, errores) con los valores
+        tipados de cada campo y los mensajes de los campos que no se pudieron leer
+        (incluida la línea completa si no tiene el ancho o la cantidad de campos esperados).
+        """
+        if self.separator:
+            parts = line.split(self.separator)
+            if len(parts) != len(self.formatters):
+                return {}, [_("Se esperaban %s campos y la línea tiene %s") % (len(self.formatters), len(parts))]
+        else:
+            if len(line) != self.width:
+                return {}, [_("Se esperaban %s caracteres y la línea tiene %s") % (self.width, len(line))]
+            parts = [line[start:end] for start, end in self.slices]
+
+        values = {}
+        errors = []
+        for formatter, text in zip(self.formatters, parts):
+            text = text.strip()
+            if formatter.required and not text:
+                errors.append(_("Campo '%s' es requerido") % formatter.name)
+                continue
+            try:
+                values[formatter.name] = formatter.parse(text)
+            except ValueError as e:
+                errors.append(_("Campo '%s' inválido ('%s'): %s") % (formatter.name, text, e))
+        return values, errors
+
+
+def check_positions(specs):
+    """
+    Verifica que las posiciones declaradas sean contiguas, empiecen en 1 y
+    coincidan con 'length'. Retorna el ancho total de la línea.
+    """
+    expected_start = 1
+    for field_name, spec in specs.items():
+        if 'position' not in spec:
+            raise ValidationError(
+                _("Especificación SICORE inválida: el campo '%s' no declara 'position' "
+                  "y el resto de los campos sí.") % field_name
+            )
+        start, end = spec['position']
+        length = spec.get('length')
+        if start != expected_start:
+            raise ValidationError(
+                _("Especificación SICORE inválida: el campo '%s' empieza en la posición %s "
+                  "pero se esperaba %s.") % (field_name, start, expected_start)
+            )
+        if length != end - start + 1:
+            raise ValidationError(
+                _("Especificación SICORE inválida: el campo '%s' ocupa las posiciones %s-%s "
+                  "(%s caracteres) pero declara length=%s.") % (field_name, start, end, end - start + 1, length)
+            )
+        expected_start = end + 1
+    return expected_start - 1
+
+
+def compile_layout(specs, separator=''):
+    """
+    Compila la especificación de campos en un SicoreLineLayout.
+    Si algún campo declara 'position', se validan las posiciones de todos.
+    """
+    width = None
+    if any('position' in spec for spec in specs.values()):
+        width = check_positions(specs)
+    formatters = [SicoreFieldFormatter(name, spec) for name, spec in specs.items()]
+    return SicoreLineLayout(formatters, separator, width)
+
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura de archivos SICORE (propios, de otros sistemas o devueltos por AFIP)
+según el mismo diseño de línea con el que se exportan.
+
+Los archivos en disco se mapean en memoria (mmap) y se recorren línea por
+línea; los registros tipados se generan de a uno, sin cargar el archivo completo.
+Las líneas mal formadas se informan con su número de línea y la lectura continúa.
+"""
+
+import io
+import logging
+import mmap
+import os
+
+from odoo import _  # type: ignore
+
+_logger = logging.getLogger(__name__)
+
+# Errores guardados por lectura (los siguientes solo se cuentan)
+READER_MAX_ERRORS = 1000
+
+
+def _map_file(binary_file):
+    """mmap de solo lectura de un archivo en disco, o None si no es posible (gzip, memoria, vacío)"""
+    if not isinstance(binary_file, (io.BufferedReader, io.BufferedRandom, io.FileIO)):
+        return None
+    try:
+        fileno = binary_file.fileno()
+        if not os.fstat(fileno).st_size:
+            return None
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        return None
+
+
+def iter_file_lines(binary_file, encoding='utf-8'):
+    """
+    Genera (número de línea, texto) de un archivo binario abierto, sin fin de
+    línea y omitiendo líneas vacías. Los archivos en disco se leen con mmap;
+    el resto (ej: adjuntos comprimidos con gzip) se lee en forma secuencial.
+    """
+    mapped = _map_file(binary_file)
+    source = iter(mapped.readline, b'') if mapped is not None else binary_file
+    try:
+        for line_number, raw_line in enumerate(source, 1):
+            line = raw_line.rstrip(b'\r\n')
+            if line:
+                yield line_number, line.decode(encoding, 'replace')
+    finally:
+        if mapped is not None:
+            mapped.close()
+
+
+class SicoreFileReader(object):
+    """
+    Lector de archivos SICORE con un diseño de línea (SicoreLineLayout).
+
+    Uso:
+        reader = SicoreFileReader(layout)
+        for line_number, values in reader.read(binary_file):
+            ...
+        reader.errors  # [(número de línea, mensaje), ...]
+    """
+
+    def __init__(self, layout, encoding='utf-8', max_errors=READER_MAX_ERRORS):
+        self.layout = layout
+        self.encoding = encoding
+        self.max_errors = max_errors
+        self.errors = []
+        self.error_count = 0
+        self.line_count = 0
+
+    def _add_error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line_number, message))
+
+    def read(self, binary_file):
+        """Genera (número de línea, valores tipados) de cada línea bien formada"""
+        parse_line = self.layout.parse_line
+        for line_number, line in iter_file_lines(binary_file, self.encoding):
+            self.line_count += 1
+            values, errors = parse_line(line)
+            if errors:
+                self._add_error(line_number, '\n'.join(errors))
+                continue
+            yield line_number, values
+        if self.error_count:
+            _logger.info("[SICORE] Lectura de archivo: %s de %s líneas mal formadas", self.error_count, self.line_count)
+
+    def get_errors_text(self):
+        """Errores de la lectura como texto, uno por línea del archivo"""
+        lines = [_("Línea %s: %s") % (line_number, message) for line_number, message in self.errors]
+        if self.error_count > len(self.errors):
+            lines.append(_("... y %s líneas mal formadas más") % (self.error_count - len(self.errors)))
+        return '\n'.join(lines)
@@ -2,6 +2,8 @@
 
 from odoo import models, fields, api  # type: ignore
 
+from .generators.sicore_layout import clean_digits, is_valid_cuit, normalize_cuit
+
 
 class ResPartner(models.Model):
     _inherit = 'res.partner'
@@ -27,12 +29,37 @@ class ResPartner(models.Model):
         help='Tipo de documento para SICORE, mapeado automáticamente desde tipo de identificación argentina'
     )
     
+    # CUIT normalizado y su validez: se recalculan solo al cambiar el CUIT y los
+    # leen directamente las exportaciones, la validación previa y las búsquedas
+    sicore_cuit = fields.Char(
+        string='CUIT SICORE',
+        compute='_compute_sicore_cuit',
+        store=True,
+        index=True,
+        help='CUIT/documento normalizado como se exporta: solo dígitos, 11 posiciones con ceros a la izquierda'
+    )
+    
+    sicore_cuit_valid = fields.Boolean(
+        string='CUIT Válido',
+        compute='_compute_sicore_cuit',
+        store=True,
+        index=True,
+        help='El CUIT tiene 11 dígitos y dígito verificador correcto'
+    )
+    
     @api.depends('sicore_regime')
     def _compute_is_simplified_regime(self):
         """Determina si es régimen simplificado según selección"""
         for partner in self:
             partner.is_simplified_regime = (partner.sicore_regime == 'simplified')
     
+    @api.depends('vat')
+    def _compute_sicore_cuit(self):
+        """Normaliza el CUIT y valida su dígito verificador"""
+        for partner in self:
+            partner.sicore_cuit = normalize_cuit(partner.vat) or False
+            partner.sicore_cuit_valid = is_valid_cuit(partner.vat)
+    
     @api.depends('l10n_latam_identification_type_id')
     def _compute_sicore_document_type(self):
         """Mapea automáticamente el tipo de documento argentino a SICORE"""
@@ -46,3 +73,25 @@ class ResPartner(models.Model):
                 ], limit=1)
             
             partner.sicore_document_type_id = sicore_type
+    
+    @api.model
+    def name_search(self, name='', domain=None, operator='ilike', limit=100):
+        """
+        Un CUIT completo (con o sin guiones) se busca por igualdad sobre el índice
+        de sicore_cuit; el resto de las búsquedas siguen el camino estándar
+        """
+        if name and operator in ('ilike', '=', '=ilike') and len(clean_digits(name)) == 11 \
+                and not name.strip(' -.0123456789'):
+            partners = self.search([('sicore_cuit', '=', normalize_cuit(name))] + list(domain or []), limit=limit)
+            if partners:
+                return [(partner.id, partner.display_name) for partner in partners]
+        return super().name_search(name, domain, operator, limit)
+    
+    def write(self, vals):
+        res = super().write(vals)
+        if {'sicore_regime', 'vat', 'name'} & set(vals):
+            # La vista previa filtra por régimen, cuenta los CUITs inválidos y muestra
+            # el nombre de los partners; los partners compartidos afectan a todas las empresas
+            company_ids = None if any(not partner.company_id for partner in self) else self.mapped('company_id').ids
+            self.env['sicore.preview.cache'].sudo()._invalidate_previews(company_ids)
+        return res
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+from dateutil.relativedelta import relativedelta  # type: ignore
+
+from odoo import models, fields, api, _  # type: ignore
+from odoo.exceptions import UserError, ValidationError  # type: ignore
+
+
+class SicoreExportBatch(models.Model):
+    """
+    Lote de exportaciones SICORE: varias empresas, tipos y períodos en una sola
+    ejecución. Cada combinación genera su propio sicore.export.log en cola; los
+    trabajos programados de exportación las procesan a la vez, una por trabajo y
+    cada una con su propio cursor (ver EXPORT_JOB_CRONS en sicore_export_log).
+    """
+    _name = 'sicore.export.batch'
+    _description = 'Lote de Exportaciones SICORE'
+    _inherit = ['mail.thread']
+    _order = 'create_date desc'
+
+    name = fields.Char(
+        string='Referencia',
+        required=True,
+        default=lambda self: _("Lote %s") % fields.Date.today()
+    )
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='Usuario',
+        required=True,
+        default=lambda self: self.env.user
+    )
+
+    company_ids = fields.Many2many(
+        'res.company',
+        string='Empresas',
+        required=True,
+        default=lambda self: self.env.company
+    )
+
+    export_retention = fields.Boolean(string='Retenciones', default=True)
+
+    export_perception = fields.Boolean(string='Percepciones', default=True)
+
+    export_fuel = fields.Boolean(string='Combustibles', default=False)
+
+    date_from = fields.Date(
+        string='Fecha Desde',
+        required=True,
+        default=lambda self: fields.Date.today().replace(day=1) - relativedelta(months=1)
+    )
+
+    date_to = fields.Date(
+        string='Fecha Hasta',
+        required=True,
+        default=lambda self: fields.Date.today().replace(day=1) - relativedelta(days=1)
+    )
+
+    split_by_month = fields.Boolean(
+        string='Un Archivo por Mes',
+        default=True,
+        help='Divide el rango de fechas en meses calendario y genera un archivo por mes'
+    )
+
+    state = fields.Selection([
+        ('draft', 'Borrador'),
+        ('running', 'En Proceso'),
+        ('done', 'Finalizado'),
+    ], string='Estado', default='draft', required=True, tracking=True)
+
+    log_ids = fields.One2many(
+        'sicore.export.log',
+        'batch_id',
+        string='Exportaciones'
+    )
+
+    log_count = fields.Integer(
+        string='Cantidad de Exportaciones',
+        compute='_compute_summary'
+    )
+
+    summary = fields.Text(
+        string='Resumen',
+        compute='_compute_summary'
+    )
+
+    notes = fields.Text(
+        string='Notas',
+        help='Combinaciones omitidas por no tener registros'
+    )
+
+    @api.depends('log_ids.state', 'log_ids.records_count', 'log_ids.total_retention_amount')
+    def _compute_summary(self):
+        """Resumen de una línea por archivo generado"""
+        for batch in self:
+            batch.log_count = len(batch.log_ids)
+            state_names = dict(self.env['sicore.export.log']._fields['state'].selection)
+            type_names = dict(self.env['sicore.export.log']._fields['export_type'].selection)
+            batch.summary = '\n'.join(
+                f"{log.company_id.name} - {type_names.get(log.export_type)} - {log.date_from} a {log.date_to}: "
+                f"{state_names.get(log.state)}, {log.records_count} registros, "
+                f"total {log.total_retention_amount:,.2f}"
+                for log in batch.log_ids.sorted(lambda l: (l.company_id.name or '', l.export_type, l.date_from or fields.Date.today()))
+            )
+
+    @api.constrains('date_from', 'date_to')
+    def _check_dates(self):
+        for batch in self:
+            if batch.date_from > batch.date_to:
+                raise ValidationError(_("La fecha 'Desde' no puede ser mayor a la fecha 'Hasta'"))
+
+    def _get_export_types(self):
+        """Tipos de exportación seleccionados en el lote"""
+        self.ensure_one()
+        return [
+            export_type for export_type, selected in (
+                ('retention', self.export_retention),
+                ('perception', self.export_perception),
+                ('fuel', self.export_fuel),
+            ) if selected
+        ]
+
+    def _get_periods(self):
+        """Lista de (desde, hasta): el rango completo o un período por mes calendario"""
+        self.ensure_one()
+        if not self.split_by_month:
+            return [(self.date_from, self.date_to)]
+        periods = []
+        start = self.date_from
+        while start <= self.date_to:
+            end = min(start + relativedelta(day=31), self.date_to)
+            periods.append((start, end))
+            start = end + relativedelta(days=1)
+        return periods
+
+    def action_run(self):
+        """
+        Crea una exportación en cola por empresa, tipo y período (con los valores por
+        defecto del wizard para cada tipo) y dispara el trabajo programado
+        """
+        self.ensure_one()
+        if self.state != 'draft':
+            raise UserError(_("El lote ya fue ejecutado"))
+        export_types = self._get_export_types()
+        if not export_types:
+            raise UserError(_("Seleccione al menos un tipo de exportación"))
+
+        skipped = []
+        for company in self.company_ids:
+            Wizard = self.env['sicore.export.wizard'].with_company(company)
+            Log = self.env['sicore.export.log'].with_company(company)
+            for export_type in export_types:
+                for date_from, date_to in self._get_periods():
+                    wizard = Wizard.create({
+                        'export_type': export_type,
+                        'company_id': company.id,
+                        'date_from': date_from,
+                        'date_to': date_to,
+                    })
+                    wizard._onchange_export_type()
+                    if not wizard.records_count:
+                        skipped.append(
+                            f"{company.name} - {dict(wizard._fields['export_type'].selection)[export_type]} - "
+                            f"{date_from} a {date_to}: sin registros"
+                        )
+                        continue
+                    Log.create(dict(
+                        wizard._prepare_export_log_vals(),
+                        state='queued',
+                        export_params=wizard._get_export_params(),
+                        batch_id=self.id,
+                    ))
+
+        self.write({
+            'state': 'running' if self.log_ids else 'done',
+            'notes': '\n'.join(skipped) if skipped else False,
+        })
+        if self.log_ids:
+            self.env['sicore.export.log']._trigger_export_jobs()
+        return True
+
+    def action_view_logs(self):
+        """Abre las exportaciones del lote"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _("Exportaciones del Lote"),
+            'res_model': 'sicore.export.log',
+            'view_mode': 'list,form',
+            'domain': [('batch_id', '=', self.id)],
+            'context': {'create': False},
+        }
+
+    def _check_batch_done(self):
+        """Cierra los lotes cuyas exportaciones terminaron y notifica el resumen"""
+        for batch in self.filtered(lambda b: b.state == 'running'):
+            if any(log.state in ('queued', 'running') for log in batch.log_ids):
+                continue
+            batch.state = 'done'
+            batch.message_post(
+                body=_("Lote finalizado:\n%s") % batch.summary,
+                partner_ids=batch.user_id.partner_id.ids,
+                message_type='notification',
+            )
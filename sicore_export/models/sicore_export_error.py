@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api  # type: ignore
+from odoo.tools import SQL, split_every  # type: ignore
+
+# Categorías de error (las de la validación previa y las del formateo por registro)
+ERROR_CATEGORIES = [
+    ('partner', 'Partner Faltante'),
+    ('vat', 'CUIT Faltante'),
+    ('document_type', 'Tipo de Documento Faltante'),
+    ('tax_code', 'Códigos SICORE de Impuestos'),
+    ('move', 'Asiento sin Retenciones/Pago'),
+    ('company', 'CUIT de la Empresa'),
+    ('account', 'Cuenta no Configurada'),
+    ('validation', 'Validación de Campos'),
+    ('unexpected', 'Error Inesperado'),
+]
+
+# Errores por sentencia INSERT
+CREATE_BATCH_SIZE = 1000
+
+
+class SicoreExportError(models.Model):
+    """
+    Error de una exportación SICORE: un registro por apunte que no se pudo exportar.
+    Reemplaza el texto con todos los errores en el log por registros filtrables
+    y agrupables por categoría, partner o mensaje.
+    """
+    _name = 'sicore.export.error'
+    _description = 'Error de Exportación SICORE'
+    _order = 'log_id desc, id'
+    _rec_name = 'message'
+
+    log_id = fields.Many2one(
+        'sicore.export.log',
+        string='Exportación',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    export_type = fields.Selection(related='log_id.export_type', string='Tipo de Exportación')
+
+    company_id = fields.Many2one(related='log_id.company_id', string='Empresa')
+
+    category = fields.Selection(
+        ERROR_CATEGORIES,
+        string='Categoría',
+        required=True,
+        index=True
+    )
+
+    res_model = fields.Char(string='Modelo', required=True)
+
+    res_id = fields.Many2oneReference(
+        string='ID de Registro',
+        model_field='res_model'
+    )
+
+    partner_id = fields.Many2one(
+        'res.partner',
+        string='Partner',
+        index=True,
+        ondelete='set null'
+    )
+
+    message = fields.Text(string='Mensaje', required=True)
+
+    @api.model
+    def _create_errors(self, log, error_records):
+        """
+        Crea en bloque (sentencias INSERT de CREATE_BATCH_SIZE filas) los errores de la exportación log.
+        error_records: diccionarios de _get_error_record() de los generadores
+        """
+        if not error_records:
+            return
+        uid = self.env.uid
+        for batch in split_every(CREATE_BATCH_SIZE, error_records):
+            self.env.cr.execute(SQL(
+                """
+                INSERT INTO sicore_export_error
+                       (log_id, category, res_model, res_id, partner_id, message,
+                        create_uid, write_uid, create_date, write_date)
+                VALUES %s
+                """,
+                SQL(", ").join(
+                    SQL("(%s, %s, %s, %s, %s, %s, %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')",
+                        log.id, error['category'], error['res_model'], error['res_id'],
+                        error['partner_id'] or None, error['message'], uid, uid)
+                    for error in batch
+                ),
+            ))
+        self.invalidate_model()
+        log.invalidate_recordset(['error_ids'])
+
+    def action_open_record(self):
+        """Abre el registro (apunte contable) que originó el error"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self.res_model,
+            'res_id': self.res_id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields  # type: ignore
+from odoo.tools import SQL, split_every  # type: ignore
+
+# Fragmentos por sentencia INSERT
+STORE_BATCH_SIZE = 1000
+
+
+class SicoreExportLine(models.Model):
+    """
+    Caché de fragmentos: la línea TXT ya formateada de cada apunte por generador.
+
+    Cada fragmento guarda la clave con la que se generó (fecha de modificación del
+    apunte, asiento, partner, pago y los códigos SICORE resueltos, más los parámetros
+    de la exportación). En una re-exportación solo se vuelven a formatear los apuntes
+    cuya clave cambió; el resto se toma de la caché.
+    """
+    _name = 'sicore.export.line'
+    _description = 'Fragmento de Exportación SICORE'
+    _order = 'id'
+
+    generator = fields.Char(
+        string='Generador',
+        required=True,
+        index=True,
+        help='Modelo del generador que formateó la línea'
+    )
+
+    move_line_id = fields.Many2one(
+        'account.move.line',
+        string='Apunte Contable',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    cache_key = fields.Char(
+        string='Clave',
+        required=True,
+        help='Huella de los datos usados para formatear la línea'
+    )
+
+    content = fields.Text(string='Línea Formateada')
+
+    # Importes en centavos: columnas numeric sin decimales (enteros exactos, sin
+    # el límite de int4), tal como los suma la exportación
+    retention_cents = fields.Float(string='Importe Retenido/Percibido (centavos)', digits=(20, 0))
+
+    transaction_cents = fields.Float(string='Importe de la Transacción (centavos)', digits=(20, 0))
+
+    _sql_constraints = [
+        ('generator_line_unique', 'unique(generator, move_line_id)',
+         'Solo puede haber un fragmento por apunte y generador.')
+    ]
+
+    def _load_fragments(self, generator, move_line_ids):
+        """Retorna {move_line_id: (clave, línea, importe retenido, importe transacción)}, importes en centavos"""
+        if not move_line_ids:
+            return {}
+        self.env.cr.execute("""
+            SELECT move_line_id, cache_key, content, retention_cents::bigint, transaction_cents::bigint
+              FROM sicore_export_line
+             WHERE generator = %s AND move_line_id = ANY(%s)
+        """, [generator, list(move_line_ids)])
+        return {row[0]: row[1:] for row in self.env.cr.fetchall()}
+
+    def _store_fragments(self, generator, fragments, stale_line_ids=()):
+        """
+        Guarda (o reemplaza) los fragmentos recién formateados y elimina los de
+        stale_line_ids (apuntes que ya no generan una línea válida).
+        fragments: lista de (move_line_id, clave, línea, importe retenido, importe transacción),
+        importes en centavos
+        """
+        cr = self.env.cr
+        if stale_line_ids:
+            cr.execute(SQL(
+                "DELETE FROM sicore_export_line WHERE generator = %s AND move_line_id = ANY(%s)",
+                generator, list(stale_line_ids),
+            ))
+        uid = self.env.uid
+        for batch in split_every(STORE_BATCH_SIZE, fragments):
+            cr.execute(SQL(
+                """
+                INSERT INTO sicore_export_line
+                       (generator, move_line_id, cache_key, content, retention_cents, transaction_cents,
+                        create_uid, write_uid, create_date, write_date)
+                VALUES %s
+                ON CONFLICT (generator, move_line_id) DO UPDATE
+                   SET cache_key = EXCLUDED.cache_key,
+                       content = EXCLUDED.content,
+                       retention_cents = EXCLUDED.retention_cents,
+                       transaction_cents = EXCLUDED.transaction_cents,
+                       write_uid = EXCLUDED.write_uid,
+                       write_date = EXCLUDED.write_date
+                """,
+                SQL(", ").join(
+                    SQL("(%s, %s, %s, %s, %s, %s, %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')",
+                        generator, line_id, key, content, retention, transaction, uid, uid)
+                    for line_id, key, content, retention, transaction in batch
+                ),
+            ))
+        self.invalidate_model()
@@ -1,7 +1,52 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api  # type: ignore
-from odoo.tools import DEFAULT_SERVER_DATE_FORMAT  # type: ignore
+import gzip
+import hashlib
+import io
+import logging
+import shutil
+import tempfile
+import traceback
+from datetime import timedelta
+
+from odoo import models, fields, api, _  # type: ignore
+from odoo.tools import SQL  # type: ignore
+
+from .generators.export_stats import EXPORT_PHASES, ExportProfiler, ExportStats
+
+_logger = logging.getLogger(__name__)
+
+# Tamaño de bloque para leer y comprimir los archivos exportados
+FILE_CHUNK_SIZE = 1024 * 1024
+
+# Tipo MIME de los adjuntos de archivos exportados: ir.attachment solo indexa el
+# contenido de los tipos text/*, lo que duplicaría el archivo en memoria y en la base.
+# Las descargas desde el controlador se sirven igualmente como text/plain.
+FILE_MIMETYPE = 'application/octet-stream'
+
+# Días tras los cuales se comprimen con gzip los archivos de los logs (0 = nunca);
+# configurable con el parámetro del sistema sicore_export.compress_files_after_days
+COMPRESS_FILES_AFTER_DAYS = 0
+
+# Logs comprimidos por ejecución del trabajo programado
+COMPRESS_BATCH_SIZE = 100
+
+# Tamaño máximo del texto guardado en error_log (el detalle completo queda en sicore.export.error)
+ERROR_LOG_MAX_SIZE = 20000
+
+# Minutos sin avance tras los cuales una exportación 'En Proceso' se considera
+# abandonada (proceso terminado por límites de memoria/tiempo o reiniciado);
+# configurable con el parámetro del sistema sicore_export.export_job_timeout_minutes
+EXPORT_JOB_TIMEOUT_MINUTES = 120
+
+# Trabajos programados que procesan exportaciones en cola, cada uno con su propio
+# cursor: hasta uno por exportación corren a la vez (los desactivados no cuentan,
+# y el servidor ejecuta a lo sumo max_cron_threads trabajos programados a la vez)
+EXPORT_JOB_CRONS = (
+    'sicore_export.ir_cron_sicore_export_jobs',
+    'sicore_export.ir_cron_sicore_export_jobs_2',
+    'sicore_export.ir_cron_sicore_export_jobs_3',
+)
 
 
 class SicoreExportLog(models.Model):
@@ -88,7 +133,35 @@ class SicoreExportLog(models.Model):
         attachment=True
     )
     
+    file_hash = fields.Char(
+        string='Hash SHA-256',
+        index=True,
+        copy=False,
+        readonly=True,
+        help='Hash del contenido del TXT generado; las exportaciones idénticas comparten el archivo'
+    )
+    
+    file_source_id = fields.Many2one(
+        'sicore.export.log',
+        string='Archivo Reutilizado de',
+        index=True,
+        ondelete='set null',
+        copy=False,
+        readonly=True,
+        help='Exportación anterior de la misma empresa, tipo y período con idéntico contenido, '
+             'cuyo archivo se reutiliza en lugar de guardar una copia'
+    )
+    
+    file_compressed = fields.Boolean(
+        string='Archivo Comprimido',
+        copy=False,
+        readonly=True,
+        help='El archivo se guarda comprimido con gzip y se descomprime al descargarlo'
+    )
+    
     state = fields.Selection([
+        ('queued', 'En Cola'),
+        ('running', 'En Proceso'),
         ('success', 'Exitoso'),
         ('warning', 'Con Advertencias'),
         ('error', 'Error'),
@@ -96,7 +169,24 @@ class SicoreExportLog(models.Model):
     
     error_log = fields.Text(
         string='Errores/Advertencias',
-        help='Detalle de errores o advertencias durante la exportación'
+        help='Detalle de errores o advertencias durante la exportación (truncado si es muy extenso; '
+             'el detalle completo está en los errores de la exportación)'
+    )
+    
+    error_ids = fields.One2many(
+        'sicore.export.error',
+        'log_id',
+        string='Errores'
+    )
+    
+    error_count = fields.Integer(
+        string='Cantidad de Errores',
+        compute='_compute_error_summary'
+    )
+    
+    error_summary = fields.Text(
+        string='Errores por Categoría',
+        compute='_compute_error_summary'
     )
     
     # Filtros aplicados (para trazabilidad)
@@ -114,6 +204,79 @@ class SicoreExportLog(models.Model):
     
     notes = fields.Text(string='Notas')
     
+    # Exportación en segundo plano
+    export_params = fields.Json(
+        string='Parámetros de Exportación',
+        copy=False,
+        help='Valores del wizard usados para procesar la exportación en segundo plano'
+    )
+    
+    progress_processed = fields.Integer(
+        string='Registros Procesados',
+        default=0,
+        copy=False
+    )
+    
+    progress_total = fields.Integer(
+        string='Registros a Procesar',
+        default=0,
+        copy=False
+    )
+    
+    batch_id = fields.Many2one(
+        'sicore.export.batch',
+        string='Lote',
+        index=True,
+        ondelete='set null',
+        copy=False
+    )
+    
+    progress_percent = fields.Float(
+        string='Avance',
+        compute='_compute_progress_percent'
+    )
+    
+    # Rendimiento de la generación
+    perf_total_time = fields.Float(
+        string='Tiempo Total (s)',
+        digits=(16, 3),
+        copy=False,
+        readonly=True
+    )
+    
+    perf_query_count = fields.Integer(
+        string='Consultas SQL',
+        copy=False,
+        readonly=True
+    )
+    
+    perf_records_per_second = fields.Float(
+        string='Registros por Segundo',
+        digits=(16, 1),
+        copy=False,
+        readonly=True
+    )
+    
+    perf_phases = fields.Json(
+        string='Tiempos por Fase',
+        copy=False,
+        readonly=True,
+        help='Por fase: {"time": segundos, "queries": consultas SQL}'
+    )
+    
+    perf_summary = fields.Text(
+        string='Detalle por Fase',
+        compute='_compute_perf_summary'
+    )
+    
+    profile_attachment_id = fields.Many2one(
+        'ir.attachment',
+        string='Perfil (cProfile)',
+        copy=False,
+        readonly=True,
+        help='Estadísticas de cProfile de la generación, si se pidió perfilar la exportación'
+    )
+    
     @api.depends('export_type', 'create_date', 'company_id')
     def _compute_display_name(self):
         """Genera nombre descriptivo para el log"""
@@ -123,9 +286,9 @@ class SicoreExportLog(models.Model):
             date_str = fields.Datetime.to_string(record.create_date) if record.create_date else ''
             record.display_name = f"{type_name} - {date_str[:10] if date_str else 'Sin fecha'} - {record.company_id.name if record.company_id else ''}"
     
-    @api.depends('export_type', 'create_date', 'company_id')
+    @api.depends('export_type', 'create_date', 'company_id', 'file_compressed')
     def _compute_file_name(self):
-        """Genera nombre del archivo TXT con mismo formato que el wizard"""
+        """Genera nombre del archivo TXT con mismo formato que el wizard (.txt.gz si está comprimido)"""
         for record in self:
             if record.export_type and record.create_date:
                 # Mismo formato que en wizard: sicore_<tipo>_<fecha>.txt
@@ -135,12 +298,430 @@ class SicoreExportLog(models.Model):
                 record.file_name = f"sicore_{export_type_name}_{date_str}.txt"
             else:
                 record.file_name = 'sicore_export.txt'
+            if record.file_compressed:
+                record.file_name += '.gz'
+
+    @api.depends('progress_processed', 'progress_total')
+    def _compute_progress_percent(self):
+        for record in self:
+            if record.progress_total:
+                record.progress_percent = 100.0 * record.progress_processed / record.progress_total
+            else:
+                record.progress_percent = 0.0
+
+    @api.depends('error_ids')
+    def _compute_error_summary(self):
+        """Cantidad de errores y una línea por categoría, con una sola consulta agrupada"""
+        counts = {}
+        for log, category, count in self.env['sicore.export.error']._read_group(
+            [('log_id', 'in', self.ids)], ['log_id', 'category'], ['__count'],
+        ):
+            counts.setdefault(log.id, []).append((category, count))
+        category_names = dict(self.env['sicore.export.error']._fields['category'].selection)
+        for record in self:
+            by_category = sorted(counts.get(record.id, []), key=lambda item: -item[1])
+            record.error_count = sum(count for _category, count in by_category)
+            record.error_summary = '\n'.join(
+                f"{category_names.get(category, category)}: {count}" for category, count in by_category
+            ) or False
+
+    def _get_error_summary_message(self):
+        """Resumen corto de los errores para el chatter (sin el detalle)"""
+        self.ensure_one()
+        if not self.error_count:
+            return ''
+        return _("%s registros con errores (%s). Ver detalle en la pestaña Errores.") % (
+            self.error_count, self.error_summary.replace('\n', ', ')
+        )
+
+    def _store_export_errors(self, error_records, errors_log):
+        """
+        Crea en bloque los sicore.export.error de la exportación y guarda en error_log
+        el texto de errores acotado a ERROR_LOG_MAX_SIZE caracteres
+        """
+        self.ensure_one()
+        self.env['sicore.export.error']._create_errors(self, error_records)
+        if errors_log and len(errors_log) > ERROR_LOG_MAX_SIZE:
+            errors_log = errors_log[:ERROR_LOG_MAX_SIZE].rsplit('\n', 1)[0] + '\n' + _(
+                "... texto truncado, %s registros con errores en total (ver pestaña Errores)"
+            ) % len(error_records)
+        self.error_log = errors_log or False
+
+    def action_view_errors(self):
+        """Abre los errores de la exportación, agrupados por categoría"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _("Errores de la Exportación"),
+            'res_model': 'sicore.export.error',
+            'view_mode': 'list,form',
+            'domain': [('log_id', '=', self.id)],
+            'context': {'create': False, 'search_default_group_category': 1},
+        }
+
+    @api.depends('perf_phases', 'perf_total_time')
+    def _compute_perf_summary(self):
+        """Una línea por fase medida: tiempo, porcentaje del total y consultas"""
+        for record in self:
+            phases = record.perf_phases or {}
+            lines = []
+            for phase, label in EXPORT_PHASES:
+                if phase not in phases:
+                    continue
+                phase_time = phases[phase]['time']
+                share = 100.0 * phase_time / record.perf_total_time if record.perf_total_time else 0.0
+                lines.append(
+                    f"{label}: {phase_time:.3f} s ({share:.1f}%) - {phases[phase]['queries']} consultas"
+                )
+            record.perf_summary = '\n'.join(lines) if lines else False
+
+    def unlink(self):
+        """Antes de borrar un log cuyo archivo reutilizan otros, el archivo pasa al primero de ellos"""
+        dependents = self.search([('file_source_id', 'in', self.ids), ('id', 'not in', self.ids)], order='id')
+        for source in dependents.file_source_id:
+            heirs = dependents.filtered(lambda log: log.file_source_id == source)
+            heir = heirs[0]
+            source._get_file_attachment().write({'res_id': heir.id})
+            heir.write({'file_source_id': False, 'file_compressed': source.file_compressed})
+            (heirs - heir).write({'file_source_id': heir.id})
+            heir.invalidate_recordset(['file_content'])
+        return super().unlink()
 
     def action_download_file(self):
-        """Acción para descargar el archivo exportado"""
+        """Acción para descargar el archivo exportado (descomprimido, aunque sea reutilizado)"""
         self.ensure_one()
         return {
             'type': 'ir.actions.act_url',
-            'url': f'/web/content/sicore.export.log/{self.id}/file_content/{self.file_name}?download=true',
+            'url': f'/sicore_export/download/{self.id}',
             'target': 'self',
         }
+
+    def action_compare_with(self):
+        """Abre el wizard para comparar el archivo de esta exportación con el de otra"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _("Comparar Exportaciones"),
+            'res_model': 'sicore.export.compare.wizard',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {'default_log_id': self.id},
+        }
+
+    def _get_download_file_name(self):
+        """Nombre del TXT descargado (sin la extensión .gz del archivo guardado)"""
+        self.ensure_one()
+        return self.file_name.removesuffix('.gz')
+
+    # ============================================================
+    # ALMACENAMIENTO DEL ARCHIVO
+    # ============================================================
+
+    def _get_file_attachment(self):
+        """Adjunto del campo file_content de este log"""
+        self.ensure_one()
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'file_content'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+
+    def _open_file_content(self):
+        """
+        Abre el archivo exportado (el propio o el reutilizado de otra exportación)
+        como archivo binario de lectura, descomprimido si se guardó con gzip.
+        Retorna None si no hay archivo.
+        """
+        self.ensure_one()
+        holder = self.file_source_id or self
+        attachment = holder._get_file_attachment()
+        if not attachment:
+            return None
+        if attachment.store_fname:
+            path = attachment._full_path(attachment.store_fname)
+            return gzip.open(path, 'rb') if holder.file_compressed else open(path, 'rb')
+        content = io.BytesIO(attachment.raw or b'')
+        return gzip.GzipFile(fileobj=content, mode='rb') if holder.file_compressed else content
+
+    def _get_stream_hash(self, stream):
+        """SHA-256 del contenido de stream, leído por bloques"""
+        sha = hashlib.sha256()
+        stream.seek(0)
+        for chunk in iter(lambda: stream.read(FILE_CHUNK_SIZE), b''):
+            sha.update(chunk)
+        stream.seek(0)
+        return sha.hexdigest()
+
+    def _store_export_file(self, stream):
+        """
+        Guarda el TXT generado. Si una exportación anterior de la misma empresa, tipo
+        y período tiene exactamente el mismo contenido, reutiliza su archivo en lugar
+        de guardar otra copia (típico al reintentar una exportación).
+        """
+        self.ensure_one()
+        file_hash = self._get_stream_hash(stream)
+        source = self.search([
+            ('id', '!=', self.id),
+            ('file_hash', '=', file_hash),
+            ('file_source_id', '=', False),
+            ('company_id', '=', self.company_id.id),
+            ('export_type', '=', self.export_type),
+            ('date_from', '=', self.date_from),
+            ('date_to', '=', self.date_to),
+        ], order='id', limit=1)
+        if source:
+            _logger.info("[SICORE] Archivo idéntico al de la exportación %s, se reutiliza", source.id)
+            self.write({'file_hash': file_hash, 'file_source_id': source.id})
+            return
+        self._set_file_content_from_stream(stream)
+        self.file_hash = file_hash
+
+    def _compress_file_content(self):
+        """Reemplaza el archivo de cada log por su versión comprimida con gzip"""
+        for log in self.filtered(lambda l: not l.file_compressed and not l.file_source_id):
+            source = log._open_file_content()
+            if source is None:
+                continue
+            with source, tempfile.TemporaryFile() as compressed:
+                with gzip.GzipFile(fileobj=compressed, mode='wb') as target:
+                    shutil.copyfileobj(source, target, FILE_CHUNK_SIZE)
+                log._set_file_content_from_stream(compressed, mimetype='application/gzip')
+            log.file_compressed = True
+
+    @api.model
+    def _cron_compress_old_files(self):
+        """
+        Comprime los archivos de los logs con más de sicore_export.compress_files_after_days
+        días (desactivado si el parámetro es 0), de a COMPRESS_BATCH_SIZE por ejecución
+        """
+        days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'sicore_export.compress_files_after_days', COMPRESS_FILES_AFTER_DAYS
+        ))
+        if days <= 0:
+            return
+        domain = [
+            ('file_compressed', '=', False),
+            ('file_source_id', '=', False),
+            ('file_content', '!=', False),
+            ('create_date', '<', fields.Datetime.now() - timedelta(days=days)),
+        ]
+        logs = self.search(domain, order='id', limit=COMPRESS_BATCH_SIZE)
+        for log in logs:
+            log._compress_file_content()
+            self.env.cr.commit()
+        if len(logs) == COMPRESS_BATCH_SIZE:
+            self.env.ref('sicore_export.ir_cron_sicore_compress_files')._trigger()
+
+    def _set_file_content_from_stream(self, stream, field_name='file_content', mimetype=FILE_MIMETYPE):
+        """
+        Guarda el archivo exportado (un archivo temporal en disco) en el campo binario.
+        
+        El adjunto se crea con la API estándar de ir.attachment (raw), que resuelve
+        el almacenamiento configurado (filestore o base de datos) y el checksum.
+        La API no admite escribir por bloques: el contenido se carga completo, una
+        sola vez y en bytes (sin base64), por lo que la memoria de este paso crece
+        con el tamaño del archivo. Con FILE_MIMETYPE no se genera además el índice
+        de texto (index_content), que sería una segunda copia del archivo.
+        """
+        self.ensure_one()
+        Attachment = self.env['ir.attachment'].sudo()
+        Attachment.search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', field_name),
+            ('res_id', '=', self.id),
+        ]).unlink()
+        
+        stream.seek(0)
+        attachment = Attachment.create({
+            'name': field_name,
+            'res_model': self._name,
+            'res_field': field_name,
+            'res_id': self.id,
+            'mimetype': mimetype,
+            'raw': stream.read(),
+        })
+        self.invalidate_recordset([field_name])
+        return attachment
+
+    # ============================================================
+    # EXPORTACIÓN EN SEGUNDO PLANO
+    # ============================================================
+
+    def _attach_profile_report(self, report):
+        """Adjunta al log el reporte de cProfile de la generación (si hay)"""
+        self.ensure_one()
+        if not report:
+            return
+        self.profile_attachment_id = self.env['ir.attachment'].sudo().create({
+            'name': f"{self.file_name[:-len('.txt')]}_perfil.txt",
+            'raw': report.encode('utf-8'),
+            'mimetype': 'text/plain',
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+
+    def _update_export_progress(self, processed, total):
+        """
+        Registra el avance de la exportación y lo confirma en la base
+        para que sea visible desde otras sesiones mientras corre el trabajo
+        (el generador lo informa después de cada lote de PROGRESS_BATCH_SIZE registros)
+        """
+        self.ensure_one()
+        self.write({
+            'progress_processed': processed,
+            'progress_total': total,
+        })
+        self.env.cr.commit()
+
+    @api.model
+    def _trigger_export_jobs(self):
+        """
+        Dispara los trabajos programados de EXPORT_JOB_CRONS activos, tantos como
+        exportaciones en cola: las exportaciones independientes (empresas, tipos y
+        períodos de un lote) se generan a la vez, cada una con su propio cursor
+        """
+        queued_count = self.sudo().search_count([('state', '=', 'queued')], limit=len(EXPORT_JOB_CRONS))
+        crons = [self.env.ref(xmlid, raise_if_not_found=False) for xmlid in EXPORT_JOB_CRONS]
+        active_crons = [cron.sudo() for cron in crons if cron and cron.sudo().active]
+        for cron in active_crons[:queued_count]:
+            cron._trigger()
+
+    @api.model
+    def _claim_export_job(self):
+        """
+        Toma la exportación en cola más antigua que no esté tomando otro trabajo
+        programado (bloqueo de fila con SKIP LOCKED; el bloqueo dura hasta que
+        _process_export_job() la confirma como 'En Proceso')
+        """
+        self.flush_model(['state'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT id
+              FROM sicore_export_log
+             WHERE state = 'queued'
+             ORDER BY id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+            """
+        ))
+        row = self.env.cr.fetchone()
+        return self.browse(row[0] if row else [])
+
+    @api.model
+    def _cron_process_export_jobs(self):
+        """
+        Procesa una exportación en cola y, si quedan más, vuelve a disparar los
+        trabajos programados: cada exportación corre en su propia ejecución del
+        cron, dentro de los límites de memoria y tiempo del worker, y los trabajos
+        de EXPORT_JOB_CRONS procesan exportaciones distintas en paralelo.
+        Antes marca como fallidas las exportaciones abandonadas.
+        """
+        self._fail_stale_export_jobs()
+        log = self._claim_export_job()
+        if not log:
+            return
+        log._process_export_job()
+        log.batch_id._check_batch_done()
+        self.env.cr.commit()
+        self._trigger_export_jobs()
+
+    @api.model
+    def _fail_stale_export_jobs(self):
+        """
+        Marca como error las exportaciones 'En Proceso' sin avance (write_date) hace
+        más de sicore_export.export_job_timeout_minutes minutos: el avance se confirma
+        periódicamente, por lo que una exportación sin cambios ya no está corriendo
+        """
+        minutes = int(self.env['ir.config_parameter'].sudo().get_param(
+            'sicore_export.export_job_timeout_minutes', EXPORT_JOB_TIMEOUT_MINUTES
+        ))
+        stale_logs = self.search([
+            ('state', '=', 'running'),
+            ('write_date', '<', fields.Datetime.now() - timedelta(minutes=minutes)),
+        ])
+        if not stale_logs:
+            return
+        _logger.warning("[SICORE] Exportaciones abandonadas marcadas como error: %s", stale_logs.ids)
+        stale_logs.write({
+            'state': 'error',
+            'error_log': _("La exportación en segundo plano se interrumpió (sin avance en %s minutos). "
+                           "Vuelva a generarla.") % minutes,
+        })
+        for log in stale_logs:
+            log.message_post(
+                body=_("La exportación en segundo plano se interrumpió. Ver detalle en Errores/Advertencias."),
+                partner_ids=log.user_id.partner_id.ids,
+                message_type='notification',
+            )
+        stale_logs.batch_id._check_batch_done()
+        self.env.cr.commit()
+
+    def _get_wizard_params(self):
+        """Parámetros guardados del wizard, sin las opciones que ya no existen en el wizard"""
+        self.ensure_one()
+        wizard_fields = self.env['sicore.export.wizard']._fields
+        return {name: value for name, value in (self.export_params or {}).items() if name in wizard_fields}
+
+    def _process_export_job(self):
+        """
+        Genera el archivo de una exportación en cola recreando el wizard con los
+        parámetros guardados, con el usuario y la empresa que la solicitaron
+        """
+        self.ensure_one()
+        self.write({'state': 'running', 'progress_processed': 0, 'progress_total': 0})
+        self.env.cr.commit()
+        
+        try:
+            stats = ExportStats(self.env.cr)
+            wizard = self.env['sicore.export.wizard'].with_user(self.user_id).with_company(
+                self.company_id
+            ).create(self._get_wizard_params())
+            profiler = ExportProfiler(enabled=wizard.adv_profile_export)
+            generator = wizard._get_generator()
+            
+            error_records = []
+            with tempfile.TemporaryFile() as txt_file:
+                with profiler:
+                    _txt, success_count, errors_log, state, total_retention, total_transaction = generator.generate_txt(
+                        wizard, stream=txt_file, progress_callback=self._update_export_progress, stats=stats,
+                        error_records=error_records,
+                    )
+                
+                if not txt_file.tell():
+                    state = 'error'
+                    errors_log = errors_log or _(
+                        "No se pudo generar el archivo TXT - Contenido vacío o ningún registro procesado correctamente"
+                    )
+                else:
+                    with stats.phase('attachment'):
+                        self._store_export_file(txt_file)
+            
+            self.write(dict(
+                stats.get_log_values(success_count),
+                records_count=success_count,
+                total_retention_amount=total_retention,
+                total_transaction_amount=total_transaction,
+                state=state,
+            ))
+            self._store_export_errors(error_records, errors_log)
+            self._attach_profile_report(profiler.get_report())
+            self.message_post(
+                body=' '.join(filter(None, [
+                    _("Exportación en segundo plano finalizada: %s registros exportados.") % success_count,
+                    self._get_error_summary_message(),
+                ])),
+                partner_ids=self.user_id.partner_id.ids,
+                message_type='notification',
+            )
+            self.env.cr.commit()
+        except Exception as e:
+            self.env.cr.rollback()
+            error_msg = f"Error inesperado durante generación:\n{str(e)}\n\nDetalles técnicos:\n{traceback.format_exc()}"
+            _logger.error(f"[SICORE] {error_msg}")
+            self.write({'state': 'error', 'error_log': error_msg})
+            self.message_post(
+                body=_("La exportación en segundo plano falló. Ver detalle en Errores/Advertencias."),
+                partner_ids=self.user_id.partner_id.ids,
+                message_type='notification',
+            )
+            self.env.cr.commit()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api  # type: ignore
+
+# Horas durante las que una vista previa cacheada es válida; las más viejas se
+# ignoran al leer y las borra el trabajo programado de limpieza
+PREVIEW_CACHE_MAX_AGE_HOURS = 24
+
+
+class SicorePreviewCache(models.Model):
+    """
+    Caché de la vista previa del wizard de exportación.
+
+    Cada fila guarda el resultado de la vista previa para una huella de filtros
+    (tipo de exportación + dominio del generador: empresa, fechas, diarios, régimen)
+    y del contexto con el que se calculó (usuario, empresas permitidas e idioma),
+    ya que los valores dependen de las reglas de acceso del usuario.
+    Se invalida al publicar o pasar a borrador asientos con apuntes en cuentas SICORE
+    de la empresa y el período, y al cambiar la configuración SICORE de cuentas,
+    diarios o partners (o el nombre de un partner) de la empresa. Las filas vencen
+    a las PREVIEW_CACHE_MAX_AGE_HOURS horas.
+    """
+    _name = 'sicore.preview.cache'
+    _description = 'Caché de Vista Previa SICORE'
+    _order = 'id'
+
+    fingerprint = fields.Char(
+        string='Huella',
+        required=True,
+        index=True,
+        help='Hash del tipo de exportación, del dominio de búsqueda, del usuario, las empresas permitidas y el idioma'
+    )
+
+    company_id = fields.Many2one(
+        'res.company',
+        string='Empresa',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    date_from = fields.Date(string='Fecha Desde')
+
+    date_to = fields.Date(string='Fecha Hasta')
+
+    records_count = fields.Integer(string='Cantidad de Registros')
+
+    total_retention_amount = fields.Float(string='Monto Total Retenido/Percibido')
+
+    total_transaction_amount = fields.Float(string='Monto Total de Transacciones')
+
+    preview_data = fields.Text(string='Vista Previa')
+
+    _sql_constraints = [
+        ('fingerprint_unique', 'unique(fingerprint)', 'La huella de la vista previa debe ser única.')
+    ]
+
+    @api.model
+    def _get_preview(self, fingerprint):
+        """Retorna los valores cacheados (no vencidos) para fingerprint o None"""
+        self.env.cr.execute("""
+            SELECT records_count, total_retention_amount, total_transaction_amount, preview_data
+              FROM sicore_preview_cache
+             WHERE fingerprint = %s
+               AND write_date > (now() at time zone 'UTC') - make_interval(hours => %s)
+        """, [fingerprint, PREVIEW_CACHE_MAX_AGE_HOURS])
+        row = self.env.cr.fetchone()
+        if not row:
+            return None
+        return {
+            'records_count': row[0],
+            'total_retention_amount_preview': row[1],
+            'total_transaction_amount_preview': row[2],
+            'preview_data': row[3],
+        }
+
+    @api.model
+    def _store_preview(self, fingerprint, company_id, date_from, date_to, values):
+        """Guarda (o reemplaza) la vista previa calculada para fingerprint"""
+        # Las lecturas en cursores de solo lectura no pueden escribir la caché
+        if self.env.cr.readonly:
+            return
+        self.env.cr.execute("""
+            INSERT INTO sicore_preview_cache
+                   (fingerprint, company_id, date_from, date_to, records_count,
+                    total_retention_amount, total_transaction_amount, preview_data,
+                    create_uid, write_uid, create_date, write_date)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                    now() at time zone 'UTC', now() at time zone 'UTC')
+            ON CONFLICT (fingerprint) DO UPDATE
+               SET records_count = EXCLUDED.records_count,
+                   total_retention_amount = EXCLUDED.total_retention_amount,
+                   total_transaction_amount = EXCLUDED.total_transaction_amount,
+                   preview_data = EXCLUDED.preview_data,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, [
+            fingerprint, company_id, date_from or None, date_to or None,
+            values['records_count'],
+            values['total_retention_amount_preview'],
+            values['total_transaction_amount_preview'],
+            values['preview_data'],
+            self.env.uid, self.env.uid,
+        ])
+
+    @api.model
+    def _invalidate_previews(self, company_ids=None, date_from=None, date_to=None):
+        """
+        Descarta las vistas previas de las empresas company_ids cuyo período se
+        superpone con [date_from, date_to]. Sin argumentos descarta toda la caché.
+        """
+        query = "DELETE FROM sicore_preview_cache WHERE TRUE"
+        params = []
+        if company_ids:
+            query += " AND company_id IN %s"
+            params.append(tuple(company_ids))
+        if date_to:
+            query += " AND (date_from IS NULL OR date_from <= %s)"
+            params.append(date_to)
+        if date_from:
+            query += " AND (date_to IS NULL OR date_to >= %s)"
+            params.append(date_from)
+        self.env.cr.execute(query, params)
+
+    @api.model
+    def _cron_cleanup_previews(self):
+        """Borra las vistas previas vencidas (más de PREVIEW_CACHE_MAX_AGE_HOURS horas)"""
+        self.env.cr.execute("""
+            DELETE FROM sicore_preview_cache
+             WHERE write_date <= (now() at time zone 'UTC') - make_interval(hours => %s)
+        """, [PREVIEW_CACHE_MAX_AGE_HOURS])
@@ -37,3 +37,20 @@ class SicoreRegimeCode(models.Model):
     _sql_constraints = [
         ('code_unique', 'unique(code)', 'El código de régimen debe ser único.')
     ]
+    
+    # Los generadores cachean los códigos de los catálogos (_get_catalog_codes)
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return records
+    
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+    
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
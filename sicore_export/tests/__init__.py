@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+from . import test_benchmark_generators
+from . import test_sicore_diff
+from . import test_sicore_format_pool
+from . import test_sicore_layout
+from . import test_sicore_preview_cache
+from . import test_sicore_reader
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de los generadores SICORE con datos sintéticos.
+
+Excluido de las corridas normales de tests (tag '-standard'). Ejecutar sobre una
+base con plan de cuentas argentino instalado:
+
+    odoo-bin -d <base> -u sicore_export --test-tags sicore_benchmark --stop-after-init
+
+Variables de entorno:
+- SICORE_BENCHMARK_SIZES: cantidades de apuntes por generador (por defecto 1000,10000,100000)
+- SICORE_BENCHMARK_REPORT: ruta del reporte JSON (por defecto <tmp>/sicore_benchmark.json)
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+from unittest import SkipTest
+
+from odoo import fields, release  # type: ignore
+from odoo.tests import TransactionCase, tagged  # type: ignore
+
+from ..models.generators.sicore_layout import CUIT_WEIGHTS
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = '1000,10000,100000'
+
+# Apuntes de retención/percepción/combustible por asiento sintético
+LINES_PER_MOVE = 100
+
+
+def make_cuit(number):
+    """CUIT válido (prefijo 30 + número + dígito verificador) para el número dado"""
+    base = '30' + str(number % 10 ** 8).zfill(8)
+    aux = 11 - sum(int(base[i]) * CUIT_WEIGHTS[i] for i in range(10)) % 11
+    check = 0 if aux == 11 else 9 if aux == 10 else aux
+    return base + str(check)
+
+
+@tagged('-standard', '-at_install', 'post_install', 'sicore_benchmark')
+class TestSicoreGeneratorBenchmark(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env.company
+        cls.journal = cls.env['account.journal'].search([
+            ('type', '=', 'general'), ('company_id', '=', cls.company.id),
+        ], limit=1)
+        cls.bank_journal = cls.env['account.journal'].search([
+            ('type', '=', 'bank'), ('company_id', '=', cls.company.id),
+        ], limit=1)
+        cls.counterpart_account = cls.env['account.account'].search([
+            ('account_type', '=', 'liability_current'), ('company_ids', 'in', cls.company.id),
+        ], limit=1)
+        if not (cls.journal and cls.bank_journal and cls.counterpart_account):
+            raise SkipTest("La empresa no tiene plan de cuentas instalado")
+
+        cls.sizes = sorted(int(size) for size in os.environ.get('SICORE_BENCHMARK_SIZES', DEFAULT_SIZES).split(','))
+        cls.results = []
+        cls.company.partner_id.vat = make_cuit(1)
+
+        cuit_type = cls.env.ref('l10n_ar.it_cuit')
+        cls.partners = cls.env['res.partner'].create([{
+            'name': f'Proveedor Benchmark {i}',
+            'vat': make_cuit(1000 + i),
+            'l10n_latam_identification_type_id': cuit_type.id,
+        } for i in range(200)])
+
+        tax_code = cls.env['sicore.tax.code'].create({'code': '9217', 'name': 'Benchmark Ganancias'})
+        regime_code = cls.env['sicore.regime.code'].create({'code': '978', 'name': 'Benchmark Régimen'})
+        cls.data = {}
+        for export_type, type_tax_use in (('retention', 'purchase'), ('perception', 'sale'), ('fuel', 'purchase')):
+            tax_vals = {
+                'name': f'SICORE Benchmark {export_type}',
+                'amount': 2.0,
+                'type_tax_use': type_tax_use,
+                'company_id': cls.company.id,
+                'sicore_tax_code_id': tax_code.id,
+                'sicore_regime_code_id': regime_code.id,
+            }
+            if 'l10n_ar_withholding_payment_type' in cls.env['account.tax']._fields and export_type == 'retention':
+                tax_vals['l10n_ar_withholding_payment_type'] = 'supplier'
+            tax = cls.env['account.tax'].create(tax_vals)
+            cls.data[export_type] = {
+                'tax': tax,
+                'repartition_line': tax.invoice_repartition_line_ids.filtered(lambda l: l.repartition_type == 'tax')[:1],
+                'account': cls.env['account.account'].create({
+                    'code': f'SICBM{export_type[:3].upper()}',
+                    'name': f'SICORE Benchmark {export_type}',
+                    'account_type': 'liability_current',
+                    'sicore_export_type': export_type,
+                }),
+            }
+
+    @classmethod
+    def tearDownClass(cls):
+        if getattr(cls, 'results', None):
+            cls._write_report()
+        super().tearDownClass()
+
+    @classmethod
+    def _write_report(cls):
+        module = cls.env['ir.module.module'].search([('name', '=', 'sicore_export')], limit=1)
+        report_path = os.environ.get('SICORE_BENCHMARK_REPORT') or os.path.join(tempfile.gettempdir(), 'sicore_benchmark.json')
+        report = {
+            'module_version': module.latest_version,
+            'odoo_version': release.version,
+            'database': cls.env.cr.dbname,
+            'date': fields.Datetime.to_string(fields.Datetime.now()),
+            'results': cls.results,
+        }
+        with open(report_path, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=2)
+        _logger.info("[SICORE-BENCH] Reporte escrito en %s", report_path)
+
+    # ============================================================
+    # DATOS SINTÉTICOS
+    # ============================================================
+
+    def _create_lines(self, export_type, count, first_number=0):
+        """Agrega count apuntes publicados del tipo dado, en asientos de LINES_PER_MOVE apuntes"""
+        data = self.data[export_type]
+        date_from = fields.Date.today().replace(day=1)
+        for start in range(0, count, LINES_PER_MOVE):
+            size = min(LINES_PER_MOVE, count - start)
+            line_commands = []
+            for i in range(size):
+                amount = 100.0 + (start + i) % 997
+                line_commands.append((0, 0, {
+                    'name': f'{export_type.upper()}/{first_number + start + i:08d}',
+                    'account_id': data['account'].id,
+                    'partner_id': self.partners[(start + i) % len(self.partners)].id,
+                    'tax_repartition_line_id': data['repartition_line'].id,
+                    'tax_base_amount': amount * 50,
+                    'credit': amount,
+                }))
+            line_commands.append((0, 0, {
+                'name': 'Contrapartida',
+                'account_id': self.counterpart_account.id,
+                'debit': sum(command[2]['credit'] for command in line_commands),
+            }))
+            move_vals = {
+                'move_type': 'entry',
+                'journal_id': self.journal.id,
+                'date': date_from,
+                'line_ids': line_commands,
+            }
+            if export_type == 'retention':
+                payment = self.env['account.payment'].create({
+                    'payment_type': 'outbound',
+                    'partner_type': 'supplier',
+                    'partner_id': self.partners[start % len(self.partners)].id,
+                    'amount': 100000.0,
+                    'journal_id': self.bank_journal.id,
+                })
+                payment_field = 'origin_payment_id' if 'origin_payment_id' in self.env['account.move']._fields else 'payment_id'
+                move_vals[payment_field] = payment.id
+            self.env['account.move'].create(move_vals).action_post()
+        self.env.flush_all()
+
+    # ============================================================
+    # MEDICIÓN
+    # ============================================================
+
+    def _measure(self, export_type, phase, lines, func, trace_memory=False):
+        """Ejecuta func midiendo tiempo y consultas SQL (y pico de memoria si trace_memory)"""
+        self.env.invalidate_all()
+        cr = self.env.cr
+        queries_before = cr.sql_log_count
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        wall_time = time.perf_counter() - start
+        peak_memory = None
+        if trace_memory:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        result = {
+            'generator': export_type,
+            'phase': phase,
+            'lines': lines,
+            'wall_time': round(wall_time, 4),
+            'queries': cr.sql_log_count - queries_before,
+            'lines_per_second': round(lines / wall_time, 1) if wall_time else None,
+            'peak_memory_kb': peak_memory // 1024 if peak_memory is not None else None,
+        }
+        _logger.info("[SICORE-BENCH] %s", result)
+        self.results.append(result)
+        return result
+
+    def _benchmark_generator(self, export_type):
+        # Los datos de cada test se descartan al terminar: los volúmenes se crean de forma incremental
+        created = 0
+        for size in self.sizes:
+            self._create_lines(export_type, size - created, first_number=created)
+            created = size
+            wizard = self.env['sicore.export.wizard'].create({
+                'export_type': export_type,
+                'company_id': self.company.id,
+                'date_from': fields.Date.today().replace(day=1),
+                'date_to': fields.Date.today(),
+                'adv_use_line_cache': False,
+            })
+            wizard._onchange_export_type()
+            generator = wizard._get_generator()
+            domain = generator._get_records_domain(wizard)
+
+            def preview():
+                wizard._get_preview_values(generator, domain)
+
+            outputs = {}
+
+            def export(output_key):
+                """Exportación que guarda el archivo generado en outputs[output_key]"""
+                def run():
+                    with tempfile.TemporaryFile() as txt_file:
+                        generator.generate_txt(wizard, stream=txt_file)
+                        txt_file.seek(0)
+                        outputs[output_key] = txt_file.read()
+                return run
+
+            self._measure(export_type, 'preview', size, preview)
+            self._measure(export_type, 'export', size, export('cold'))
+            self.assertTrue(outputs['cold'].strip(), f"La exportación {export_type} de {size} apuntes está vacía")
+            self._measure(export_type, 'export_memory', size, export('memory'), trace_memory=True)
+            self.assertEqual(outputs['memory'], outputs['cold'])
+
+            # Re-exportación con la caché de líneas: la que la carga y la que la usa
+            # deben generar el mismo archivo, byte a byte, que la exportación sin caché
+            wizard.adv_use_line_cache = True
+            export('warmup')()
+            self.assertEqual(outputs['warmup'], outputs['cold'])
+            self._measure(export_type, 'export_cached', size, export('cached'))
+            self.assertEqual(outputs['cached'], outputs['cold'])
+
+    def test_benchmark_retention(self):
+        self._benchmark_generator('retention')
+
+    def test_benchmark_perception(self):
+        self._benchmark_generator('perception')
+
+    def test_benchmark_fuel(self):
+        self._benchmark_generator('fuel')
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la comparación de archivos SICORE (sin ORM): ordenamiento externo por
+clave y recorrido conjunto de los dos archivos.
+"""
+
+from odoo.tests import TransactionCase, tagged  # type: ignore
+
+from ..models.generators import sicore_diff
+from ..models.generators.sicore_layout import compile_layout
+
+SPECS = {
+    'numero': {'type': 'text'},
+    'cuit': {'type': 'text'},
+    'importe': {'type': 'decimal_comma'},
+}
+
+
+@tagged('post_install', '-at_install')
+class TestSicoreDiff(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.layout = compile_layout(SPECS, separator=';')
+        self.key_func = sicore_diff.make_key_func(self.layout, ('numero', 'cuit'))
+
+    def _diff(self, old_lines, new_lines, chunk_size=sicore_diff.DIFF_SORT_CHUNK_SIZE):
+        return list(sicore_diff.iter_diff(
+            sicore_diff.iter_sorted_lines(old_lines, self.key_func, chunk_size),
+            sicore_diff.iter_sorted_lines(new_lines, self.key_func, chunk_size),
+            self.layout,
+        ))
+
+    def test_key_func(self):
+        self.assertEqual(self.key_func('A 1; 30707753303 ;10,00'), 'A 1\x1e30707753303')
+        # Campos de identidad que no existen en el diseño se ignoran
+        key_func = sicore_diff.make_key_func(self.layout, ('numero', 'inexistente'))
+        self.assertEqual(key_func('A;1;10,00'), 'A')
+
+    def test_sorted_lines_external(self):
+        lines = [f'{number % 7};{number};{number},00' for number in range(25)]
+        expected = sorted((self.key_func(line), line) for line in lines)
+        self.assertEqual(list(sicore_diff.iter_sorted_lines(lines, self.key_func)), expected)
+        # Bloques más chicos que la entrada: ordenamiento con archivos temporales
+        for chunk_size in (1, 4, 25):
+            self.assertEqual(list(sicore_diff.iter_sorted_lines(lines, self.key_func, chunk_size)), expected)
+        self.assertEqual(list(sicore_diff.iter_sorted_lines([], self.key_func, 4)), [])
+
+    def test_diff(self):
+        old_lines = ['C;3;30,00', 'A;1;10,00', 'B;2;20,00', 'D;4;1,00', 'D;4;2,00']
+        new_lines = ['E;5;50,00', 'B;2;25,00', 'A;1;10,00', 'D;4;2,00', 'D;4;1,50']
+        # En una misma clave primero van las líneas idénticas y después los pares modificados
+        for chunk_size in (2, sicore_diff.DIFF_SORT_CHUNK_SIZE):
+            diff = self._diff(old_lines, new_lines, chunk_size)
+            self.assertEqual(diff, [
+                (sicore_diff.DIFF_UNCHANGED, 'A\x1e1', 'A;1;10,00', 'A;1;10,00', ()),
+                (sicore_diff.DIFF_CHANGED, 'B\x1e2', 'B;2;20,00', 'B;2;25,00', (('importe', '20,00', '25,00'),)),
+                (sicore_diff.DIFF_REMOVED, 'C\x1e3', 'C;3;30,00', None, ()),
+                (sicore_diff.DIFF_UNCHANGED, 'D\x1e4', 'D;4;2,00', 'D;4;2,00', ()),
+                (sicore_diff.DIFF_CHANGED, 'D\x1e4', 'D;4;1,00', 'D;4;1,50', (('importe', '1,00', '1,50'),)),
+                (sicore_diff.DIFF_ADDED, 'E\x1e5', None, 'E;5;50,00', ()),
+            ])
+
+    def test_diff_same_key(self):
+        # Varias líneas con la misma clave: se emparejan por parecido y sobra una
+        old_lines = ['A;1;10,00', 'A;1;20,00']
+        new_lines = ['A;1;20,50', 'A;1;10,50', 'A;1;99,00']
+        diff_types = [diff[0] for diff in self._diff(old_lines, new_lines)]
+        self.assertEqual(diff_types.count(sicore_diff.DIFF_CHANGED), 2)
+        self.assertEqual(diff_types.count(sicore_diff.DIFF_ADDED), 1)
+
+        self.assertEqual(self._diff(old_lines, []), [
+            (sicore_diff.DIFF_REMOVED, 'A\x1e1', line, None, ()) for line in old_lines
+        ])
+
+    def test_field_differences(self):
+        self.assertEqual(sicore_diff.get_field_differences(self.layout, 'A;1;10,00', 'A;1;10,00'), ())
+        self.assertEqual(
+            sicore_diff.get_field_differences(self.layout, 'A;1;10,00', 'B;1;11,00'),
+            (('numero', 'A', 'B'), ('importe', '10,00', '11,00')),
+        )
+        # Línea con menos campos: los faltantes se comparan contra ''
+        self.assertEqual(
+            sicore_diff.get_field_differences(self.layout, 'A;1;10,00', 'A;1'),
+            (('importe', '10,00', ''),),
+        )
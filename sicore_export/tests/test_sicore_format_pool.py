@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Tests del formateo de líneas en un pool de procesos: mismo resultado y mismos
+errores por fila que el formateo en el proceso del servidor.
+"""
+
+from datetime import date
+
+from odoo.tests import TransactionCase, tagged  # type: ignore
+
+from ..models.generators import sicore_format_pool
+from ..models.generators.sicore_layout import compile_layout
+from .test_sicore_layout import FIXED_SPECS
+
+
+@tagged('post_install', '-at_install')
+class TestSicoreFormatPool(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.layout = compile_layout(FIXED_SPECS)
+        self.rows = [
+            (i % 99, date(2025, 1 + i % 12, 1 + i % 28), f'FA {i}', i * 37, '30-70775330-3')
+            for i in range(50)
+        ]
+        # Campo requerido vacío y CUIT inválido: errores de validación por fila
+        self.rows[3] = (None,) + self.rows[3][1:]
+        self.rows[7] = self.rows[7][:4] + ('30712345678',)
+
+    def test_format_row(self):
+        ok, line = sicore_format_pool.format_row(self.layout, self.rows[0])
+        self.assertTrue(ok)
+        self.assertEqual(len(line), self.layout.width)
+        ok, error = sicore_format_pool.format_row(self.layout, self.rows[3])
+        self.assertFalse(ok)
+        self.assertEqual(error[0], 'validation')
+
+    def test_pool_matches_local(self):
+        local = [sicore_format_pool.format_row(self.layout, row) for row in self.rows]
+        with sicore_format_pool.SicoreFormatPool(FIXED_SPECS, '', 2, self.layout, chunk_size=8) as pool:
+            self.assertEqual(pool.format_rows(self.rows), local)
+        self.assertEqual([ok for ok, _result in local].count(False), 2)
+
+    def test_can_send_specs(self):
+        self.assertTrue(sicore_format_pool.can_send_specs(FIXED_SPECS))
+        specs = dict(FIXED_SPECS, numero=dict(FIXED_SPECS['numero'], validation=lambda value: bool(value)))
+        self.assertFalse(sicore_format_pool.can_send_specs(specs))
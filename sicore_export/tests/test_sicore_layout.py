@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Tests del motor de diseño de línea SICORE (sin ORM): importes en centavos,
+CUIT y formateo/lectura de líneas.
+"""
+
+from datetime import date
+
+from odoo.exceptions import ValidationError  # type: ignore
+from odoo.tests import TransactionCase, tagged  # type: ignore
+
+from ..models.generators import sicore_layout
+from ..models.generators.sicore_layout import compile_layout
+
+# Diseño de ancho fijo de prueba: 2 + 10 + 8 + 10 + 11 = 41 caracteres
+FIXED_SPECS = {
+    'codigo': {'type': 'integer', 'length': 2, 'position': (1, 2), 'required': True,
+               'padding': 'left', 'fill_char': '0'},
+    'fecha': {'type': 'date', 'format': 'DD/MM/YYYY', 'length': 10, 'position': (3, 12), 'required': True},
+    'numero': {'type': 'text', 'length': 8, 'position': (13, 20)},
+    'importe': {'type': 'decimal_comma', 'length': 10, 'position': (21, 30),
+                'padding': 'left', 'fill_char': '0'},
+    'cuit': {'type': 'cuit', 'length': 11, 'position': (31, 41)},
+}
+
+# Mismo diseño sin posiciones, con separador (como el formato de combustibles)
+SEPARATED_SPECS = {
+    'codigo': {'type': 'integer', 'required': True},
+    'fecha': {'type': 'date', 'format': 'DDMMYYYY', 'required': True},
+    'numero': {'type': 'text'},
+    'importe': {'type': 'decimal_comma'},
+    'cuit': {'type': 'cuit'},
+}
+
+VALUES = {
+    'codigo': 6,
+    'fecha': date(2025, 9, 3),
+    'numero': 'FA 12',
+    'importe': 123456,
+    'cuit': '30-70775330-3',
+}
+
+
+@tagged('post_install', '-at_install')
+class TestSicoreLayout(TransactionCase):
+
+    # ============================================================
+    # IMPORTES EN CENTAVOS
+    # ============================================================
+
+    def test_to_cents(self):
+        self.assertEqual(sicore_layout.to_cents(0), 0)
+        self.assertEqual(sicore_layout.to_cents(None), 0)
+        self.assertEqual(sicore_layout.to_cents(''), 0)
+        self.assertEqual(sicore_layout.to_cents(1234.5), 123450)
+        self.assertEqual(sicore_layout.to_cents('10.5'), 1050)
+        self.assertEqual(sicore_layout.to_cents(-3.456), -346)
+        # Sin error de representación binaria acumulado
+        self.assertEqual(sicore_layout.to_cents(0.1 + 0.2), 30)
+        # Redondea como el formato '.2f' que usaban los generadores
+        for value in (12.345, 2.675, 1.005, 100.125):
+            self.assertEqual(sicore_layout.to_cents(value), int(f'{value:.2f}'.replace('.', '')))
+        with self.assertRaises(ValidationError):
+            sicore_layout.to_cents('abc')
+
+    def test_as_cents(self):
+        self.assertEqual(sicore_layout.as_cents(1050), 1050)
+        self.assertEqual(sicore_layout.as_cents(10.5), 1050)
+        self.assertEqual(sicore_layout.as_cents(None), 0)
+        self.assertEqual(sicore_layout.as_cents('10.5'), 0)
+
+    def test_format_cents(self):
+        self.assertEqual(sicore_layout.format_cents(123456), '1234,56')
+        self.assertEqual(sicore_layout.format_cents(5), '0,05')
+        self.assertEqual(sicore_layout.format_cents(0), '0,00')
+        self.assertEqual(sicore_layout.format_cents(-5), '-0,05')
+        self.assertEqual(sicore_layout.format_cents(-123456), '-1234,56')
+        self.assertEqual(sicore_layout.format_cents(7, decimals=3), '0,007')
+        self.assertEqual(sicore_layout.format_cents(123456, decimals=0), '123456')
+        # Los importes que no son centavos se convierten antes
+        self.assertEqual(sicore_layout.format_cents(12.3), '12,30')
+        self.assertEqual(sicore_layout.format_cents(2.675), '2,67')
+
+    def test_parse_cents(self):
+        self.assertEqual(sicore_layout.parse_cents('1234,56'), 123456)
+        self.assertEqual(sicore_layout.parse_cents('1.234,56'), 123456)
+        self.assertEqual(sicore_layout.parse_cents('0,05'), 5)
+        self.assertEqual(sicore_layout.parse_cents('12.3'), 1230)
+        self.assertEqual(sicore_layout.parse_cents(''), 0)
+        with self.assertRaises(ValueError):
+            sicore_layout.parse_cents('12,3x')
+        for cents in (0, 5, 99, 100, 123456, -5, -123456):
+            self.assertEqual(sicore_layout.parse_cents(sicore_layout.format_cents(cents)), cents)
+
+    # ============================================================
+    # CUIT
+    # ============================================================
+
+    def test_normalize_cuit(self):
+        self.assertEqual(sicore_layout.normalize_cuit('30-70775330-3'), '30707753303')
+        self.assertEqual(sicore_layout.normalize_cuit('30707753303'), '30707753303')
+        self.assertEqual(sicore_layout.normalize_cuit(' 20.12345678.6 '), '20123456786')
+        # Documentos cortos se rellenan con ceros a la izquierda
+        self.assertEqual(sicore_layout.normalize_cuit('27-1234'), '00000271234')
+        self.assertEqual(sicore_layout.normalize_cuit(''), '')
+        self.assertEqual(sicore_layout.normalize_cuit(False), '')
+        self.assertEqual(sicore_layout.normalize_cuit('AR'), '')
+
+    def test_is_valid_cuit(self):
+        self.assertTrue(sicore_layout.is_valid_cuit('30-70775330-3'))
+        self.assertTrue(sicore_layout.is_valid_cuit('20123456786'))
+        self.assertFalse(sicore_layout.is_valid_cuit('30712345678'))
+        self.assertFalse(sicore_layout.is_valid_cuit('3070775330'))
+        self.assertFalse(sicore_layout.is_valid_cuit(''))
+        self.assertFalse(sicore_layout.is_valid_cuit(False))
+
+    def test_validate_cuit(self):
+        self.assertEqual(sicore_layout.validate_cuit('30-70775330-3'), '30707753303')
+        for cuit in ('', '3070775330', '30712345678'):
+            with self.assertRaises(ValidationError):
+                sicore_layout.validate_cuit(cuit)
+
+    # ============================================================
+    # FORMATEO Y LECTURA DE LÍNEAS
+    # ============================================================
+
+    def test_fixed_width_round_trip(self):
+        layout = compile_layout(FIXED_SPECS)
+        self.assertEqual(layout.width, 41)
+        line = layout.format_values(VALUES)
+        self.assertEqual(line, '0603/09/2025FA 12   0001234,5630707753303')
+
+        values, errors = layout.parse_line(line)
+        self.assertEqual(errors, [])
+        self.assertEqual(values, {
+            'codigo': 6,
+            'fecha': date(2025, 9, 3),
+            'numero': 'FA 12',
+            'importe': 123456,
+            'cuit': '30707753303',
+        })
+        # La copia con memoria de conversiones genera la misma línea
+        self.assertEqual(layout.memoized().format_values(VALUES), line)
+
+    def test_separated_round_trip(self):
+        layout = compile_layout(SEPARATED_SPECS, separator=';')
+        self.assertIsNone(layout.width)
+        line = layout.format_values(VALUES)
+        self.assertEqual(line, '6;03092025;FA 12;1234,56;30707753303')
+
+        values, errors = layout.parse_line(line)
+        self.assertEqual(errors, [])
+        self.assertEqual(values['fecha'], date(2025, 9, 3))
+        self.assertEqual(values['importe'], 123456)
+        self.assertEqual(layout.format_values(values), line)
+
+    def test_format_values_errors(self):
+        layout = compile_layout(FIXED_SPECS)
+        with self.assertRaises(ValidationError) as error:
+            layout.format_values(dict(VALUES, fecha=None, cuit='30712345678'))
+        self.assertIn('fecha', str(error.exception))
+        self.assertIn('30712345678', str(error.exception))
+
+    def test_parse_line_errors(self):
+        layout = compile_layout(FIXED_SPECS)
+        line = layout.format_values(VALUES)
+
+        # Ancho incorrecto: error de línea completa, sin valores
+        values, errors = layout.parse_line(line + ' ')
+        self.assertEqual(values, {})
+        self.assertEqual(len(errors), 1)
+
+        # Campo requerido vacío y fecha inválida: se informan los dos, el resto se lee
+        values, errors = layout.parse_line('  31/02/2025' + line[12:])
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(values['importe'], 123456)
+        self.assertNotIn('codigo', values)
+        self.assertNotIn('fecha', values)
+
+        separated = compile_layout(SEPARATED_SPECS, separator=';')
+        values, errors = separated.parse_line('6;03092025;FA 12;1234,56')
+        self.assertEqual(values, {})
+        self.assertEqual(len(errors), 1)
+
+    def test_check_positions(self):
+        specs = dict(FIXED_SPECS, numero=dict(FIXED_SPECS['numero'], position=(14, 21)))
+        with self.assertRaises(ValidationError):
+            compile_layout(specs)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la invalidación de la caché de vista previa al modificar en lote
+partners, cuentas y diarios.
+"""
+
+from odoo.tests import TransactionCase, tagged  # type: ignore
+
+
+@tagged('post_install', '-at_install')
+class TestSicorePreviewCacheInvalidation(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.PreviewCache = cls.env['sicore.preview.cache']
+        cls.company = cls.env.company
+        cls.other_company = cls.env['res.company'].create({'name': 'SICORE Otra Empresa'})
+
+    def _store_previews(self):
+        """Una vista previa cacheada por empresa"""
+        self.PreviewCache.search([]).unlink()
+        for company in (self.company, self.other_company):
+            self.PreviewCache._store_preview(f'test-{company.id}', company.id, False, False, {
+                'records_count': 1,
+                'total_retention_amount_preview': 1.0,
+                'total_transaction_amount_preview': 10.0,
+                'preview_data': '',
+            })
+        self.env.invalidate_all()
+
+    def _cached_companies(self):
+        self.env.invalidate_all()
+        return self.PreviewCache.search([]).company_id
+
+    def test_partner_write(self):
+        partners = self.env['res.partner'].create([
+            {'name': 'Proveedor SICORE 1', 'company_id': self.company.id},
+            {'name': 'Proveedor SICORE 2', 'company_id': self.company.id},
+        ])
+        self._store_previews()
+        partners.write({'name': 'Proveedor SICORE'})
+        self.assertEqual(self._cached_companies(), self.other_company)
+
+        # Un partner compartido (sin empresa) en el lote afecta a todas las empresas
+        partners |= self.env['res.partner'].create({'name': 'Proveedor Compartido', 'company_id': False})
+        self._store_previews()
+        partners.write({'sicore_regime': 'general'})
+        self.assertFalse(self._cached_companies())
+
+        # Otros campos no invalidan
+        self._store_previews()
+        partners.write({'comment': 'Sin cambios SICORE'})
+        self.assertEqual(len(self._cached_companies()), 2)
+
+    def test_account_write(self):
+        accounts = self.env['account.account'].create([{
+            'code': f'SICPC{i}',
+            'name': f'SICORE Caché {i}',
+            'account_type': 'liability_current',
+        } for i in range(2)])
+        self._store_previews()
+        accounts.write({'sicore_export_type': 'retention'})
+        self.assertEqual(self._cached_companies(), self.other_company)
+
+    def test_journal_write(self):
+        journals = self.env['account.journal'].create([{
+            'name': f'SICORE Caché {i}',
+            'code': f'SCPC{i}',
+            'type': 'general',
+        } for i in range(2)])
+        self._store_previews()
+        journals.write({'sicore_export_type': 'budget'})
+        self.assertEqual(self._cached_companies(), self.other_company)
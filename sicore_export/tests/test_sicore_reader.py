@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la lectura de archivos SICORE (mmap y lectura secuencial) y de la
+clave con la que se concilian las líneas leídas contra AFIP.
+"""
+
+import io
+import os
+import tempfile
+from datetime import date
+
+from odoo.tests import TransactionCase, tagged  # type: ignore
+
+from ..models.generators.sicore_layout import compile_layout
+from ..models.generators.sicore_reader import SicoreFileReader, iter_file_lines
+from .test_sicore_layout import FIXED_SPECS, VALUES
+
+
+@tagged('post_install', '-at_install')
+class TestSicoreFileReader(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.layout = compile_layout(FIXED_SPECS)
+        cls.good_line = cls.layout.format_values(VALUES)
+        cls.other_line = cls.layout.format_values(dict(VALUES, codigo=7, importe=5))
+        # Línea 3 vacía, 4 con ancho incorrecto, 6 con fecha inválida
+        cls.content = '\r\n'.join([
+            cls.good_line,
+            cls.other_line,
+            '',
+            'LINEA CORTA',
+            cls.good_line,
+            cls.good_line[:2] + '31/02/2025' + cls.good_line[12:],
+        ]).encode('utf-8') + b'\r\n'
+
+    def _read_file(self, content, **kwargs):
+        """Lee content desde un archivo en disco (camino mmap); retorna (lector, registros)"""
+        with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as txt_file:
+            txt_file.write(content)
+        self.addCleanup(os.unlink, txt_file.name)
+        reader = SicoreFileReader(self.layout, **kwargs)
+        with open(txt_file.name, 'rb') as binary_file:
+            records = list(reader.read(binary_file))
+        return reader, records
+
+    def test_iter_file_lines(self):
+        expected = [(1, 'A'), (2, 'BB'), (4, 'C')]
+        content = b'A\r\nBB\n\r\nC'
+        self.assertEqual(list(iter_file_lines(io.BytesIO(content))), expected)
+        with tempfile.TemporaryFile() as binary_file:
+            binary_file.write(content)
+            binary_file.seek(0)
+            self.assertEqual(list(iter_file_lines(binary_file)), expected)
+        # Archivo vacío: sin mmap y sin líneas
+        with tempfile.TemporaryFile() as binary_file:
+            self.assertEqual(list(iter_file_lines(binary_file)), [])
+
+    def test_read(self):
+        reader, records = self._read_file(self.content)
+        self.assertEqual([line_number for line_number, _values in records], [1, 2, 5])
+        self.assertEqual(records[0][1], {
+            'codigo': 6,
+            'fecha': date(2025, 9, 3),
+            'numero': 'FA 12',
+            'importe': 123456,
+            'cuit': '30707753303',
+        })
+        self.assertEqual(records[1][1]['importe'], 5)
+        self.assertEqual(reader.line_count, 5)
+        self.assertEqual(reader.error_count, 2)
+        self.assertEqual([line_number for line_number, _message in reader.errors], [4, 6])
+        self.assertEqual(len(reader.get_errors_text().splitlines()), 2)
+
+    def test_read_stream(self):
+        # Archivos que no están en disco (ej: adjuntos comprimidos) se leen en forma secuencial
+        reader, records = self._read_file(self.content)
+        stream_reader = SicoreFileReader(self.layout)
+        self.assertEqual(list(stream_reader.read(io.BytesIO(self.content))), records)
+        self.assertEqual(stream_reader.errors, reader.errors)
+
+    def test_max_errors(self):
+        reader, records = self._read_file(self.content, max_errors=1)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(reader.error_count, 2)
+        self.assertEqual(reader.errors[0][0], 4)
+        self.assertEqual(len(reader.errors), 1)
+        # La última línea del texto resume los errores no guardados
+        self.assertEqual(len(reader.get_errors_text().splitlines()), 2)
+
+    def test_encoding(self):
+        layout = compile_layout({'nombre': {'type': 'text'}, 'importe': {'type': 'decimal_comma'}}, separator=';')
+        reader = SicoreFileReader(layout, encoding='latin-1')
+        records = list(reader.read(io.BytesIO('PEÑA;10,50\n'.encode('latin-1'))))
+        self.assertEqual(records, [(1, {'nombre': 'PEÑA', 'importe': 1050})])
+
+
+@tagged('post_install', '-at_install')
+class TestSicoreReconcileKey(TransactionCase):
+
+    def test_fuel_reconcile_key(self):
+        generator = self.env['sicore.fuel.generator']
+        key_func = generator._get_reconcile_key_func()
+        values = {
+            'cuit_proveedor': '30707753303',
+            'fecha_comprobante': date(2025, 9, 3),
+            'numero_comprobante': '000100000009',
+            'importe': 123456,
+        }
+        key = key_func(values)
+        self.assertEqual(key, ('30707753303', date(2025, 9, 3), '100000009', 123456))
+
+        # Archivos de otros sistemas: CUIT con guiones o ceros, número sin relleno, importe decimal
+        self.assertEqual(key_func(dict(
+            values,
+            cuit_proveedor='0030-70775330-3',
+            numero_comprobante='0001-00000009',
+        )), key)
+        self.assertEqual(key_func(dict(values, numero_comprobante='100000009', importe=1234.56)), key)
+        self.assertNotEqual(key_func(dict(values, importe=123455)), key)
+        self.assertNotEqual(key_func(dict(values, fecha_comprobante=date(2025, 9, 4))), key)
+
+        # Una línea exportada y leída de nuevo tiene la misma clave
+        layout = generator._get_line_layout()
+        line = layout.format_values(dict(
+            values,
+            codigo_registro='C',
+            razon_social_proveedor='Proveedor',
+            codigo_impuesto='5',
+            codigo_regimen='001',
+            razon_social_cliente='Empresa',
+            cuit_cliente='30707753303',
+            codigo_constante='3',
+        ))
+        reader = generator._get_file_reader()
+        records = list(reader.read(io.BytesIO(line.encode('utf-8') + b'\r\n')))
+        self.assertEqual(reader.errors, [])
+        self.assertEqual(key_func(records[0][1]), key)
@@ -1,3 +1,5 @@
 # -*- coding: utf-8 -*-
 
 from . import sicore_export_wizard
+from . import sicore_export_compare_wizard
+from . import sicore_reconcile_wizard
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import csv
+import io
+import tempfile
+from odoo import models, fields, _  # type: ignore
+from odoo.exceptions import UserError  # type: ignore
+
+from ..models.generators.sicore_diff import (
+    DIFF_ADDED, DIFF_CHANGED, DIFF_REMOVED, DIFF_UNCHANGED, KEY_FIELD_SEPARATOR,
+)
+
+# Diferencias mostradas en el wizard (el detalle completo va en el reporte CSV)
+DIFF_PREVIEW_LIMIT = 200
+
+
+class SicoreExportCompareWizard(models.TransientModel):
+    """
+    Compara el archivo de una exportación con el de otra del mismo tipo (ej: la
+    presentación rechazada por AFIP y la rectificativa): líneas agregadas, eliminadas
+    y modificadas, con el detalle de los campos que cambiaron.
+    """
+    _name = 'sicore.export.compare.wizard'
+    _description = 'Comparación de Exportaciones SICORE'
+
+    log_id = fields.Many2one(
+        'sicore.export.log',
+        string='Exportación',
+        required=True,
+        readonly=True
+    )
+
+    export_type = fields.Selection(related='log_id.export_type')
+
+    company_id = fields.Many2one(related='log_id.company_id')
+
+    compare_log_id = fields.Many2one(
+        'sicore.export.log',
+        string='Comparar con',
+        required=True,
+        domain="[('id', '!=', log_id), ('export_type', '=', export_type), ('company_id', '=', company_id), "
+               "('state', 'in', ('success', 'warning'))]",
+        help='Exportación anterior: las diferencias se informan desde esta hacia la exportación actual'
+    )
+
+    state = fields.Selection([
+        ('draft', 'Borrador'),
+        ('done', 'Comparado'),
+    ], default='draft')
+
+    added_count = fields.Integer(string='Líneas Agregadas', readonly=True)
+
+    removed_count = fields.Integer(string='Líneas Eliminadas', readonly=True)
+
+    changed_count = fields.Integer(string='Líneas Modificadas', readonly=True)
+
+    unchanged_count = fields.Integer(string='Líneas sin Cambios', readonly=True)
+
+    result_preview = fields.Text(string='Diferencias', readonly=True)
+
+    report_file = fields.Binary(string='Reporte', readonly=True)
+
+    report_file_name = fields.Char(string='Nombre del Reporte')
+
+    def _get_diff_preview_line(self, diff_type, old_line, new_line, differences):
+        """Línea del resumen del wizard para una diferencia"""
+        if diff_type == DIFF_ADDED:
+            return f"+ {new_line}"
+        if diff_type == DIFF_REMOVED:
+            return f"- {old_line}"
+        return f"~ {new_line}\n" + '\n'.join(
+            f"    {name}: '{old_value}' -> '{new_value}'" for name, old_value, new_value in differences
+        )
+
+    def _write_diff_report(self, writer, diff_type, key, old_line, new_line, differences):
+        """Filas del reporte CSV: una por campo modificado, o la línea completa si se agregó/eliminó"""
+        identity = key.replace(KEY_FIELD_SEPARATOR, ' / ')
+        if diff_type == DIFF_CHANGED:
+            writer.writerows(
+                [diff_type, identity, name, old_value, new_value]
+                for name, old_value, new_value in differences
+            )
+        else:
+            writer.writerow([diff_type, identity, '', old_line or '', new_line or ''])
+
+    def action_compare(self):
+        """
+        Compara los dos archivos con el generador del tipo de exportación. Los
+        archivos se leen y ordenan por bloques, sin cargarlos completos en memoria.
+        """
+        self.ensure_one()
+        if self.compare_log_id.export_type != self.log_id.export_type:
+            raise UserError(_("Solo se pueden comparar exportaciones del mismo tipo"))
+
+        old_file = self.compare_log_id._open_file_content()
+        new_file = self.log_id._open_file_content()
+        if old_file is None or new_file is None:
+            raise UserError(_("Las dos exportaciones deben tener un archivo generado"))
+
+        generator = self.env['sicore.export.wizard'].new({'export_type': self.log_id.export_type})._get_generator()
+        counts = dict.fromkeys((DIFF_ADDED, DIFF_REMOVED, DIFF_CHANGED, DIFF_UNCHANGED), 0)
+        preview = []
+        with old_file, new_file, tempfile.TemporaryFile() as report:
+            report_text = io.TextIOWrapper(report, encoding='utf-8', newline='')
+            writer = csv.writer(report_text, delimiter=';')
+            writer.writerow(['tipo', 'identidad', 'campo', 'valor_anterior', 'valor_nuevo'])
+            for diff_type, key, old_line, new_line, differences in generator._iter_file_diff(old_file, new_file):
+                counts[diff_type] += 1
+                if diff_type == DIFF_UNCHANGED:
+                    continue
+                self._write_diff_report(writer, diff_type, key, old_line, new_line, differences)
+                if len(preview) < DIFF_PREVIEW_LIMIT:
+                    preview.append(self._get_diff_preview_line(diff_type, old_line, new_line, differences))
+            report_text.flush()
+            report.seek(0)
+            report_content = report.read()
+            report_text.detach()
+
+        differences_count = counts[DIFF_ADDED] + counts[DIFF_REMOVED] + counts[DIFF_CHANGED]
+        if differences_count > len(preview):
+            preview.append(_("... y %s diferencias más (ver reporte completo)") % (differences_count - len(preview)))
+        self.write({
+            'state': 'done',
+            'added_count': counts[DIFF_ADDED],
+            'removed_count': counts[DIFF_REMOVED],
+            'changed_count': counts[DIFF_CHANGED],
+            'unchanged_count': counts[DIFF_UNCHANGED],
+            'result_preview': '\n'.join(preview) if preview else _("Los archivos no tienen diferencias"),
+            'report_file': base64.b64encode(report_content),
+            'report_file_name': f"diferencias_{self.compare_log_id.id}_{self.log_id.id}.csv",
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
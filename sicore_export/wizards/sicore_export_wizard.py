@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 
-import base64
+import hashlib
+import tempfile
 from odoo import models, fields, api, _  # type: ignore
 from odoo.exceptions import UserError, ValidationError  # type: ignore
 
+from ..models.generators.export_stats import ExportProfiler, ExportStats
+
 
 class SicoreExportWizard(models.TransientModel):
     _name = 'sicore.export.wizard'
@@ -55,6 +58,13 @@ class SicoreExportWizard(models.TransientModel):
         ('simplified', 'Régimen Simplificado'),
     ], string='Régimen', default='all')
     
+    generate_in_background = fields.Boolean(
+        string='Generar en Segundo Plano',
+        default=False,
+        help='Encola la exportación y la procesa un trabajo programado. '
+             'Recomendado para períodos grandes: el avance se ve en el log y se notifica al terminar.'
+    )
+    
     # ============================================================
     # VISTA PREVIA
     # ============================================================
@@ -135,6 +145,35 @@ class SicoreExportWizard(models.TransientModel):
         help='Fecha de emisión del boletín en percepciones (por defecto: 10 ceros)'
     )
     
+    adv_sql_extraction = fields.Boolean(
+        string='Extracción SQL (Retenciones)',
+        default=False,
+        help='Obtiene los datos de retenciones con una única consulta SQL en lugar del ORM. '
+             'Genera el mismo archivo; permite comparar ambos caminos en períodos con muchos pagos.'
+    )
+    
+    adv_use_line_cache = fields.Boolean(
+        string='Reutilizar Líneas sin Cambios',
+        default=False,
+        help='Al re-exportar un período solo se vuelven a formatear los apuntes que cambiaron '
+             '(apunte, asiento, partner, pago o códigos SICORE) desde la última exportación; '
+             'el resto se toma de la caché de líneas. Sin marcar se regenera todo.'
+    )
+    
+    adv_profile_export = fields.Boolean(
+        string='Perfilar Exportación (cProfile)',
+        default=False,
+        help='Ejecuta la exportación bajo cProfile y adjunta las estadísticas ordenadas al log. '
+             'Solo para administradores SICORE; agrega sobrecarga, los tiempos medidos serán mayores.'
+    )
+    
+    adv_parallel_workers = fields.Integer(
+        string='Procesos de Formateo',
+        default=0,
+        help='Cantidad de procesos para formatear las líneas en paralelo en exportaciones grandes '
+             '(desde 5000 apuntes). 0 o 1 = formateo en el proceso del servidor.'
+    )
+    
     # ============================================================
     # CONFIGURACIÓN AVANZADA - COMBUSTIBLES
     # ============================================================
@@ -192,7 +231,11 @@ class SicoreExportWizard(models.TransientModel):
     
     @api.depends('export_type', 'date_from', 'date_to', 'journal_ids', 'partner_regime', 'company_id')
     def _compute_preview_data(self):
-        """Genera vista previa de registros usando read_group para performance"""
+        """
+        Genera vista previa de registros con consultas agregadas (sin cargar registros).
+        El resultado se cachea por huella de filtros en sicore.preview.cache.
+        """
+        PreviewCache = self.env['sicore.preview.cache'].sudo()
         for wizard in self:
             if not wizard.export_type:
                 wizard.preview_data = _("Seleccione un tipo de exportación")
@@ -204,87 +247,105 @@ class SicoreExportWizard(models.TransientModel):
             try:
                 generator = wizard._get_generator()
                 domain = generator._get_records_domain(wizard)
-                model_name = generator._get_model_name()
-                
-                records_count = self.env[model_name].search_count(domain)
-                wizard.records_count = records_count
-                
-                # Calcular totales estimados
-                total_retention = 0.0
-                total_transaction = 0.0
                 
-                if records_count > 0:
-                    records = self.env[model_name].search(domain)
-                    for record in records:
-                        # Para retenciones/percepciones: balance es el importe retenido
-                        if hasattr(record, 'balance'):
-                            total_retention += abs(record.balance)
-                            # Intentar obtener el importe del comprobante desde el asiento
-                            if hasattr(record, 'move_id') and record.move_id:
-                                total_transaction += abs(record.move_id.amount_total or 0.0)
-                        elif hasattr(record, 'amount'):
-                            total_retention += abs(record.amount)
-                
-                wizard.total_retention_amount_preview = total_retention
-                wizard.total_transaction_amount_preview = total_transaction
-                
-                if records_count == 0:
-                    wizard.preview_data = _("No se encontraron registros con los filtros aplicados")
-                    continue
-                # Formatear preview básico con saltos de línea
-                preview_lines = [
-                    "=== RESUMEN DE EXPORTACIÓN ===",
-                    f"Tipo: {dict(wizard._fields['export_type'].selection)[wizard.export_type]}",
-                    f"Período: {wizard.date_from} a {wizard.date_to}",
-                    f"Total Registros: {records_count}",
-                ]
-                
-                # Intentar obtener estadísticas con read_group
-                try:
-                    if model_name == 'account.payment':
-                        group_field = 'partner_id'
-                        amount_field = 'amount'
-                    elif model_name == 'account.move.line':
-                        group_field = 'partner_id'
-                        amount_field = 'balance'
-                    else:  # account.move
-                        group_field = 'partner_id'
-                        amount_field = 'amount_total'
-                    
-                    stats = self.env[model_name].read_group(
-                        domain=domain,
-                        fields=[f'{amount_field}:sum', 'id:count_distinct'],
-                        groupby=[group_field],
-                        lazy=False
+                fingerprint = wizard._get_preview_fingerprint(domain)
+                values = PreviewCache._get_preview(fingerprint)
+                if values is None:
+                    values = wizard._get_preview_values(generator, domain)
+                    PreviewCache._store_preview(
+                        fingerprint, wizard.company_id.id, wizard.date_from, wizard.date_to, values
                     )
-                    
-                    if stats:
-                        preview_lines.extend([
-                            "",
-                            "=== DETALLE POR PARTNER ===",
-                        ])
-                        
-                        for stat in stats[:10]:  # Mostrar solo top 10
-                            partner_name = stat.get(group_field, ['', 'Sin partner'])[1]
-                            total = stat.get(f'{amount_field}', 0)
-                            # Intentar obtener el conteo de diferentes formas
-                            count = stat.get('id', stat.get(f'{group_field}_count', stat.get('__count', 0)))
-                            preview_lines.append(
-                                f"• {partner_name}: {count} registros - Total: ${total:,.2f}"
-                            )
-                        
-                        if len(stats) > 10:
-                            preview_lines.append(f"\n... y {len(stats) - 10} partners más")
-                    
-                except Exception:
-                    preview_lines.append("")
-                    preview_lines.append("(Detalle por partner no disponible)")
-                
-                wizard.preview_data = '\n'.join(preview_lines)
+                wizard.update(values)
                 
             except Exception as e:
                 wizard.preview_data = _("Error generando vista previa: %s") % str(e)
                 wizard.records_count = 0
+                wizard.total_retention_amount_preview = 0.0
+                wizard.total_transaction_amount_preview = 0.0
+    
+    def _get_preview_fingerprint(self, domain):
+        """
+        Huella de la vista previa: filtros (tipo y dominio) más el usuario, las
+        empresas permitidas y el idioma, de los que dependen los valores visibles
+        """
+        self.ensure_one()
+        key = (self.export_type, domain, self.env.uid, tuple(sorted(self.env.companies.ids)), self.env.lang)
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+    
+    def _get_preview_values(self, generator, domain):
+        """Calcula los valores de la vista previa para el dominio del generador"""
+        self.ensure_one()
+        model_name = generator._get_model_name()
+        
+        # Cantidad y totales estimados en una sola consulta agregada
+        records_count, total_retention, total_transaction = generator._get_preview_totals(domain)
+        values = {
+            'records_count': records_count,
+            'total_retention_amount_preview': total_retention,
+            'total_transaction_amount_preview': total_transaction,
+        }
+        
+        if records_count == 0:
+            values['preview_data'] = _("No se encontraron registros con los filtros aplicados")
+            return values
+        # Formatear preview básico con saltos de línea
+        preview_lines = [
+            "=== RESUMEN DE EXPORTACIÓN ===",
+            f"Tipo: {dict(self._fields['export_type'].selection)[self.export_type]}",
+            f"Período: {self.date_from} a {self.date_to}",
+            f"Total Registros: {records_count}",
+        ]
+        
+        # CUITs con dígito verificador incorrecto: filtro indexado sobre res.partner
+        invalid_cuit_count = self.env[model_name].search_count(
+            domain + [('partner_id.sicore_cuit', '!=', False), ('partner_id.sicore_cuit_valid', '=', False)]
+        )
+        if invalid_cuit_count:
+            preview_lines.append(f"Registros con CUIT inválido: {invalid_cuit_count}")
+        
+        # Intentar obtener estadísticas con read_group
+        try:
+            if model_name == 'account.payment':
+                group_field = 'partner_id'
+                amount_field = 'amount'
+            elif model_name == 'account.move.line':
+                group_field = 'partner_id'
+                amount_field = 'balance'
+            else:  # account.move
+                group_field = 'partner_id'
+                amount_field = 'amount_total'
+            
+            stats = self.env[model_name].read_group(
+                domain=domain,
+                fields=[f'{amount_field}:sum', 'id:count_distinct'],
+                groupby=[group_field],
+                lazy=False
+            )
+            
+            if stats:
+                preview_lines.extend([
+                    "",
+                    "=== DETALLE POR PARTNER ===",
+                ])
+                
+                for stat in stats[:10]:  # Mostrar solo top 10
+                    partner_name = stat.get(group_field, ['', 'Sin partner'])[1]
+                    total = stat.get(f'{amount_field}', 0)
+                    # Intentar obtener el conteo de diferentes formas
+                    count = stat.get('id', stat.get(f'{group_field}_count', stat.get('__count', 0)))
+                    preview_lines.append(
+                        f"• {partner_name}: {count} registros - Total: ${total:,.2f}"
+                    )
+                
+                if len(stats) > 10:
+                    preview_lines.append(f"\n... y {len(stats) - 10} partners más")
+            
+        except Exception:
+            preview_lines.append("")
+            preview_lines.append("(Detalle por partner no disponible)")
+        
+        values['preview_data'] = '\n'.join(preview_lines)
+        return values
     
     # ============================================================
     # MÉTODOS AUXILIARES
@@ -304,6 +365,58 @@ class SicoreExportWizard(models.TransientModel):
         
         return self.env[model_name]
     
+    def _get_export_params(self):
+        """
+        Parámetros del wizard serializables (JSON) para recrearlo en una
+        exportación en segundo plano
+        """
+        self.ensure_one()
+        params = {name: self[name] for name in self._fields if name.startswith('adv_')}
+        params.update({
+            'export_type': self.export_type,
+            'company_id': self.company_id.id,
+            'date_from': fields.Date.to_string(self.date_from),
+            'date_to': fields.Date.to_string(self.date_to),
+            'journal_ids': [(6, 0, self.journal_ids.ids)],
+            'partner_regime': self.partner_regime,
+        })
+        return params
+    
+    def _prepare_export_log_vals(self):
+        """Valores comunes del log de exportación según los filtros del wizard"""
+        self.ensure_one()
+        return {
+            'name': f"{dict(self._fields['export_type'].selection)[self.export_type]} - {fields.Date.today()}",
+            'export_type': self.export_type,
+            'company_id': self.company_id.id,
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+            'journal_ids': [(6, 0, self.journal_ids.ids)] if self.journal_ids else False,
+            'partner_regime': self.partner_regime,
+        }
+    
+    def _check_profile_access(self):
+        """El perfilado de exportaciones está reservado a los administradores SICORE"""
+        if self.adv_profile_export and not self.env.user.has_group('sicore_export.group_sicore_manager'):
+            raise UserError(_("Solo los administradores SICORE pueden perfilar exportaciones"))
+    
+    def _action_queue_export(self):
+        """Crea el log en cola y dispara el trabajo programado que lo procesa"""
+        self.ensure_one()
+        log = self.env['sicore.export.log'].create(dict(
+            self._prepare_export_log_vals(),
+            state='queued',
+            export_params=self._get_export_params(),
+        ))
+        self.env['sicore.export.log']._trigger_export_jobs()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'sicore.export.log',
+            'res_id': log.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+    
     # ============================================================
     # ACCIÓN PRINCIPAL
     # ============================================================
@@ -319,53 +432,52 @@ class SicoreExportWizard(models.TransientModel):
         if self.records_count == 0:
             raise UserError(_("No hay registros para exportar con los filtros seleccionados"))
         
+        self._check_profile_access()
+        if self.generate_in_background:
+            return self._action_queue_export()
+        
         try:
             # Obtener generador
+            stats = ExportStats(self.env.cr)
+            profiler = ExportProfiler(enabled=self.adv_profile_export)
             generator = self._get_generator()
             
-            # Generar contenido TXT
-            txt_content, success_count, errors_log, state, total_retention, total_transaction = generator.generate_txt(self)
-            
-            if not txt_content:
-                error_msg = "No se pudo generar el archivo TXT - Contenido vacío o ningún registro procesado correctamente"
-                _logger.error(f"[SICORE] {error_msg}")
-                raise UserError(_(error_msg))
-            
-            # Crear log en segundo plano
-            log = self.env['sicore.export.log'].create({
-                'name': f"{dict(self._fields['export_type'].selection)[self.export_type]} - {fields.Date.today()}",
-                'export_type': self.export_type,
-                'company_id': self.company_id.id,
-                'date_from': self.date_from,
-                'date_to': self.date_to,
-                'records_count': success_count,
-                'total_retention_amount': total_retention,
-                'total_transaction_amount': total_transaction,
-                'file_content': base64.b64encode(txt_content.encode('utf-8')),
-                'state': state,
-                'error_log': errors_log if errors_log else False,
-                'journal_ids': [(6, 0, self.journal_ids.ids)] if self.journal_ids else False,
-                'partner_regime': self.partner_regime,
-            })
-            
-            # Generar nombre de archivo
-            export_type_name = dict(self._fields['export_type'].selection)[self.export_type].lower().replace(' ', '_')
-            today = fields.Date.today().strftime('%Y%m%d')
-            filename = f"sicore_{export_type_name}_{today}.txt"
+            error_records = []
+            with tempfile.TemporaryFile() as txt_file:
+                # Generar contenido TXT escribiendo las líneas directo al archivo temporal
+                with profiler:
+                    _txt, success_count, errors_log, state, total_retention, total_transaction = generator.generate_txt(
+                        self, stream=txt_file, stats=stats, error_records=error_records
+                    )
+                
+                if not txt_file.tell():
+                    error_msg = "No se pudo generar el archivo TXT - Contenido vacío o ningún registro procesado correctamente"
+                    _logger.error(f"[SICORE] {error_msg}")
+                    raise UserError(_(error_msg))
+                
+                # Crear log en segundo plano
+                with stats.phase('attachment'):
+                    log = self.env['sicore.export.log'].create(dict(
+                        self._prepare_export_log_vals(),
+                        records_count=success_count,
+                        total_retention_amount=total_retention,
+                        total_transaction_amount=total_transaction,
+                        state=state,
+                    ))
+                    log._store_export_file(txt_file)
+                log._store_export_errors(error_records, errors_log)
+                log.write(stats.get_log_values(success_count))
+                log._attach_profile_report(profiler.get_report())
             
             # Mensaje de éxito en el sistema
             if errors_log:
                 log.message_post(
-                    body=_("Exportación completada con advertencias:\n%s") % errors_log,
+                    body=_("Exportación completada con advertencias: %s") % log._get_error_summary_message(),
                     message_type='notification'
                 )
             
             # Retornar acción para descargar archivo directamente
-            return {
-                'type': 'ir.actions.act_url',
-                'url': f'/web/content/sicore.export.log/{log.id}/file_content/{filename}?download=true',
-                'target': 'self',
-            }
+            return log.action_download_file()
             
         except ValidationError as e:
             error_msg = f"Error de validación: {str(e)}"
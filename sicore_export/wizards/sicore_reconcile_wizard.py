@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import io
+from dateutil.relativedelta import relativedelta  # type: ignore
+from odoo import models, fields, api, _  # type: ignore
+from odoo.exceptions import UserError, ValidationError  # type: ignore
+
+RECONCILE_STATUS = [
+    ('missing_odoo', 'Falta en Odoo'),
+    ('missing_afip', 'Falta en AFIP'),
+    ('amount_diff', 'Diferencia de Importe'),
+]
+
+
+class SicoreReconcileWizard(models.TransientModel):
+    """
+    Conciliación de un archivo SICORE de AFIP contra los apuntes que exporta el
+    módulo para el mismo tipo y período. Las líneas se emparejan por (CUIT, fecha,
+    número de comprobante, importe) con un índice hash sobre los apuntes, en una
+    sola pasada por el archivo; las que coinciden salvo en el importe se informan
+    como diferencias de importe.
+    """
+    _name = 'sicore.reconcile.wizard'
+    _description = 'Conciliación SICORE con AFIP'
+
+    export_type = fields.Selection([
+        ('perception', 'Percepciones'),
+        ('retention', 'Retenciones'),
+        ('fuel', 'Combustibles'),
+    ], string='Tipo', required=True, default='retention')
+
+    company_id = fields.Many2one(
+        'res.company',
+        string='Empresa',
+        required=True,
+        default=lambda self: self.env.company
+    )
+
+    date_from = fields.Date(
+        string='Fecha Desde',
+        required=True,
+        default=lambda self: fields.Date.today().replace(day=1) - relativedelta(months=1)
+    )
+
+    date_to = fields.Date(
+        string='Fecha Hasta',
+        required=True,
+        default=lambda self: fields.Date.today().replace(day=1) - relativedelta(days=1)
+    )
+
+    afip_file = fields.Binary(string='Archivo AFIP', required=True, attachment=False)
+
+    afip_file_name = fields.Char(string='Nombre del Archivo')
+
+    file_encoding = fields.Selection([
+        ('utf-8', 'UTF-8'),
+        ('latin-1', 'Latin-1 (ISO-8859-1)'),
+    ], string='Codificación', required=True, default='utf-8')
+
+    state = fields.Selection([
+        ('draft', 'Borrador'),
+        ('done', 'Conciliado'),
+    ], default='draft')
+
+    matched_count = fields.Integer(string='Coincidentes', readonly=True)
+
+    missing_odoo_count = fields.Integer(string='Faltan en Odoo', readonly=True)
+
+    missing_afip_count = fields.Integer(string='Faltan en AFIP', readonly=True)
+
+    amount_diff_count = fields.Integer(string='Diferencias de Importe', readonly=True)
+
+    file_error_count = fields.Integer(string='Líneas Mal Formadas', readonly=True)
+
+    file_errors = fields.Text(string='Errores del Archivo', readonly=True)
+
+    line_ids = fields.One2many(
+        'sicore.reconcile.wizard.line',
+        'wizard_id',
+        string='Diferencias',
+        readonly=True
+    )
+
+    @api.constrains('date_from', 'date_to')
+    def _check_dates(self):
+        for wizard in self:
+            if wizard.date_from > wizard.date_to:
+                raise ValidationError(_("La fecha 'Desde' no puede ser mayor a la fecha 'Hasta'"))
+
+    def _get_export_wizard(self):
+        """Wizard de exportación con los valores por defecto del tipo, para obtener los apuntes candidatos"""
+        self.ensure_one()
+        wizard = self.env['sicore.export.wizard'].with_company(self.company_id).create({
+            'export_type': self.export_type,
+            'company_id': self.company_id.id,
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+        })
+        wizard._onchange_export_type()
+        return wizard
+
+    def _get_line_vals(self, status, key, values, key_fields, afip_cents=None, odoo_cents=None,
+                       move_line_id=False, file_line=0):
+        """Valores de una línea del resultado"""
+        _cuit_field, date_field, number_field, _amount_field = key_fields
+        afip_amount = afip_cents / 100 if afip_cents is not None else 0.0
+        odoo_amount = odoo_cents / 100 if odoo_cents is not None else 0.0
+        return {
+            'wizard_id': self.id,
+            'status': status,
+            'cuit': key[0],
+            'date': values.get(date_field),
+            'number': values.get(number_field),
+            'afip_amount': afip_amount,
+            'odoo_amount': odoo_amount,
+            'amount_difference': afip_amount - odoo_amount,
+            'move_line_id': move_line_id,
+            'file_line': file_line,
+        }
+
+    def action_reconcile(self):
+        """
+        Concilia en O(n): índice hash de los apuntes por clave completa, una pasada
+        por el archivo, y luego un índice por (CUIT, fecha, comprobante) para
+        emparejar lo que solo difiere en el importe.
+        """
+        self.ensure_one()
+        export_wizard = self._get_export_wizard()
+        generator = export_wizard._get_generator()
+        key_func = generator._get_reconcile_key_func()
+        key_fields = generator._get_reconcile_key_fields()
+
+        index = {}
+        for line_id, values in generator._iter_reconcile_candidates(export_wizard):
+            index.setdefault(key_func(values), []).append((line_id, values))
+
+        reader = generator._get_file_reader(self.file_encoding)
+        matched_count = 0
+        unmatched = []
+        for line_number, values in reader.read(io.BytesIO(base64.b64decode(self.afip_file))):
+            key = key_func(values)
+            candidates = index.get(key)
+            if candidates:
+                candidates.pop()
+                matched_count += 1
+            else:
+                unmatched.append((key, line_number, values))
+        if not reader.line_count:
+            raise UserError(_("El archivo está vacío"))
+
+        # Lo que no coincidió: índice de los apuntes restantes sin el importe
+        partial_index = {}
+        for key, candidates in index.items():
+            for line_id, values in candidates:
+                partial_index.setdefault(key[:3], []).append((key, line_id, values))
+
+        line_vals = []
+        for key, line_number, values in unmatched:
+            candidates = partial_index.get(key[:3])
+            if candidates:
+                odoo_key, line_id, _odoo_values = candidates.pop()
+                line_vals.append(self._get_line_vals(
+                    'amount_diff', key, values, key_fields, afip_cents=key[3], odoo_cents=odoo_key[3],
+                    move_line_id=line_id, file_line=line_number,
+                ))
+            else:
+                line_vals.append(self._get_line_vals(
+                    'missing_odoo', key, values, key_fields, afip_cents=key[3], file_line=line_number,
+                ))
+        for candidates in partial_index.values():
+            for key, line_id, values in candidates:
+                line_vals.append(self._get_line_vals(
+                    'missing_afip', key, values, key_fields, odoo_cents=key[3], move_line_id=line_id,
+                ))
+
+        self.line_ids.unlink()
+        self.env['sicore.reconcile.wizard.line'].create(line_vals)
+        counts = {status: 0 for status, _label in RECONCILE_STATUS}
+        for vals in line_vals:
+            counts[vals['status']] += 1
+        self.write({
+            'state': 'done',
+            'matched_count': matched_count,
+            'missing_odoo_count': counts['missing_odoo'],
+            'missing_afip_count': counts['missing_afip'],
+            'amount_diff_count': counts['amount_diff'],
+            'file_error_count': reader.error_count,
+            'file_errors': reader.get_errors_text() or False,
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+
+class SicoreReconcileWizardLine(models.TransientModel):
+    _name = 'sicore.reconcile.wizard.line'
+    _description = 'Diferencia de Conciliación SICORE'
+    _order = 'status, cuit, date, number'
+
+    wizard_id = fields.Many2one(
+        'sicore.reconcile.wizard',
+        string='Conciliación',
+        required=True,
+        ondelete='cascade'
+    )
+
+    status = fields.Selection(RECONCILE_STATUS, string='Resultado', required=True)
+
+    cuit = fields.Char(string='CUIT')
+
+    date = fields.Date(string='Fecha')
+
+    number = fields.Char(string='Comprobante')
+
+    afip_amount = fields.Float(string='Importe AFIP', digits=(16, 2))
+
+    odoo_amount = fields.Float(string='Importe Odoo', digits=(16, 2))
+
+    amount_difference = fields.Float(string='Diferencia', digits=(16, 2))
+
+    move_line_id = fields.Many2one('account.move.line', string='Apunte')
+
+    file_line = fields.Integer(string='Línea del Archivo')